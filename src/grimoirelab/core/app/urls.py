@@ -13,7 +13,7 @@ from sortinghat.app.schema import schema
 from sortinghat.core.views import SortingHatGraphQLView
 from ..views import api_login
 
-from grimoirelab.core.scheduler.urls import tasks_urlpatterns
+from grimoirelab.core.scheduler.urls import scheduler_urlpatterns, tasks_urlpatterns
 from grimoirelab.core.datasources.urls import ecosystems_urlpatterns
 
 
@@ -36,6 +36,8 @@ urlpatterns = [
                 ),
                 # Tasks API
                 path("tasks/", include(tasks_urlpatterns)),
+                # Scheduler status
+                path("scheduler/", include(scheduler_urlpatterns)),
             ]
         ),
     ),
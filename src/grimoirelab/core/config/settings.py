@@ -13,6 +13,7 @@
 # https://docs.djangoproject.com/en/4.2/ref/settings/
 #
 
+import importlib.util
 import os
 from pathlib import Path
 
@@ -315,6 +316,77 @@ GRIMOIRELAB_EVENTS_STREAM_NAME = os.environ.get("GRIMOIRELAB_EVENTS_STREAM_NAME"
 GRIMOIRELAB_EVENTS_STREAM_MAX_LENGTH = int(
     os.environ.get("GRIMOIRELAB_EVENTS_STREAM_MAX_LENGTH", 1 * 10**6)
 )
+# When it's set, identity events are also published to this stream with
+# only the fields needed to store the identities, and ushers consume it
+# instead of the events stream. Disabled by default. Once enabled, the
+# group of the ushers on the events stream ('sortinghat-identities') is
+# not read anymore; destroy it when it has processed its entries, or it
+# will keep the events stream from being trimmed. 'fanout-consumers' only
+# reads the events stream, so run 'ushers' to store the identities.
+GRIMOIRELAB_IDENTITIES_STREAM_NAME = os.environ.get("GRIMOIRELAB_IDENTITIES_STREAM_NAME") or None
+GRIMOIRELAB_IDENTITIES_STREAM_MAX_LENGTH = int(
+    os.environ.get("GRIMOIRELAB_IDENTITIES_STREAM_MAX_LENGTH", 1 * 10**6)
+)
+# Seconds the ids of the published events are remembered, so events
+# generated again by retried jobs are not published twice.
+# Set to 0 to disable it.
+GRIMOIRELAB_EVENTS_DEDUP_WINDOW = int(os.environ.get("GRIMOIRELAB_EVENTS_DEDUP_WINDOW", 0))
+# Maximum number of events packed in a single entry of the events stream.
+# Set to 0 to publish one event per entry. Take into account the maximum
+# length of the stream counts entries, not events.
+GRIMOIRELAB_EVENTS_ENVELOPE_SIZE = int(os.environ.get("GRIMOIRELAB_EVENTS_ENVELOPE_SIZE", 0))
+GRIMOIRELAB_EVENTS_ENVELOPE_MAX_BYTES = int(
+    os.environ.get("GRIMOIRELAB_EVENTS_ENVELOPE_MAX_BYTES", 1024 * 1024)
+)
+# Compression of the entries with multiple events ('zlib' or 'zstd').
+# 'zstd' requires the 'zstandard' package (install the 'zstd' extra).
+GRIMOIRELAB_EVENTS_COMPRESSION = os.environ.get("GRIMOIRELAB_EVENTS_COMPRESSION") or None
+
+if GRIMOIRELAB_EVENTS_COMPRESSION not in (None, "none", "zlib", "zstd"):
+    raise ValueError(f"'{GRIMOIRELAB_EVENTS_COMPRESSION}' compression is not supported")
+elif GRIMOIRELAB_EVENTS_COMPRESSION == "zstd" and importlib.util.find_spec("zstandard") is None:
+    raise ValueError("'zstd' compression requires the 'zstandard' package")
+# Eventizer jobs pause when the consumers of the events stream have this
+# number of entries pending to process, and resume when they are below the
+# low watermark (half of the high watermark by default). Set to 0 to disable.
+GRIMOIRELAB_EVENTS_STREAM_HIGH_WATERMARK = int(
+    os.environ.get("GRIMOIRELAB_EVENTS_STREAM_HIGH_WATERMARK", 0)
+)
+GRIMOIRELAB_EVENTS_STREAM_LOW_WATERMARK = int(
+    os.environ.get("GRIMOIRELAB_EVENTS_STREAM_LOW_WATERMARK", 0)
+)
+# Maximum seconds an eventizer job is paused in total because of the
+# backlog of the events stream. After that, a warning is logged and the
+# job keeps publishing. Set to 0 to wait without limit.
+GRIMOIRELAB_EVENTS_STREAM_MAX_WAIT = int(
+    os.environ.get("GRIMOIRELAB_EVENTS_STREAM_MAX_WAIT", 30 * 60)
+)
+# Periodically remove from the streams the entries already processed by
+# every active consumer group. An alert is logged when the slowest group is
+# close to the maximum length of the stream, as unconsumed events would
+# be dropped. Disabled by default.
+GRIMOIRELAB_STREAMS_TRIMMING = os.environ.get("GRIMOIRELAB_STREAMS_TRIMMING", "False").lower() in (
+    "true",
+    "1",
+)
+# Consumer groups without consumers that read the stream in this number of
+# seconds are considered abandoned. They are not taken into account to
+# pause eventizer jobs or to trim the streams, so the entries they didn't
+# process can be removed. Set it longer than any expected downtime of the
+# consumers. Set to 0 to take into account every group.
+GRIMOIRELAB_STREAMS_GROUP_IDLE_TIMEOUT = int(
+    os.environ.get("GRIMOIRELAB_STREAMS_GROUP_IDLE_TIMEOUT", 60 * 60)
+)
+# Consumers whose group is more entries behind the head of the stream than
+# this threshold will read the stream in catch-up mode (large XRANGE batches)
+# until they are close to the head. Set to 0 to disable catch-up mode.
+GRIMOIRELAB_CONSUMERS_CATCHUP_THRESHOLD = int(
+    os.environ.get("GRIMOIRELAB_CONSUMERS_CATCHUP_THRESHOLD", 0)
+)
+# Only one replica of the server runs the maintenance tasks. The leader
+# holds a lock in Redis that expires after this number of seconds unless
+# it's renewed, so another replica takes over when the leader dies.
+GRIMOIRELAB_MAINTENANCE_LEADER_TTL = int(os.environ.get("GRIMOIRELAB_MAINTENANCE_LEADER_TTL", 60))
 
 RQ = {
     "JOB_CLASS": "grimoirelab.core.scheduler.jobs.GrimoireLabJob",
@@ -329,6 +401,41 @@ GRIMOIRELAB_JOB_INTERVAL = int(os.environ.get("GRIMOIRELAB_JOB_INTERVAL", 60 * 6
 GRIMOIRELAB_JOB_MAX_RETRIES = int(os.environ.get("GRIMOIRELAB_JOB_MAX_RETRIES", 5))
 GRIMOIRELAB_JOB_RESULT_TTL = int(os.environ.get("GRIMOIRELAB_JOB_RESULT_TTL", 300))
 GRIMOIRELAB_JOB_TIMEOUT = int(os.environ.get("GRIMOIRELAB_JOB_TIMEOUT", -1))
+# Only one job of each task runs at once. The running job holds a lease
+# that its process renews while it runs; when the process dies, the lease
+# expires after this number of seconds and a new job can run.
+GRIMOIRELAB_TASK_LEASE_TTL = int(os.environ.get("GRIMOIRELAB_TASK_LEASE_TTL", 120))
+# Fraction of the interval of recurring tasks their jobs can be moved
+# (half of it earlier or later), so tasks created at once don't run in
+# waves. Each task has a fixed phase in the interval; its first job is
+# delayed to it and the next ones are moved towards it, so the frequency
+# of the tasks doesn't change. Set to 0 to disable.
+GRIMOIRELAB_JOB_JITTER = float(os.environ.get("GRIMOIRELAB_JOB_JITTER", 0))
+# Maximum number of jobs scheduled to start in the same minute. Jobs that
+# don't fit are delayed to the next minute with room. Set to 0 to disable.
+GRIMOIRELAB_JOBS_PER_MINUTE = int(os.environ.get("GRIMOIRELAB_JOBS_PER_MINUTE", 0))
+# Adapt the interval between the jobs of eventizer tasks to the activity of
+# their data sources. The interval is multiplied by the factor after a job
+# that fetched nothing and divided by it after a job that fetched items,
+# between the minimum and the maximum number of seconds.
+GRIMOIRELAB_ADAPTIVE_INTERVAL = os.environ.get(
+    "GRIMOIRELAB_ADAPTIVE_INTERVAL", "False"
+).lower() in ("true", "1")
+GRIMOIRELAB_ADAPTIVE_INTERVAL_MIN = int(
+    os.environ.get("GRIMOIRELAB_ADAPTIVE_INTERVAL_MIN", 60 * 15)
+)
+GRIMOIRELAB_ADAPTIVE_INTERVAL_MAX = int(
+    os.environ.get("GRIMOIRELAB_ADAPTIVE_INTERVAL_MAX", 60 * 60 * 24)
+)
+GRIMOIRELAB_ADAPTIVE_INTERVAL_FACTOR = float(
+    os.environ.get("GRIMOIRELAB_ADAPTIVE_INTERVAL_FACTOR", 2)
+)
+# Eventizer jobs can save their progress every number of events or
+# seconds, whatever happens first, so they can be resumed if the worker
+# dies. Checkpoints are disabled by default (0); long jobs (e.g. the
+# first fetch of large repositories) are the ones that benefit from them.
+GRIMOIRELAB_JOB_CHECKPOINT_EVENTS = int(os.environ.get("GRIMOIRELAB_JOB_CHECKPOINT_EVENTS", 0))
+GRIMOIRELAB_JOB_CHECKPOINT_INTERVAL = int(os.environ.get("GRIMOIRELAB_JOB_CHECKPOINT_INTERVAL", 0))
 
 GRIMOIRELAB_GIT_STORAGE_PATH = os.environ.get("GRIMOIRELAB_GIT_PATH", "~/.perceval")
 
@@ -351,6 +458,22 @@ GRIMOIRELAB_ARCHIVIST = {
     "ROLLOVER_INDICES": os.environ.get("GRIMOIRELAB_ARCHIVIST_ROLLOVER_INDICES", "True").lower()
     in ("true", "1"),
     "ROLLOVER_SIZE": os.environ.get("GRIMOIRELAB_ARCHIVIST_ROLLOVER_SIZE", "20gb"),
+    "ENRICH_IDENTITIES": os.environ.get("GRIMOIRELAB_ARCHIVIST_ENRICH_IDENTITIES", "False").lower()
+    in ("true", "1"),
+    "IDENTITIES_CACHE_TTL": int(os.environ.get("GRIMOIRELAB_ARCHIVIST_IDENTITIES_CACHE_TTL", 3600)),
+}
+
+#
+# Ushers configuration
+#
+GRIMOIRELAB_USHERS = {
+    # Seconds identities already stored are remembered by the shared cache
+    "IDENTITY_CACHE_TTL": int(os.environ.get("GRIMOIRELAB_USHERS_IDENTITY_CACHE_TTL", 86400)),
+    # Maximum number of identities in the local cache of each usher
+    "IDENTITY_CACHE_SIZE": int(os.environ.get("GRIMOIRELAB_USHERS_IDENTITY_CACHE_SIZE", 100000)),
+    # File where the Bloom filter of the identities stored in SortingHat is
+    # created when the ushers start. Leave it empty to disable it.
+    "IDENTITIES_BLOOM_FILTER": os.environ.get("GRIMOIRELAB_USHERS_IDENTITIES_BLOOM_FILTER") or None,
 }
 
 #
@@ -39,6 +39,7 @@ if typing.TYPE_CHECKING:
 BULK_SIZE = 100
 ROLLOVER_SIZE = "20gb"
 DEFAULT_INDEX = "events"
+IDENTITIES_CACHE_TTL = 3600  # 1 hour (in s)
 
 MAPPING = {
     "mappings": {
@@ -94,12 +95,19 @@ class OpenSearchArchivist(Consumer):
 
     This class implements the methods to store the events in an OpenSearch instance.
 
+    Optionally, identity events can be enriched with the SortingHat
+    individual and organization of the identity before storing them
+    (see `IdentityResolver`).
+
     :param url: OpenSearch URL
     :param user: OpenSearch username
     :param password: OpenSearch password
     :param index: OpenSearch index name
     :param bulk_size: Number of items to store in a single bulk request
     :param verify_certs: Whether to verify SSL certificates
+    :param enrich_identities: Whether to add the individual and organization
+        to identity events
+    :param identities_cache_ttl: Seconds the resolved identities are cached
     :param kwargs: Additional keyword arguments to pass to the parent class
     """
 
@@ -111,6 +119,8 @@ class OpenSearchArchivist(Consumer):
         index: str = DEFAULT_INDEX,
         bulk_size: int = BULK_SIZE,
         verify_certs: bool = False,
+        enrich_identities: bool = False,
+        identities_cache_ttl: int = IDENTITIES_CACHE_TTL,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -123,6 +133,12 @@ class OpenSearchArchivist(Consumer):
             password=password,
             verify_certs=verify_certs,
         )
+        self.identity_resolver = None
+
+        if enrich_identities:
+            from .identities import IdentityResolver
+
+            self.identity_resolver = IdentityResolver(ttl=identities_cache_ttl)
 
     def process_entries(self, entries: Iterable[Entry], recovery: bool = False) -> None:
         """Process entries and store them in the OpenSearch instance."""
@@ -133,9 +149,28 @@ class OpenSearchArchivist(Consumer):
         else:
             bulk_size = self.bulk_size
 
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+
+            if len(batch) >= bulk_size:
+                self._store_entries(batch)
+                batch = []
+
+        if batch:
+            self._store_entries(batch)
+
+    def _store_entries(self, entries: list[Entry]):
+        """Store a batch of entries in a bulk request and ack the successful ones."""
+
+        if self.identity_resolver:
+            try:
+                self.identity_resolver.enrich(entry.event for entry in entries)
+            except Exception as e:
+                self.logger.warning(f"Failed to enrich identities: {e}.")
+
         bulk_json = ""
         entry_map = {}
-        current = 0
         for entry in entries:
             event = entry.event
             data_json = json.dumps(event)
@@ -143,27 +178,13 @@ class OpenSearchArchivist(Consumer):
             bulk_json += data_json + "\n"
 
             entry_map[event["id"]] = entry.message_id
-            current += 1
-
-            if current >= bulk_size:
-                new_items, failed_ids = self._bulk(body=bulk_json, index=self.index)
-                if new_items > 0:
-                    # ACK successful items
-                    for failed_id in failed_ids:
-                        entry_map.pop(failed_id, None)
-                    self.ack_entries(list(entry_map.values()))
-
-                entry_map = {}
-                current = 0
-                bulk_json = ""
-
-        if current > 0:
-            new_items, failed_ids = self._bulk(body=bulk_json, index=self.index)
-            if new_items > 0:
-                # ACK successful items
-                for failed_id in failed_ids:
-                    entry_map.pop(failed_id, None)
-                self.ack_entries(list(entry_map.values()))
+
+        new_items, failed_ids = self._bulk(body=bulk_json, index=self.index)
+        if new_items > 0:
+            # ACK successful items
+            for failed_id in failed_ids:
+                entry_map.pop(failed_id, None)
+            self.ack_entries(list(entry_map.values()))
 
     def _bulk(self, body: str, index: str) -> tuple[int, list]:
         """Store data in the OpenSearch instance.
@@ -197,7 +218,10 @@ class OpenSearchArchivist(Consumer):
 
 
 class OpenSearchArchivistPool(ConsumerPool):
-    """Pool of OpenSearch archivist consumers."""
+    """Pool of OpenSearch archivist consumers.
+
+    See `OpenSearchArchivist` for the description of the parameters.
+    """
 
     CONSUMER_CLASS = OpenSearchArchivist
 
@@ -211,6 +235,8 @@ class OpenSearchArchivistPool(ConsumerPool):
         rollover_indices: bool = True,
         rollover_size: str = ROLLOVER_SIZE,
         verify_certs: bool = False,
+        enrich_identities: bool = False,
+        identities_cache_ttl: int = IDENTITIES_CACHE_TTL,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -223,6 +249,8 @@ class OpenSearchArchivistPool(ConsumerPool):
         self.rollover_indices = rollover_indices
         self.rollover_size = rollover_size
         self.verify_certs = verify_certs
+        self.enrich_identities = enrich_identities
+        self.identities_cache_ttl = identities_cache_ttl
 
     @property
     def extra_consumer_kwargs(self):
@@ -232,6 +260,8 @@ class OpenSearchArchivistPool(ConsumerPool):
             "password": self.password,
             "bulk_size": self.bulk_size,
             "verify_certs": self.verify_certs,
+            "enrich_identities": self.enrich_identities,
+            "identities_cache_ttl": self.identities_cache_ttl,
         }
         if self.rollover_indices:
             kwargs["index"] = f"{self.index}-write"
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import typing
+
+if typing.TYPE_CHECKING:
+    from typing import Iterable
+
+
+BLOOM_FILTER_MAGIC = b"GLBF"
+BLOOM_FILTER_HEADER = struct.Struct("<4sQIQ")  # magic, bits, hashes, items
+BLOOM_FILTER_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """Compact set of keys with false positives but no false negatives.
+
+    The filter can be stored in a file and opened by several
+    processes at the same time. Opened filters are memory-mapped
+    read-only, so all of them share the same pages of memory.
+
+    Use `BloomFilter.build` to create a filter file from a list
+    of keys, and `BloomFilter.open` to read it.
+
+    :param bits: buffer with the bits of the filter
+    :param num_bits: size of the filter in bits
+    :param num_hashes: number of bits set for each key
+    :param num_items: number of keys added to the filter
+    :param offset: position of the first bit in the buffer
+    """
+
+    def __init__(
+        self,
+        bits: bytearray | mmap.mmap,
+        num_bits: int,
+        num_hashes: int,
+        num_items: int = 0,
+        offset: int = 0,
+    ):
+        self._bits = bits
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.num_items = num_items
+        self._offset = offset
+
+    @classmethod
+    def create(cls, capacity: int, error_rate: float = BLOOM_FILTER_ERROR_RATE) -> BloomFilter:
+        """Create an empty filter for `capacity` keys in memory."""
+
+        capacity = max(capacity, 1)
+        num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        num_bits = max(num_bits, 8)
+        num_hashes = max(round(num_bits / capacity * math.log(2)), 1)
+
+        return cls(bytearray(math.ceil(num_bits / 8)), num_bits, num_hashes)
+
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        keys: Iterable[str],
+        capacity: int,
+        error_rate: float = BLOOM_FILTER_ERROR_RATE,
+    ) -> int:
+        """Create a filter file with the given keys.
+
+        The file is written to a temporary file first and then renamed,
+        so processes that have the previous version opened are not
+        affected.
+
+        :returns: number of keys added to the filter
+        """
+        bloom = cls.create(capacity, error_rate=error_rate)
+        for key in keys:
+            bloom.add(key)
+
+        dirname = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix=".bloom-")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(
+                    BLOOM_FILTER_HEADER.pack(
+                        BLOOM_FILTER_MAGIC, bloom.num_bits, bloom.num_hashes, bloom.num_items
+                    )
+                )
+                fp.write(bloom._bits)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+        return bloom.num_items
+
+    @classmethod
+    def open(cls, path: str) -> BloomFilter:
+        """Open a filter file memory-mapped in read-only mode."""
+
+        with open(path, "rb") as fp:
+            bits = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, num_bits, num_hashes, num_items = BLOOM_FILTER_HEADER.unpack_from(bits)
+        if magic != BLOOM_FILTER_MAGIC:
+            bits.close()
+            raise ValueError(f"'{path}' is not a Bloom filter file")
+
+        return cls(bits, num_bits, num_hashes, num_items, offset=BLOOM_FILTER_HEADER.size)
+
+    def add(self, key: str):
+        """Add a key to the filter."""
+
+        for position in self._positions(key):
+            index = self._offset + (position >> 3)
+            self._bits[index] |= 1 << (position & 7)
+        self.num_items += 1
+
+    def __contains__(self, key: str) -> bool:
+        for position in self._positions(key):
+            index = self._offset + (position >> 3)
+            if not self._bits[index] & (1 << (position & 7)):
+                return False
+        return True
+
+    def close(self):
+        """Release the memory mapped by the filter."""
+
+        if isinstance(self._bits, mmap.mmap):
+            self._bits.close()
+
+    def _positions(self, key: str) -> Iterable[int]:
+        """Compute the bits of a key using double hashing."""
+
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
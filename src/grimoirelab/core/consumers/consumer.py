@@ -29,6 +29,8 @@ from multiprocessing import Event as ProcessEvent
 import redis
 import structlog
 
+from .envelope import envelope_types, is_envelope, unpack_envelope
+
 if typing.TYPE_CHECKING:
     from typing import Iterable
     from multiprocessing.synchronize import Event as ProcessEventType
@@ -39,6 +41,11 @@ ENTRIES_READ_COUNT = 10
 RECOVER_IDLE_TIME = 300000  # 5 minutes (in ms)
 STREAM_BLOCK_TIMEOUT = 60000  # 1 minute (in ms)
 
+CATCHUP_READ_COUNT = 1000
+CATCHUP_LOCK_PREFIX = "grimoirelab:consumers:catchup:"
+CATCHUP_LOCK_TIMEOUT = 300  # 5 minutes (in s)
+CATCHUP_WAIT_TIME = 5
+
 EXPONENTIAL_BACKOFF_FACTOR = 2
 MAX_CONNECTION_WAIT_TIME = 60
 
@@ -55,8 +62,23 @@ class Consumer:
     :param consumer_name: Name of the consumer.
     :param stream_block_timeout: Timeout for blocking read from the stream.
     :param logging_level: Logging level for the consumer.
+    :param catchup_threshold: Number of entries the consumer group
+        must be behind the head of the stream to run in catch-up mode;
+        `None` disables it.
+
+    Subclasses can set `EVENT_TYPES` to the types of events they
+    process. Entries with a `type` header of any other type are
+    acknowledged in bulk without decoding their payload. Entries
+    without headers are always decoded and passed to `process_entries`.
+
+    Stream entries can also be envelopes with several events (see
+    `grimoirelab.core.consumers.envelope`). They are unpacked
+    transparently, and they are acknowledged and recovered as
+    a whole.
     """
 
+    EVENT_TYPES: tuple[str, ...] | None = None
+
     def __init__(
         self,
         connection: redis.Redis,
@@ -66,6 +88,7 @@ class Consumer:
         stream_block_timeout: int = STREAM_BLOCK_TIMEOUT,
         logging_level: str | int = logging.INFO,
         stop_event: ProcessEventType | ThreadEventType = None,
+        catchup_threshold: int | None = None,
     ):
         self.connection = connection
         self.stream_name = stream_name
@@ -75,6 +98,9 @@ class Consumer:
         self.logging_level = logging_level
         self.logger = self._create_logger()
         self._stop_event = stop_event or ProcessEvent()
+        self.catchup_threshold = catchup_threshold
+        self._catchup_acked = None
+        self._envelopes = {}
 
     def start(self, burst: bool = False):
         """Process events from the stream.
@@ -85,6 +111,10 @@ class Consumer:
         Once the entries are recovered, it starts to collect new entries
         from the stream blocking for 'stream_block_timeout' if there aren't
         new entries.
+
+        When catch-up mode is enabled and the consumer group is too far
+        behind the head of the stream, new entries are read in catch-up
+        mode instead (see `catch_up`).
         """
         self.logger.info(
             f"Starting consumer '{self.consumer_name}' for '{self.stream_name}:{self.consumer_group}'"
@@ -98,8 +128,9 @@ class Consumer:
                 recovered_entries = self.recover_stream_entries()
                 self.process_entries(recovered_entries, recovery=True)
 
-                new_entries = self.fetch_new_entries()
-                self.process_entries(new_entries)
+                if not self.catch_up():
+                    new_entries = self.fetch_new_entries()
+                    self.process_entries(new_entries)
             except redis.exceptions.ConnectionError as conn_err:
                 self.logger.error(
                     f"Could not connect to Redis instance: {conn_err} Retrying in {connection_wait_time} seconds..."
@@ -147,11 +178,7 @@ class Consumer:
                 #             2) "value"
                 if response:
                     messages = response[0][1]
-                    for message in messages:
-                        message_id = message[0]
-                        message_data = message[1][b"data"]
-
-                        yield Entry(message_id=message_id, event=json.loads(message_data))
+                    yield from self._parse_messages(messages)
 
                     # Avoid excessive blocking when no new entries are available
                     block_time = 1000
@@ -190,11 +217,7 @@ class Consumer:
             #          2) "value"
             # 3) (empty array) (message IDs that no longer exist in the stream)
             messages = response[1]
-            for message in messages:
-                message_id = message[0]
-                message_data = message[1][b"data"]
-
-                yield Entry(message_id=message_id, event=json.loads(message_data))
+            yield from self._parse_messages(messages)
 
             if not messages:
                 break
@@ -206,6 +229,143 @@ class Consumer:
             "events recovered", stream=self.stream_name, consumer_group=self.consumer_group
         )
 
+    def catch_up(self) -> bool:
+        """Process the stream in catch-up mode when the group lags behind.
+
+        When the consumer group is more than 'catchup_threshold' entries
+        behind the head of the stream, reading entries with XREADGROUP
+        is expensive because Redis must keep track of every entry
+        delivered. In catch-up mode, entries are read in large batches
+        with XRANGE, and once they are processed and acknowledged, the
+        last delivered id of the group is moved forward with
+        XGROUP SETID. As the position is stored in the group itself,
+        it is kept between restarts.
+
+        If an entry is not acknowledged, the position of the group is
+        moved right before it, and the consumer switches back to normal
+        mode, so the entry is delivered again using XREADGROUP.
+
+        Only one consumer of the group can run in catch-up mode at the
+        same time. The rest of them will wait until it finishes.
+
+        :returns: `True` when other consumer of the group is running
+            in catch-up mode, so new entries must not be read.
+        """
+        if self.catchup_threshold is None:
+            return False
+
+        lag = self._group_lag()
+        if lag is None or lag <= self.catchup_threshold:
+            return False
+
+        lock = self.connection.lock(
+            f"{CATCHUP_LOCK_PREFIX}{self.stream_name}:{self.consumer_group}",
+            timeout=CATCHUP_LOCK_TIMEOUT,
+        )
+        if not lock.acquire(blocking=False):
+            self.logger.debug(
+                "waiting for catch-up", stream=self.stream_name, consumer_group=self.consumer_group
+            )
+            self._stop_event.wait(CATCHUP_WAIT_TIME)
+            return True
+
+        self.logger.info(
+            "catch-up mode started",
+            stream=self.stream_name,
+            consumer_group=self.consumer_group,
+            lag=lag,
+        )
+        try:
+            self._run_catch_up(lock)
+        finally:
+            self._catchup_acked = None
+            try:
+                lock.release()
+            except redis.exceptions.LockError:
+                pass
+
+        self.logger.info(
+            "catch-up mode finished",
+            stream=self.stream_name,
+            consumer_group=self.consumer_group,
+            lag=self._group_lag(),
+        )
+        return False
+
+    def _run_catch_up(self, lock: redis.lock.Lock):
+        """Process batches of entries until the group is close to the head."""
+
+        group = self._group_info()
+        last_id = group["last-delivered-id"]
+        entries_read = group["entries-read"]
+
+        # Keep the counter of entries read updated, so Redis
+        # can compute the lag of the group after moving it.
+        if entries_read is None and group["lag"] is not None:
+            entries_added = self.connection.xinfo_stream(self.stream_name)["entries-added"]
+            entries_read = entries_added - group["lag"]
+
+        while not self._stop_event.is_set():
+            messages = self.connection.xrange(
+                self.stream_name, min=f"({_to_str(last_id)}", count=CATCHUP_READ_COUNT
+            )
+            if not messages:
+                break
+
+            self._catchup_acked = set()
+            self.process_entries(self._parse_messages(messages))
+            self.join()
+
+            # Checkpoint up to the first entry not acknowledged
+            checkpoint = None
+            processed = 0
+            for message_id, _ in messages:
+                if message_id not in self._catchup_acked:
+                    break
+                checkpoint = message_id
+                processed += 1
+
+            if checkpoint:
+                if entries_read is not None:
+                    entries_read += processed
+                self.connection.xgroup_setid(
+                    self.stream_name, self.consumer_group, checkpoint, entries_read=entries_read
+                )
+                last_id = checkpoint
+
+            try:
+                lock.reacquire()
+            except redis.exceptions.LockError:
+                self.logger.warning(
+                    "catch-up lock lost; leaving catch-up mode",
+                    stream=self.stream_name,
+                    consumer_group=self.consumer_group,
+                )
+                break
+
+            if processed < len(messages):
+                self.logger.warning(
+                    "entry not acknowledged; leaving catch-up mode",
+                    stream=self.stream_name,
+                    consumer_group=self.consumer_group,
+                    message_id=messages[processed][0],
+                )
+                break
+
+            lag = self._group_lag()
+            if len(messages) < CATCHUP_READ_COUNT or (
+                lag is not None and lag <= self.catchup_threshold
+            ):
+                break
+
+    def join(self):
+        """Wait until the entries passed to `process_entries` are processed.
+
+        Consumers that process entries asynchronously must override
+        this method.
+        """
+        pass
+
     def process_entries(self, entries: Iterable[Entry], recovery: bool = False):
         """Process entries (implement this method in subclasses).
 
@@ -217,7 +377,37 @@ class Consumer:
         raise NotImplementedError
 
     def ack_entries(self, message_ids: list):
-        """Acknowledge a list of message IDs."""
+        """Acknowledge a list of message IDs.
+
+        Entries packed in the same envelope share the message ID of
+        the envelope. The envelope is only acknowledged when all its
+        entries are, so the ID must be passed once per entry.
+        """
+        completed = []
+
+        for message_id in message_ids:
+            pending = self._envelopes.get(message_id)
+            if pending is None:
+                completed.append(message_id)
+            elif pending > 1:
+                self._envelopes[message_id] = pending - 1
+            else:
+                del self._envelopes[message_id]
+                completed.append(message_id)
+
+        if completed:
+            self._ack_messages(completed)
+
+    def _ack_messages(self, message_ids: list):
+        """Acknowledge messages in the stream."""
+
+        for message_id in message_ids:
+            self._envelopes.pop(message_id, None)
+
+        # Entries read in catch-up mode are not pending on the group
+        if self._catchup_acked is not None:
+            self._catchup_acked.update(message_ids)
+            return
 
         pipeline = self.connection.pipeline()
 
@@ -247,3 +437,111 @@ class Consumer:
         except redis.exceptions.ResponseError as e:
             if str(e) != "BUSYGROUP Consumer Group name already exists":
                 raise
+
+    def _group_info(self) -> dict:
+        """Return the information of the consumer group."""
+
+        for group in self.connection.xinfo_groups(self.stream_name):
+            if _to_str(group["name"]) == self.consumer_group:
+                return group
+        raise ValueError(f"Consumer group '{self.consumer_group}' not found")
+
+    def _group_lag(self) -> int | None:
+        """Return the number of entries not yet delivered to the group.
+
+        Redis can't always compute the lag of a group (e.g. after
+        deleting entries of the stream). In that case, it returns `None`.
+        """
+        return self._group_info().get("lag")
+
+    def _parse_messages(self, messages: list) -> list[Entry]:
+        """Convert messages into entries, skipping filtered event types.
+
+        Messages skipped because of their type are acknowledged
+        at once and they are not returned. Envelopes are unpacked
+        into one entry per event, all of them with the ID of
+        the envelope. Messages that can't be decoded are logged
+        and skipped too, so they don't stop the consumer.
+        """
+        entries = []
+        skipped = []
+
+        for message in messages:
+            try:
+                if self._is_filtered(message):
+                    skipped.append(message[0])
+                elif is_envelope(message[1]):
+                    envelope_entries = self._parse_envelope(message)
+                    if envelope_entries:
+                        self._envelopes[message[0]] = len(envelope_entries)
+                        entries.extend(envelope_entries)
+                    else:
+                        skipped.append(message[0])
+                else:
+                    entries.append(self._parse_message(message))
+            except (KeyError, ValueError) as e:
+                self.logger.error(
+                    "entry can't be decoded; skipped",
+                    stream=self.stream_name,
+                    consumer_group=self.consumer_group,
+                    message_id=message[0],
+                    error=str(e),
+                )
+                skipped.append(message[0])
+
+        if skipped:
+            self._ack_messages(skipped)
+
+        return entries
+
+    def _is_filtered(self, message: tuple) -> bool:
+        """Check whether the type of the message is not processed by the consumer."""
+
+        if self.EVENT_TYPES is None:
+            return False
+
+        if is_envelope(message[1]):
+            types = envelope_types(message[1])
+            return bool(types) and types.isdisjoint(self.EVENT_TYPES)
+
+        event_type = message[1].get(b"type")
+        if event_type is None:
+            return False
+
+        return self._is_filtered_type(event_type.decode())
+
+    def _is_filtered_type(self, event_type: str | None) -> bool:
+        """Check whether a type of event is not processed by the consumer.
+
+        Events without type are always processed.
+        """
+        if self.EVENT_TYPES is None or event_type is None:
+            return False
+
+        return event_type not in self.EVENT_TYPES
+
+    def _parse_message(self, message: tuple) -> Entry:
+        """Convert a message read from the stream into an entry."""
+
+        message_id = message[0]
+        message_data = message[1][b"data"]
+
+        return Entry(message_id=message_id, event=json.loads(message_data))
+
+    def _parse_envelope(self, message: tuple) -> list[Entry]:
+        """Convert an envelope into entries, skipping filtered event types."""
+
+        message_id = message[0]
+        events = unpack_envelope(message[1])
+
+        return [
+            Entry(message_id=message_id, event=event)
+            for event in events
+            if not self._is_filtered_type(event.get("type"))
+        ]
+
+
+def _to_str(value: str | bytes) -> str:
+    """Convert the values returned by Redis to strings."""
+
+    return value.decode() if isinstance(value, bytes) else value
@@ -66,6 +66,8 @@ class ConsumerPool:
     :param num_consumers: Number of consumers to run in parallel.
     :param stream_block_timeout: Timeout for blocking read from the stream.
     :param verbose: If True, enable verbose logging.
+    :param catchup_threshold: Lag of the consumer group that activates
+        the catch-up mode of the consumers; `None` disables it.
     """
 
     CONSUMER_CLASS: type[Consumer]
@@ -80,6 +82,7 @@ class ConsumerPool:
         num_consumers: int = 10,
         stream_block_timeout: int = 60000,
         verbose: bool = False,
+        catchup_threshold: int | None = None,
     ):
         self.stream_name = stream_name
         self.group_name = group_name
@@ -89,6 +92,7 @@ class ConsumerPool:
         self.status = self.Status.IDLE
         self.stream_block_timeout = stream_block_timeout
         self.verbose = verbose
+        self.catchup_threshold = catchup_threshold
         self._consumers = {}
         self.connection = connection
         self._stop_event = Event()
@@ -164,6 +168,7 @@ class ConsumerPool:
             "stream_block_timeout": self.stream_block_timeout,
             "logging_level": self.log_level,
             "stop_event": self._stop_event,
+            "catchup_threshold": self.catchup_threshold,
         }
         kwargs.update(self.extra_consumer_kwargs)
 
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Envelopes: stream entries that pack multiple events.
+
+An envelope is a stream entry with the following fields:
+
+- `format`: always `envelope`
+- `count`: number of events in the envelope
+- `types`: space-separated list of the types of the events
+- `compression`: algorithm used to compress `data`
+  (`none`, `zlib` or `zstd`)
+- `data`: JSON array with the events, compressed when needed
+
+Entries with a single event in the `data` field (plain entries)
+and envelopes can be stored in the same stream.
+"""
+
+from __future__ import annotations
+
+import json
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ENVELOPE_FORMAT = "envelope"
+ENVELOPE_MAX_BYTES = 1024 * 1024  # 1 MB
+
+COMPRESSION_NONE = "none"
+COMPRESSION_ZLIB = "zlib"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION_ALGORITHMS = (COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_ZSTD)
+
+
+class EnvelopeBuilder:
+    """Pack events into envelopes.
+
+    Events are added one by one until the envelope has `max_events`
+    events or the size of the events reaches `max_bytes`. Then,
+    the envelope is full and it must be built with `build`.
+
+    The `zstd` compression requires the `zstandard` package,
+    available with the `zstd` extra of the package.
+
+    :param max_events: maximum number of events in an envelope
+    :param max_bytes: maximum size in bytes of the uncompressed events
+    :param compression: algorithm to compress the events
+    """
+
+    def __init__(
+        self,
+        max_events: int,
+        max_bytes: int = ENVELOPE_MAX_BYTES,
+        compression: str | None = None,
+    ):
+        compression = compression or COMPRESSION_NONE
+        if compression not in COMPRESSION_ALGORITHMS:
+            raise ValueError(f"Unknown compression algorithm '{compression}'")
+        if compression == COMPRESSION_ZSTD and zstandard is None:
+            raise ValueError("'zstandard' package is required to compress zstd envelopes")
+
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.event_ids = []
+        self._events = []
+        self._types = set()
+        self._size = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._events) >= self.max_events or self._size >= self.max_bytes
+
+    def add(self, event_id: str, event_type: str | None, data: str | bytes):
+        """Add an event already serialized to JSON."""
+
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+
+        self.event_ids.append(event_id)
+        self._events.append(data)
+        if event_type:
+            self._types.add(event_type)
+        self._size += len(data)
+
+    def build(self) -> dict[str, str | bytes]:
+        """Return the message of the envelope and start a new one."""
+
+        data = ("[" + ",".join(self._events) + "]").encode("utf-8")
+
+        message = {
+            "format": ENVELOPE_FORMAT,
+            "count": len(self._events),
+            "types": " ".join(sorted(self._types)),
+            "compression": self.compression,
+            "data": compress(data, self.compression),
+        }
+
+        self.event_ids = []
+        self._events = []
+        self._types = set()
+        self._size = 0
+
+        return message
+
+
+def is_envelope(fields: dict[bytes, bytes]) -> bool:
+    """Check whether the fields of a stream entry belong to an envelope."""
+
+    return fields.get(b"format") == ENVELOPE_FORMAT.encode()
+
+
+def envelope_types(fields: dict[bytes, bytes]) -> set[str]:
+    """Return the types of the events of an envelope without decoding them."""
+
+    return set(fields.get(b"types", b"").decode().split())
+
+
+def unpack_envelope(fields: dict[bytes, bytes]) -> list[dict]:
+    """Return the events of an envelope.
+
+    :raises ValueError: when the envelope can't be decoded
+    """
+
+    compression = fields.get(b"compression", b"none").decode()
+    data = decompress(fields[b"data"], compression)
+
+    return json.loads(data)
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    """Compress data with the given algorithm."""
+
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(data)
+    elif compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    """Decompress data compressed with the given algorithm.
+
+    :raises ValueError: when the data can't be decompressed
+    """
+    if compression == COMPRESSION_ZLIB:
+        try:
+            return zlib.decompress(data)
+        except zlib.error as e:
+            raise ValueError(f"Invalid zlib data: {e}") from e
+    elif compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("'zstandard' package is required to decompress zstd envelopes")
+        try:
+            return zstandard.ZstdDecompressor().decompress(data)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Invalid zstd data: {e}") from e
+    elif compression != COMPRESSION_NONE:
+        raise ValueError(f"Unknown compression algorithm '{compression}'")
+    return data
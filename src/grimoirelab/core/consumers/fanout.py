@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import annotations
+
+import functools
+import queue
+import threading
+import typing
+
+from collections import namedtuple
+
+from .consumer import Consumer, Entry
+from .consumer_pool import ConsumerPool
+
+if typing.TYPE_CHECKING:
+    from typing import Any, Iterable
+
+
+HANDLER_BATCH_SIZE = 100
+HANDLER_QUEUE_SIZE = 10
+HANDLER_QUEUE_TIMEOUT = 1
+
+
+Handler = namedtuple("Handler", ["name", "consumer", "queue", "thread"])
+
+
+class FanOutConsumer(Consumer):
+    """Read events once and dispatch them to multiple handlers.
+
+    Each entry of the stream is read and decoded only once by this
+    consumer. Then, it is dispatched to every registered handler.
+    Handlers are regular `Consumer` subclasses (e.g. archivists or
+    identities consumers) that run on their own thread, so a slow
+    handler does not stop the others while there is room in its
+    buffer of `handler_queue_size` batches.
+
+    Handlers acknowledge entries as usual calling `ack_entries`, but
+    the entry is only acknowledged in the stream when all the handlers
+    it was dispatched to have acknowledged it. When a handler does not
+    acknowledge an entry, it will be recovered later and dispatched
+    again only to the handlers that failed to process it. Failed
+    entries claimed by other consumers or removed from the stream
+    are no longer tracked.
+
+    :param handlers: dictionary with the name of the handler as key,
+        and a tuple with its consumer class and the extra arguments
+        to initialize it as value
+    :param handler_batch_size: number of entries dispatched at once
+        to each handler
+    :param handler_queue_size: maximum number of batches buffered for
+        each handler
+    :param kwargs: additional keyword arguments to pass to the parent class
+    """
+
+    def __init__(
+        self,
+        handlers: dict[str, tuple[type[Consumer], dict[str, Any]]],
+        handler_batch_size: int = HANDLER_BATCH_SIZE,
+        handler_queue_size: int = HANDLER_QUEUE_SIZE,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        self.handler_batch_size = handler_batch_size
+        self.handler_queue_size = handler_queue_size
+        self.handlers = {}
+        self._tracker = _AckTracker()
+
+        for name, (consumer_class, handler_kwargs) in handlers.items():
+            consumer = consumer_class(
+                connection=self.connection,
+                stream_name=self.stream_name,
+                consumer_group=self.consumer_group,
+                consumer_name=f"{self.consumer_name}:{name}",
+                stream_block_timeout=self.stream_block_timeout,
+                logging_level=self.logging_level,
+                stop_event=self._stop_event,
+                **handler_kwargs,
+            )
+            # Handlers don't acknowledge entries on the stream
+            # directly; the tracker decides when it's safe to do it.
+            consumer.ack_entries = functools.partial(self._ack_handler_entries, name)
+
+            self.handlers[name] = Handler(
+                name=name,
+                consumer=consumer,
+                queue=queue.Queue(maxsize=handler_queue_size),
+                thread=None,
+            )
+
+    def start(self, burst: bool = False):
+        """Start the handlers and process events from the stream.
+
+        Once the consumer stops reading the stream, it waits until
+        the handlers process all the dispatched entries.
+        """
+        self._start_handlers()
+
+        try:
+            super().start(burst=burst)
+        finally:
+            self._stop_handlers()
+
+    def process_entries(self, entries: Iterable[Entry], recovery: bool = False):
+        """Dispatch the entries to the handlers in batches."""
+
+        batches = {name: [] for name in self.handlers}
+        # Entries of the same envelope share the message ID, so
+        # they are sent to the same handlers as the first one.
+        recovered = {}
+
+        for entry in entries:
+            if not recovery:
+                targets = self._tracker.register(entry.message_id, list(self.handlers))
+            elif entry.message_id in recovered:
+                targets = self._tracker.register(entry.message_id, recovered[entry.message_id])
+            else:
+                targets = self._tracker.redeliver(entry.message_id, list(self.handlers))
+                recovered[entry.message_id] = targets
+
+            for name in targets:
+                batches[name].append(entry)
+                if len(batches[name]) >= self.handler_batch_size:
+                    self._dispatch(name, batches[name], recovery)
+                    batches[name] = []
+
+        for name, batch in batches.items():
+            if batch:
+                self._dispatch(name, batch, recovery)
+
+    def recover_stream_entries(self, *args, **kwargs) -> Iterable[Entry]:
+        """Forget the entries this consumer no longer owns and recover the idle ones."""
+
+        self._evict_unowned_entries()
+        yield from super().recover_stream_entries(*args, **kwargs)
+
+    def join(self):
+        """Wait until the handlers process all the dispatched batches."""
+
+        for handler in self.handlers.values():
+            handler.queue.join()
+
+    def _dispatch(self, name: str, batch: list[Entry], recovery: bool):
+        """Put a batch of entries in the queue of a handler.
+
+        When the queue of the handler is full, it waits until there
+        is room for the new batch. If the consumer is stopped meanwhile,
+        the batch is discarded; entries will be recovered later
+        because they weren't acknowledged.
+        """
+        handler_queue = self.handlers[name].queue
+
+        while True:
+            try:
+                handler_queue.put((batch, recovery), timeout=HANDLER_QUEUE_TIMEOUT)
+                break
+            except queue.Full:
+                if self._stop_event.is_set():
+                    self._tracker.release(name, [entry.message_id for entry in batch])
+                    break
+                self.logger.debug("handler queue full; waiting", handler=name)
+
+    def _evict_unowned_entries(self):
+        """Stop tracking the failed entries this consumer no longer owns.
+
+        Failed entries can be claimed by other consumers, acknowledged
+        by them, or removed from the stream. In any of these cases,
+        they won't be recovered by this consumer, so they are removed
+        from the tracker. The owner of each entry is checked in the
+        pending entries list of the group.
+        """
+        message_ids = self._tracker.failed()
+        if not message_ids:
+            return
+
+        pipe = self.connection.pipeline(transaction=False)
+        for message_id in message_ids:
+            pipe.xpending_range(
+                self.stream_name, self.consumer_group, min=message_id, max=message_id, count=1
+            )
+        responses = pipe.execute()
+
+        unowned = []
+        for message_id, response in zip(message_ids, responses):
+            owner = response[0]["consumer"] if response else None
+            if isinstance(owner, bytes):
+                owner = owner.decode()
+            if owner != self.consumer_name:
+                unowned.append(message_id)
+
+        if unowned:
+            self._tracker.evict(unowned)
+            self.logger.debug("untracked entries not owned by the consumer", total=len(unowned))
+
+    def _ack_handler_entries(self, name: str, message_ids: list):
+        """Acknowledge the entries processed by a handler."""
+
+        completed = self._tracker.ack(name, message_ids)
+
+        # The tracker already counts the entries of each envelope
+        if completed:
+            self._ack_messages(completed)
+
+    def _run_handler(self, handler: Handler):
+        """Process the batches dispatched to a handler."""
+
+        while True:
+            item = handler.queue.get()
+
+            if item is None:
+                handler.queue.task_done()
+                break
+
+            batch, recovery = item
+            try:
+                handler.consumer.process_entries(batch, recovery=recovery)
+            except Exception as exc:
+                self.logger.error(f"Handler '{handler.name}' failed processing entries: {exc}")
+            finally:
+                # Entries not acknowledged by the handler will be
+                # dispatched again to it when they are recovered.
+                self._tracker.release(handler.name, [entry.message_id for entry in batch])
+                handler.queue.task_done()
+
+    def _start_handlers(self):
+        """Start one thread per handler."""
+
+        for name, handler in self.handlers.items():
+            thread = threading.Thread(
+                target=self._run_handler,
+                args=(handler,),
+                name=f"{self.consumer_name}:{name}",
+                daemon=True,
+            )
+            self.handlers[name] = handler._replace(thread=thread)
+            thread.start()
+
+    def _stop_handlers(self):
+        """Wait for the handlers to finish the pending batches and stop them."""
+
+        for handler in self.handlers.values():
+            handler.queue.put(None)
+
+        for handler in self.handlers.values():
+            if handler.thread:
+                handler.thread.join()
+
+
+class _AckTracker:
+    """Keep track of the entries each handler still has to acknowledge.
+
+    For each message, it stores how many entries are still pending for
+    each handler, and which handlers released the message without
+    acknowledging it. This class is thread-safe.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    def register(self, message_id: str, handlers: list[str]) -> list[str]:
+        """Register a new entry to be processed by the handlers."""
+
+        with self._lock:
+            pending = self._pending.setdefault(message_id, {})
+            for name in handlers:
+                pending[name] = pending.get(name, 0) + 1
+            self._failed.pop(message_id, None)
+
+        return handlers
+
+    def redeliver(self, message_id: str, handlers: list[str]) -> list[str]:
+        """Return the handlers a recovered entry must be dispatched to.
+
+        Unknown entries (e.g. the consumer was restarted) are sent to
+        every handler. Known entries are only sent to those handlers
+        that failed to acknowledge them. Entries that are still being
+        processed are not dispatched again.
+        """
+        with self._lock:
+            if message_id not in self._pending:
+                targets = handlers
+            else:
+                targets = list(self._failed.pop(message_id, []))
+
+            pending = self._pending.setdefault(message_id, {})
+            for name in targets:
+                pending[name] = pending.get(name, 0) + 1
+
+        return targets
+
+    def ack(self, handler: str, message_ids: list) -> list:
+        """Acknowledge entries for a handler.
+
+        Returns the list of messages acknowledged by all the handlers.
+        """
+        completed = []
+
+        with self._lock:
+            for message_id in message_ids:
+                pending = self._pending.get(message_id)
+                if pending is None or handler not in pending:
+                    continue
+
+                pending[handler] -= 1
+                if pending[handler] <= 0:
+                    del pending[handler]
+
+                if not pending and not self._failed.get(message_id):
+                    del self._pending[message_id]
+                    self._failed.pop(message_id, None)
+                    completed.append(message_id)
+
+        return completed
+
+    def failed(self) -> list:
+        """Return the failed messages that aren't being processed by any handler."""
+
+        with self._lock:
+            return [message_id for message_id in self._failed if not self._pending.get(message_id)]
+
+    def evict(self, message_ids: list):
+        """Stop tracking messages unless a handler is still processing them."""
+
+        with self._lock:
+            for message_id in message_ids:
+                if self._pending.get(message_id):
+                    continue
+                self._pending.pop(message_id, None)
+                self._failed.pop(message_id, None)
+
+    def release(self, handler: str, message_ids: list):
+        """Mark entries the handler finished with but didn't acknowledge as failed."""
+
+        with self._lock:
+            for message_id in message_ids:
+                pending = self._pending.get(message_id)
+                if pending is None or handler not in pending:
+                    continue
+
+                del pending[handler]
+                self._failed.setdefault(message_id, set()).add(handler)
+
+
+class FanOutConsumerPool(ConsumerPool):
+    """Pool of consumers that dispatch events to multiple handlers.
+
+    The handlers are defined by other consumer pools. Their consumer
+    class and extra arguments are used to create the handlers of each
+    `FanOutConsumer`, and their setup is run before starting the pool.
+
+    :param handler_pools: dictionary with the name of the handler as key
+        and the pool that defines the handler as value
+    :param handler_batch_size: number of entries dispatched at once
+        to each handler
+    :param handler_queue_size: maximum number of batches buffered for
+        each handler
+    :param kwargs: additional keyword arguments to pass to the parent class
+    """
+
+    CONSUMER_CLASS = FanOutConsumer
+
+    def __init__(
+        self,
+        handler_pools: dict[str, ConsumerPool],
+        handler_batch_size: int = HANDLER_BATCH_SIZE,
+        handler_queue_size: int = HANDLER_QUEUE_SIZE,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        self.handler_pools = handler_pools
+        self.handler_batch_size = handler_batch_size
+        self.handler_queue_size = handler_queue_size
+
+    @property
+    def extra_consumer_kwargs(self):
+        handlers = {
+            name: (pool.CONSUMER_CLASS, pool.extra_consumer_kwargs)
+            for name, pool in self.handler_pools.items()
+        }
+        return {
+            "handlers": handlers,
+            "handler_batch_size": self.handler_batch_size,
+            "handler_queue_size": self.handler_queue_size,
+        }
+
+    def _setup_consumer_pool(self, burst: bool = False):
+        """Run the setup of every handler pool."""
+
+        for pool in self.handler_pools.values():
+            pool._setup_consumer_pool(burst=burst)
@@ -18,109 +18,642 @@
 
 from __future__ import annotations
 
-from functools import lru_cache
+import json
+import time
+
+from collections import OrderedDict
 from typing import Iterable
+from uuid import uuid4
+
+import redis
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from grimoirelab_toolkit.datetime import InvalidDateError, datetime_utcnow, str_to_datetime
 
 from sortinghat.core.api import add_identity
+from sortinghat.core.aux import validate_field
 from sortinghat.core.context import SortingHatContext
 from sortinghat.core.errors import AlreadyExistsError, InvalidValueError
+from sortinghat.core.log import TransactionsLog
+from sortinghat.core.models import Enrollment, Identity, Individual, Operation, Profile
+from sortinghat.utils import generate_uuid
 
+from .bloom import BloomFilter
 from .consumer import Consumer, Entry
 from .consumer_pool import ConsumerPool
 
-from chronicler.events.core.git import (
-    GIT_EVENT_COMMIT_AUTHORED_BY,
-    GIT_EVENT_COMMIT_COMMITTED_BY,
-    GIT_EVENT_COMMIT_ACKED_BY,
-    GIT_EVENT_COMMIT_CO_AUTHORED_BY,
-    GIT_EVENT_COMMIT_HELPED_BY,
-    GIT_EVENT_COMMIT_MENTORED_BY,
-    GIT_EVENT_COMMIT_REPORTED_BY,
-    GIT_EVENT_COMMIT_REVIEWED_BY,
-    GIT_EVENT_COMMIT_SIGNED_OFF_BY,
-    GIT_EVENT_COMMIT_SUGGESTED_BY,
-    GIT_EVENT_COMMIT_TESTED_BY,
-)
-
-
-IDENTITY_EVENTS = (
-    GIT_EVENT_COMMIT_AUTHORED_BY,
-    GIT_EVENT_COMMIT_COMMITTED_BY,
-    GIT_EVENT_COMMIT_ACKED_BY,
-    GIT_EVENT_COMMIT_CO_AUTHORED_BY,
-    GIT_EVENT_COMMIT_HELPED_BY,
-    GIT_EVENT_COMMIT_MENTORED_BY,
-    GIT_EVENT_COMMIT_REPORTED_BY,
-    GIT_EVENT_COMMIT_REVIEWED_BY,
-    GIT_EVENT_COMMIT_SIGNED_OFF_BY,
-    GIT_EVENT_COMMIT_SUGGESTED_BY,
-    GIT_EVENT_COMMIT_TESTED_BY,
-)
+from ..scheduler.tasks.chronicler import IDENTITY_EVENTS, IDENTITY_FIELDS
+
+
+IDENTITY_CACHE_PREFIX = "grimoirelab:identities:seen:"
+IDENTITY_CACHE_TTL = 86400  # 1 day (in s)
+IDENTITY_CACHE_SIZE = 100000
+IDENTITIES_BATCH_SIZE = 100
+BLOOM_FILTER_CHUNK_SIZE = 10000
+
+
+class IdentityCache:
+    """Cache of identities already stored in SortingHat.
+
+    The cache has two levels. The first one is a local LRU cache
+    of `size` identities. The second one is shared by every consumer
+    using Redis, so identities stored by one consumer are not stored
+    again by the rest of them, even after restarting.
+
+    Identities are stored in Redis sets that expire. Each set stores
+    the identities seen during a period of `ttl` seconds, and lookups
+    check the sets of the current and the previous periods, so an
+    identity is remembered between `ttl` and twice `ttl` seconds since
+    the last time it was seen.
+
+    Identities are identified by the uuid SortingHat generates for
+    them, so different representations of the same identity
+    (e.g. letter case) share the same entry.
+
+    :param connection: Redis connection object
+    :param ttl: seconds each Redis set stores identities
+    :param size: maximum number of identities in the local cache
+    :param prefix: prefix of the Redis keys
+    """
+
+    def __init__(
+        self,
+        connection: redis.Redis,
+        ttl: int = IDENTITY_CACHE_TTL,
+        size: int = IDENTITY_CACHE_SIZE,
+        prefix: str = IDENTITY_CACHE_PREFIX,
+    ):
+        self.connection = connection
+        self.ttl = ttl
+        self.size = size
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._local = OrderedDict()
+
+    def lookup(self, uuids: Iterable[str]) -> set[str]:
+        """Return the identities from the list that were already seen."""
+
+        seen = set()
+        remote = []
+        total = 0
+
+        for uuid in uuids:
+            total += 1
+            if uuid in self._local:
+                self._local.move_to_end(uuid)
+                seen.add(uuid)
+            else:
+                remote.append(uuid)
+
+        if remote:
+            current, previous = self._bucket_keys()
+
+            pipeline = self.connection.pipeline(transaction=False)
+            pipeline.smismember(current, remote)
+            pipeline.smismember(previous, remote)
+            in_current, in_previous = pipeline.execute()
+
+            promoted = []
+            for uuid, cur, prev in zip(remote, in_current, in_previous):
+                if cur or prev:
+                    seen.add(uuid)
+                    self._add_local(uuid)
+                if prev and not cur:
+                    promoted.append(uuid)
+
+            # Keep identities seen again in the current period
+            if promoted:
+                self._add_remote(promoted)
+
+        self.hits += len(seen)
+        self.misses += total - len(seen)
+
+        return seen
+
+    def add(self, uuids: Iterable[str]):
+        """Add the identities to the cache."""
+
+        uuids = list(uuids)
+        if not uuids:
+            return
+
+        for uuid in uuids:
+            self._add_local(uuid)
+        self._add_remote(uuids)
+
+    def _add_local(self, uuid: str):
+        self._local[uuid] = True
+        self._local.move_to_end(uuid)
+        if len(self._local) > self.size:
+            self._local.popitem(last=False)
+
+    def _add_remote(self, uuids: list[str]):
+        key, _ = self._bucket_keys()
+
+        pipeline = self.connection.pipeline(transaction=False)
+        pipeline.sadd(key, *uuids)
+        pipeline.expire(key, self.ttl * 2)
+        pipeline.execute()
+
+    def _bucket_keys(self) -> tuple[str, str]:
+        """Return the keys of the sets for the current and previous periods."""
+
+        bucket = int(time.time() // self.ttl)
+        return f"{self.prefix}{bucket}", f"{self.prefix}{bucket - 1}"
+
+
+IDENTITY_RESOLVER_TTL = 3600  # 1 hour (in s)
+IDENTITY_RESOLVER_SIZE = 100000
+
+
+class IdentityResolver:
+    """Find the individuals and organizations of identity events.
+
+    Identities are resolved to the uuid of their SortingHat individual
+    and to the organizations the individual was enrolled to. Results
+    are kept in a local LRU cache for `ttl` seconds, including the
+    identities not found in SortingHat, so they are looked up again
+    later. Identities not in the cache are resolved in bulk with one
+    query for the individuals and another one for the enrollments.
+
+    :param ttl: seconds the resolved identities are kept in the cache
+    :param size: maximum number of identities in the cache
+    """
+
+    def __init__(self, ttl: int = IDENTITY_RESOLVER_TTL, size: int = IDENTITY_RESOLVER_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def enrich(self, events: Iterable[dict]):
+        """Add the individual and organization to identity events.
+
+        The uuid of the individual is added to the field `individual_uuid`
+        of the data of the event, and the name of the organization
+        the individual was enrolled to when the event happened is added
+        to `organization`. Other events are not modified.
+        """
+        identities = {}
+
+        for event in events:
+            if event.get("type") not in IDENTITY_EVENTS:
+                continue
+
+            data = event.get("data") or {}
+            uuid = data.get("uuid")
+            if not uuid:
+                try:
+                    uuid = generate_uuid(**{field: data.get(field) for field in IDENTITY_FIELDS})
+                except ValueError:
+                    continue
+
+            identities.setdefault(uuid, []).append(event)
+
+        if not identities:
+            return
+
+        resolved = self.resolve(identities.keys())
+
+        for uuid, identity_events in identities.items():
+            individual = resolved.get(uuid)
+            if not individual:
+                continue
+
+            mk, enrollments = individual
+            for event in identity_events:
+                event["data"]["individual_uuid"] = mk
+                event["data"]["organization"] = _find_organization(enrollments, event.get("time"))
+
+    def resolve(self, uuids: Iterable[str]) -> dict[str, tuple | None]:
+        """Return the individual and enrollments of each identity.
+
+        :returns: dictionary with the identity uuid as key and a tuple
+            with the individual uuid and its list of enrollments as
+            `(organization, start, end)`, or `None` when the identity
+            is not in SortingHat
+        """
+        now = time.monotonic()
+        resolved = {}
+        misses = []
+
+        for uuid in uuids:
+            cached = self._cache.get(uuid)
+            if cached and cached[0] > now:
+                self._cache.move_to_end(uuid)
+                resolved[uuid] = cached[1]
+            else:
+                misses.append(uuid)
+
+        self.hits += len(resolved)
+        self.misses += len(misses)
+
+        if not misses:
+            return resolved
+
+        individuals = dict(
+            Identity.objects.filter(uuid__in=misses).values_list("uuid", "individual__mk")
+        )
+        enrollments = {}
+        rows = Enrollment.objects.filter(individual__mk__in=set(individuals.values())).values_list(
+            "individual__mk", "group__name", "start", "end"
+        )
+        for mk, organization, start, end in rows:
+            enrollments.setdefault(mk, []).append((organization, start, end))
+
+        expires = now + self.ttl
+        for uuid in misses:
+            mk = individuals.get(uuid)
+            value = (mk, enrollments.get(mk, [])) if mk else None
+            resolved[uuid] = value
+            self._cache[uuid] = (expires, value)
+            self._cache.move_to_end(uuid)
+
+        while len(self._cache) > self.size:
+            self._cache.popitem(last=False)
+
+        return resolved
+
+
+def _find_organization(enrollments: list[tuple], event_time: str | None) -> str | None:
+    """Return the organization of the enrollment active at the time of the event.
+
+    When the time is unknown or there are several active enrollments,
+    the one that started last is selected.
+    """
+    if not enrollments:
+        return None
+
+    if event_time:
+        try:
+            dt = str_to_datetime(event_time)
+        except InvalidDateError:
+            dt = None
+    else:
+        dt = None
+
+    active = [e for e in enrollments if dt is None or e[1] <= dt <= e[2]]
+    if not active:
+        return None
+
+    return max(active, key=lambda e: e[1])[0]
 
 
 class SortingHatConsumer(Consumer):
-    """Store identity events in SortingHat."""
+    """Store identity events in SortingHat.
 
-    def __init__(self, *args, **kwargs):
+    Identities already stored are kept in an `IdentityCache` shared
+    by all the consumers, so they are not sent to SortingHat again.
+
+    Optionally, the consumer can use a Bloom filter file with the
+    identities that existed in SortingHat when the pool started
+    (see `SortingHatConsumerPool`). Identities not found in the
+    filter are new, so they are stored without checking the database
+    first.
+
+    :param identity_cache_ttl: seconds identities are kept in the
+        shared cache
+    :param identity_cache_size: maximum number of identities
+        in the local cache of the consumer
+    :param identities_bloom_filter: path to the Bloom filter file
+        of the existing identities
+    :param kwargs: additional keyword arguments to pass to the parent class
+    """
+
+    EVENT_TYPES = IDENTITY_EVENTS
+
+    def __init__(
+        self,
+        *args,
+        identity_cache_ttl: int = IDENTITY_CACHE_TTL,
+        identity_cache_size: int = IDENTITY_CACHE_SIZE,
+        identities_bloom_filter: str | None = None,
+        **kwargs,
+    ):
         """Initialize the consumer."""
 
         super().__init__(*args, **kwargs)
 
         system_user = get_user_model().objects.get(username=settings.SYSTEM_BOT_USER)
         self.sh_ctx = SortingHatContext(user=system_user, job_id=None, tenant="default")
+        self.identity_cache = IdentityCache(
+            self.connection, ttl=identity_cache_ttl, size=identity_cache_size
+        )
+        self.bloom_filter = None
+
+        if identities_bloom_filter:
+            try:
+                self.bloom_filter = BloomFilter.open(identities_bloom_filter)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Unable to open identities Bloom filter: {e}")
 
     def process_entries(self, entries: Iterable[Entry], recovery: bool = False):
-        """Extract identities from events and store them in SortingHat."""
+        """Extract identities from events and store them in SortingHat.
 
+        Identities are stored in batches of `IDENTITIES_BATCH_SIZE`
+        unique identities (see `store_identities`). Entries are
+        acknowledged once their identity is stored.
+        """
         to_ack = []
-        i = 0
+        batch = {}
 
         for entry in entries:
-            i += 1
-            if len(to_ack) > 100:
-                self.ack_entries(to_ack)
-                to_ack = []
-
             if entry.event["type"] not in IDENTITY_EVENTS:
                 to_ack.append(entry.message_id)
                 continue
 
             identity = entry.event.get("data", {})
-            source = identity.get("source")
-            username = identity.get("username")
-            email = identity.get("email")
-            name = identity.get("name")
+            identity = {field: identity.get(field) for field in IDENTITY_FIELDS}
 
             try:
-                self.store_identity(source=source, username=username, email=email, name=name)
+                uuid = generate_uuid(**identity)
+            except ValueError:
+                self._log_invalid_identity(**identity)
                 to_ack.append(entry.message_id)
-            except Exception as e:
-                self.logger.error(f"Error processing event {entry.event['id']}: {e}")
+                continue
+
+            if uuid not in batch:
+                batch[uuid] = (identity, [])
+            batch[uuid][1].append(entry.message_id)
+
+            if len(batch) >= IDENTITIES_BATCH_SIZE:
+                to_ack.extend(self._store_batch(batch))
+                batch = {}
+
+            if len(to_ack) > IDENTITIES_BATCH_SIZE:
+                self.ack_entries(to_ack)
+                to_ack = []
+
+        if batch:
+            to_ack.extend(self._store_batch(batch))
 
         if len(to_ack) > 0:
             self.ack_entries(to_ack)
 
-    @lru_cache(maxsize=1024)
+        self.logger.debug(
+            "identity cache stats",
+            hits=self.identity_cache.hits,
+            misses=self.identity_cache.misses,
+        )
+
+    def store_identities(self, identities: dict[str, dict]) -> set[str]:
+        """Import a batch of identities in SortingHat.
+
+        Identities found in the cache or in the database are not
+        imported again. The database is checked running a single
+        query, and the new identities are imported with a few bulk
+        queries within the same transaction (see `_add_identities`).
+        When there is a Bloom filter, only identities that might be
+        in it are checked in the database. When the transaction
+        fails, identities are imported one by one, so a wrong
+        identity doesn't prevent storing the rest of them.
+
+        :param identities: dictionary with the uuid of the identity
+            as key and its fields as value
+
+        :returns: uuids of the identities that are stored in SortingHat
+        """
+        seen = self.identity_cache.lookup(identities.keys())
+        pending = [uuid for uuid in identities if uuid not in seen]
+
+        if not pending:
+            return seen
+
+        if self.bloom_filter is not None:
+            candidates = [uuid for uuid in pending if uuid in self.bloom_filter]
+        else:
+            candidates = pending
+
+        if candidates:
+            existing = Identity.objects.filter(uuid__in=candidates).values_list("uuid", flat=True)
+            existing = set(existing)
+        else:
+            existing = set()
+        new = [uuid for uuid in pending if uuid not in existing]
+
+        try:
+            with transaction.atomic():
+                self._add_identities({uuid: identities[uuid] for uuid in new})
+            stored = set(new)
+        except Exception as e:
+            self.logger.warning(f"Error storing batch of identities; storing them one by one: {e}")
+            stored = set()
+            for uuid in new:
+                try:
+                    self.store_identity(**identities[uuid])
+                    stored.add(uuid)
+                except Exception as exc:
+                    self.logger.error(f"Error storing identity {uuid}: {exc}")
+
+        self.identity_cache.add(existing | stored)
+
+        return seen | existing | stored
+
+    def _store_batch(self, batch: dict[str, tuple[dict, list]]) -> list:
+        """Store a batch of identities and return the ids of the messages to acknowledge."""
+
+        stored = self.store_identities({uuid: identity for uuid, (identity, _) in batch.items()})
+
+        message_ids = []
+        for uuid, (identity, ids) in batch.items():
+            if uuid in stored:
+                message_ids.extend(ids)
+
+        return message_ids
+
     def store_identity(
         self, source: str = None, username: str = None, email: str = None, name: str = None
     ):
-        """Import identity from an event."""
+        """Import identity from an event.
+
+        Identities found in the cache are not imported again.
+        """
+        try:
+            uuid = generate_uuid(source, email=email, name=name, username=username)
+        except ValueError:
+            self._log_invalid_identity(source, username, email, name)
+            return
+
+        if self.identity_cache.lookup([uuid]):
+            return
+
+        self._add_identity(source=source, username=username, email=email, name=name)
+        self.identity_cache.add([uuid])
+
+    def _add_identities(self, identities: dict[str, dict]):
+        """Add new identities to SortingHat running bulk queries.
+
+        This is the bulk version of `add_identity` from the SortingHat
+        API: each identity is added with its own individual and
+        profile, and the operations are logged in a single SortingHat
+        transaction. Invalid identities are skipped. Identities must
+        not exist in the database, otherwise the database raises
+        an `IntegrityError`.
+
+        :param identities: dictionary with the uuid of the identity
+            as key and its fields as value
+        """
+        if not identities:
+            return
+
+        trxl = TransactionsLog.open("add_identities", self.sh_ctx)
+        now = datetime_utcnow()
+
+        individuals = []
+        profiles = []
+        new_identities = []
+        operations = []
+
+        def log_operation(op_type, entity_type, args, target):
+            operation = Operation(
+                ouid=uuid4().hex,
+                trx=trxl.trx,
+                op_type=op_type,
+                entity_type=entity_type,
+                target=target,
+                timestamp=now,
+                args=json.dumps(args),
+            )
+            operations.append(operation)
+
+        for uuid, identity in identities.items():
+            source = identity.get("source")
+            username = identity.get("username")
+            email = identity.get("email")
+            name = identity.get("name")
+
+            try:
+                validate_field("source", source)
+                validate_field("name", name, allow_none=True)
+                validate_field("email", email, allow_none=True)
+                validate_field("username", username, allow_none=True)
+            except ValueError:
+                self._log_invalid_identity(source, username, email, name)
+                continue
+
+            # In case there is no name, `username` is the profile name
+            profile_name = name or username or None
+
+            individual = Individual(mk=uuid)
+            individuals.append(individual)
+            profiles.append(Profile(individual=individual, name=profile_name, email=email or None))
+            new_identities.append(
+                Identity(
+                    uuid=uuid,
+                    name=name,
+                    email=email,
+                    username=username,
+                    source=source,
+                    individual=individual,
+                )
+            )
+
+            log_operation(Operation.OpType.ADD, "individual", {"mk": uuid}, uuid)
+            log_operation(
+                Operation.OpType.UPDATE,
+                "profile",
+                {"name": profile_name, "email": email, "individual": uuid},
+                uuid,
+            )
+            log_operation(
+                Operation.OpType.ADD,
+                "identity",
+                {
+                    "individual": uuid,
+                    "uuid": uuid,
+                    "source": source,
+                    "name": name,
+                    "email": email,
+                    "username": username,
+                },
+                uuid,
+            )
+
+        Individual.objects.bulk_create(individuals)
+        Profile.objects.bulk_create(profiles)
+        Identity.objects.bulk_create(new_identities)
+        Operation.objects.bulk_create(operations)
+
+        trxl.close()
+
+    def _add_identity(
+        self, source: str = None, username: str = None, email: str = None, name: str = None
+    ):
+        """Add an identity to SortingHat ignoring invalid and existing identities."""
 
         try:
             add_identity(self.sh_ctx, source=source, name=name, email=email, username=username)
         except InvalidValueError:
-            self.logger.warning(
-                f"Skipping identity with invalid data: source={source}, "
-                f"username={username}, email={email}, name={name}"
-            )
+            self._log_invalid_identity(source, username, email, name)
         except AlreadyExistsError:
             pass
 
+    def _log_invalid_identity(self, source, username, email, name):
+        self.logger.warning(
+            f"Skipping identity with invalid data: source={source}, "
+            f"username={username}, email={email}, name={name}"
+        )
+
 
 class SortingHatConsumerPool(ConsumerPool):
-    """Pool of SortingHat identities consumers."""
+    """Pool of SortingHat identities consumers.
+
+    When `identities_bloom_filter` is set, the pool creates a Bloom
+    filter file with the uuids of the identities stored in SortingHat
+    before starting the consumers. Consumers map the file in memory,
+    so it's shared by all of them.
+
+    :param identity_cache_ttl: seconds identities are kept in the
+        shared cache
+    :param identity_cache_size: maximum number of identities
+        in the local cache of each consumer
+    :param identities_bloom_filter: path to the Bloom filter file
+        of the existing identities; `None` disables it
+    :param kwargs: additional keyword arguments to pass to the parent class
+    """
 
     CONSUMER_CLASS = SortingHatConsumer
+
+    def __init__(
+        self,
+        identity_cache_ttl: int = IDENTITY_CACHE_TTL,
+        identity_cache_size: int = IDENTITY_CACHE_SIZE,
+        identities_bloom_filter: str | None = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        self.identity_cache_ttl = identity_cache_ttl
+        self.identity_cache_size = identity_cache_size
+        self.identities_bloom_filter = identities_bloom_filter
+
+    @property
+    def extra_consumer_kwargs(self):
+        return {
+            "identity_cache_ttl": self.identity_cache_ttl,
+            "identity_cache_size": self.identity_cache_size,
+            "identities_bloom_filter": self.identities_bloom_filter,
+        }
+
+    def _setup_consumer_pool(self, burst: bool = False):
+        """Create the Bloom filter with the identities stored in SortingHat."""
+
+        if not self.identities_bloom_filter:
+            return
+
+        self.logger.info(f"Loading identities in Bloom filter '{self.identities_bloom_filter}'")
+
+        total = Identity.objects.count()
+        uuids = Identity.objects.values_list("uuid", flat=True).iterator(
+            chunk_size=BLOOM_FILTER_CHUNK_SIZE
+        )
+        # Leave room for identities added while the filter is built
+        loaded = BloomFilter.build(
+            self.identities_bloom_filter, uuids, capacity=int(total * 1.1) + 1
+        )
+
+        self.logger.info(f"{loaded} identities loaded in Bloom filter")
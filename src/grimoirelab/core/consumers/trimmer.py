@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import annotations
+
+import typing
+
+from collections import namedtuple
+
+import structlog
+
+if typing.TYPE_CHECKING:
+    import redis
+
+
+TRIM_ALERT_THRESHOLD = 0.8
+
+
+logger = structlog.get_logger(__name__)
+
+
+TrimResult = namedtuple("TrimResult", ["stream", "min_id", "trimmed", "unconsumed"])
+
+
+class StreamTrimmer:
+    """Remove the entries of a stream already consumed by every group.
+
+    Producers cap the length of the stream with `max_length`, dropping
+    the oldest entries whether they were consumed or not. This class
+    trims the stream using the position of its consumer groups instead,
+    so entries are removed as soon as all the groups processed them.
+
+    The oldest entry each group still needs is the first one pending
+    of acknowledgement or, when there are none, the one following the
+    last delivered entry. The stream is trimmed up to the oldest of
+    them, so the slowest group never loses data because of this class.
+
+    When the number of entries not consumed by the slowest group reaches
+    `alert_threshold` times `max_length`, producers will soon start to
+    drop unconsumed entries, so an alert is logged.
+
+    Groups that nobody reads anymore (e.g. the group of a pool that
+    was replaced) would keep the stream from being trimmed forever.
+    When `idle_timeout` is set, only the groups with a consumer that
+    read the stream in the last `idle_timeout` seconds are taken into
+    account; the entries abandoned groups didn't process are trimmed.
+
+    :param connection: Redis connection object
+    :param stream_name: name of the stream to trim
+    :param max_length: maximum length of the stream set by producers
+    :param alert_threshold: fraction of `max_length` that triggers an alert
+    :param idle_timeout: seconds after which a group without activity
+        is considered abandoned; `None` takes into account every group
+    :param approximate: trim the stream in an approximate way, which is
+        much more efficient in Redis
+    """
+
+    def __init__(
+        self,
+        connection: redis.Redis,
+        stream_name: str,
+        max_length: int | None = None,
+        alert_threshold: float = TRIM_ALERT_THRESHOLD,
+        idle_timeout: int | None = None,
+        approximate: bool = True,
+    ):
+        self.connection = connection
+        self.stream_name = stream_name
+        self.max_length = max_length
+        self.alert_threshold = alert_threshold
+        self.idle_timeout = idle_timeout
+        self.approximate = approximate
+
+    def trim(self) -> TrimResult | None:
+        """Trim the entries consumed by all the groups of the stream.
+
+        Streams without consumer groups are not trimmed, because
+        there is no way to know whether their entries were consumed.
+        Neither are streams whose groups are all abandoned.
+
+        :returns: the result of the trimming or `None` when the stream
+            wasn't trimmed
+        """
+        if not self.connection.exists(self.stream_name):
+            return None
+
+        groups = self.connection.xinfo_groups(self.stream_name)
+        if not groups:
+            logger.debug("stream without consumer groups; not trimmed", stream=self.stream_name)
+            return None
+
+        groups = active_groups(self.connection, self.stream_name, groups, self.idle_timeout)
+        if not groups:
+            logger.warning(
+                "stream without active consumer groups; not trimmed", stream=self.stream_name
+            )
+            return None
+
+        min_id = None
+        unconsumed = 0
+
+        for group in groups:
+            group_min_id = self._group_min_id(group)
+            if min_id is None or _parse_id(group_min_id) < _parse_id(min_id):
+                min_id = group_min_id
+            unconsumed = max(
+                unconsumed, _group_unconsumed(self.connection, self.stream_name, group)
+            )
+
+        trimmed = self.connection.xtrim(
+            self.stream_name, minid=min_id, approximate=self.approximate
+        )
+
+        logger.debug(
+            "stream trimmed",
+            stream=self.stream_name,
+            min_id=min_id,
+            trimmed=trimmed,
+            unconsumed=unconsumed,
+        )
+
+        self._check_max_length(unconsumed)
+
+        return TrimResult(self.stream_name, min_id, trimmed, unconsumed)
+
+    def _group_min_id(self, group: dict) -> str:
+        """Return the ID of the oldest entry the group still needs."""
+
+        if group["pending"]:
+            pending = self.connection.xpending(self.stream_name, group["name"])
+            return _to_str(pending["min"])
+
+        ms, seq = _parse_id(_to_str(group["last-delivered-id"]))
+        return f"{ms}-{seq + 1}"
+
+    def _check_max_length(self, unconsumed: int):
+        """Alert when producers are about to drop unconsumed entries."""
+
+        if not self.max_length:
+            return
+
+        if unconsumed >= self.max_length:
+            logger.error(
+                "stream reached its maximum length; unconsumed entries are being dropped",
+                stream=self.stream_name,
+                unconsumed=unconsumed,
+                max_length=self.max_length,
+            )
+        elif unconsumed >= self.max_length * self.alert_threshold:
+            logger.warning(
+                "stream close to its maximum length; unconsumed entries might be dropped",
+                stream=self.stream_name,
+                unconsumed=unconsumed,
+                max_length=self.max_length,
+            )
+
+
+def stream_backlog(
+    connection: redis.Redis,
+    stream_name: str,
+    idle_timeout: int | None = None,
+) -> int:
+    """Return the number of entries not processed by the slowest group.
+
+    When the stream doesn't have consumer groups, its length
+    is returned. When `idle_timeout` is set, abandoned groups
+    are ignored (see `active_groups`); if all of them are, the
+    backlog is zero.
+    """
+    if not connection.exists(stream_name):
+        return 0
+
+    groups = connection.xinfo_groups(stream_name)
+    if not groups:
+        return connection.xlen(stream_name)
+
+    groups = active_groups(connection, stream_name, groups, idle_timeout)
+    if not groups:
+        return 0
+
+    return max(_group_unconsumed(connection, stream_name, group) for group in groups)
+
+
+def active_groups(
+    connection: redis.Redis,
+    stream_name: str,
+    groups: list[dict],
+    idle_timeout: int | None = None,
+) -> list[dict]:
+    """Return the consumer groups of the stream that are still read.
+
+    A group is active when any of its consumers tried to read the
+    stream in the last `idle_timeout` seconds. Consumers waiting for
+    new entries keep their group active because they read the stream
+    periodically. Groups without consumers are abandoned.
+
+    :param connection: Redis connection object
+    :param stream_name: name of the stream
+    :param groups: groups of the stream, as returned by `XINFO GROUPS`
+    :param idle_timeout: seconds without activity after which a group
+        is abandoned; when it's `None`, every group is active
+
+    :returns: list with the active groups
+    """
+    if idle_timeout is None:
+        return groups
+
+    max_idle = idle_timeout * 1000
+    active = []
+
+    for group in groups:
+        consumers = []
+        if group["consumers"]:
+            consumers = connection.xinfo_consumers(stream_name, group["name"])
+
+        if any(consumer["idle"] < max_idle for consumer in consumers):
+            active.append(group)
+        else:
+            logger.info(
+                "abandoned consumer group ignored",
+                stream=stream_name,
+                group=_to_str(group["name"]),
+                idle_timeout=idle_timeout,
+            )
+
+    return active
+
+
+def _group_unconsumed(connection: redis.Redis, stream_name: str, group: dict) -> int:
+    """Return the number of entries the group didn't process yet.
+
+    Old versions of Redis don't report the lag of the groups;
+    the length of the stream is used instead.
+    """
+    lag = group.get("lag")
+    if lag is None:
+        return connection.xlen(stream_name)
+
+    return lag + group["pending"]
+
+
+def _parse_id(entry_id: str) -> tuple[int, int]:
+    """Split a stream entry ID into its timestamp and sequence number."""
+
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _to_str(value: str | bytes) -> str:
+    return value.decode() if isinstance(value, bytes) else value
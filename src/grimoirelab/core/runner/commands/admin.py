@@ -247,6 +247,21 @@ def _validate_username(username):
         return "; ".join(e.messages)
 
 
+@admin.command(name="backfill-locators")
+def backfill_task_locators():
+    """Index the tasks and jobs created by previous versions.
+
+    The scheduler uses an index to find tasks and jobs by their
+    uuid. New tasks and jobs are indexed automatically; this
+    command adds those that were created before the index existed.
+    """
+    from grimoirelab.core.scheduler.db import backfill_locators
+
+    total = backfill_locators()
+
+    click.echo(f"{total} tasks and jobs indexed.")
+
+
 @admin.group()
 @click.pass_context
 def queues(ctx: Context):
@@ -44,6 +44,8 @@ if typing.TYPE_CHECKING:
 DEFAULT_BACKOFF_MAX = 60
 DEFAULT_MAX_RETRIES = 10
 
+USHERS_GROUP_NAME = "sortinghat-identities"
+
 
 logger = structlog.get_logger(__name__)
 
@@ -84,7 +86,10 @@ def server(ctx: Context, devel: bool, maintenance_interval: int):
 
     The server also runs maintenance tasks in the background every
     defined interval (default is 60 seconds). These tasks include
-    rescheduling failed tasks and cleaning old jobs.
+    rescheduling failed tasks, cleaning old jobs and removing the
+    events already consumed from the streams. When several replicas
+    of the server share the same Redis server, only the one elected
+    as leader runs them.
     """
     _wait_database_ready()
     _wait_redis_ready()
@@ -121,12 +126,25 @@ def server(ctx: Context, devel: bool, maintenance_interval: int):
 
 
 def periodic_maintain_tasks(interval):
+    from grimoirelab.core.scheduler.leader import LeaderElection
     from grimoirelab.core.scheduler.scheduler import maintain_tasks
 
+    election = LeaderElection(
+        django_rq.get_connection(), ttl=settings.GRIMOIRELAB_MAINTENANCE_LEADER_TTL
+    )
+    election.start()
+
     while True:
         try:
-            maintain_tasks()
-            logger.info("Maintenance tasks executed successfully")
+            if election.is_leader:
+                maintain_tasks()
+                if settings.GRIMOIRELAB_STREAMS_TRIMMING:
+                    _trim_streams()
+                logger.info("Maintenance tasks executed successfully", leader=election.identity)
+            else:
+                logger.debug(
+                    "Maintenance tasks skipped; not the leader", identity=election.identity
+                )
         except redis.exceptions.ConnectionError as exc:
             logger.error("Redis connection error during maintenance tasks", err=exc)
         except django.db.utils.OperationalError as exc:
@@ -134,14 +152,41 @@ def periodic_maintain_tasks(interval):
             connections.close_all()
         except Exception as exc:
             logger.error("Unexpected error during maintenance tasks", err=exc)
+            election.stop()
             raise
         except KeyboardInterrupt:
             logger.info("Maintenance task interrupted. Exiting...")
+            election.stop()
             return
 
         time.sleep(interval)
 
 
+def _trim_streams():
+    """Remove the entries of the streams consumed by all the groups."""
+
+    from grimoirelab.core.consumers.trimmer import StreamTrimmer
+
+    streams = {
+        settings.GRIMOIRELAB_EVENTS_STREAM_NAME: settings.GRIMOIRELAB_EVENTS_STREAM_MAX_LENGTH,
+    }
+    if settings.GRIMOIRELAB_IDENTITIES_STREAM_NAME:
+        streams[settings.GRIMOIRELAB_IDENTITIES_STREAM_NAME] = (
+            settings.GRIMOIRELAB_IDENTITIES_STREAM_MAX_LENGTH
+        )
+
+    connection = django_rq.get_connection()
+
+    for stream_name, max_length in streams.items():
+        trimmer = StreamTrimmer(
+            connection,
+            stream_name,
+            max_length=max_length,
+            idle_timeout=settings.GRIMOIRELAB_STREAMS_GROUP_IDLE_TIMEOUT or None,
+        )
+        trimmer.trim()
+
+
 def _maintenance_process(maintenance_interval):
     """Process to run maintenance tasks periodically."""
 
@@ -197,9 +242,15 @@ def eventizers(workers: int, verbose: bool, burst: bool):
     Workers get jobs from the GRIMOIRELAB_Q_EVENTIZER_JOBS queue defined
     in the configuration file.
     """
+    from grimoirelab.core.scheduler.tasks.chronicler import preload_registries
+
     _wait_redis_ready()
     _wait_database_ready()
 
+    # Workers and their jobs are forked from this process,
+    # so they inherit the registries loaded here.
+    preload_registries()
+
     django.core.management.call_command(
         "rqworker-pool",
         settings.GRIMOIRELAB_Q_EVENTIZER_JOBS,
@@ -360,7 +411,9 @@ def archivists(workers: int, verbose: bool, burst: bool):
     """Start a pool of archivists.
 
     The archivists will fetch events from a redis stream.
-    Data will be stored in the defined data source.
+    Data will be stored in the defined data source. When identities
+    enrichment is enabled, identity events will include the SortingHat
+    individual and organization of the identity.
 
     The number of archivists can be defined with the parameter '--workers'.
     To enable verbose mode, use the '--verbose' flag.
@@ -368,8 +421,6 @@ def archivists(workers: int, verbose: bool, burst: bool):
     If the '--burst' flag is enabled, the pool will process all the events
     and exit.
     """
-    from grimoirelab.core.consumers.archivist import OpenSearchArchivistPool
-
     _wait_opensearch_ready(
         settings.GRIMOIRELAB_ARCHIVIST["STORAGE_URL"],
         settings.GRIMOIRELAB_ARCHIVIST["STORAGE_USERNAME"],
@@ -377,25 +428,14 @@ def archivists(workers: int, verbose: bool, burst: bool):
         settings.GRIMOIRELAB_ARCHIVIST["STORAGE_INDEX"],
         settings.GRIMOIRELAB_ARCHIVIST["STORAGE_VERIFY_CERT"],
     )
+    if settings.GRIMOIRELAB_ARCHIVIST["ENRICH_IDENTITIES"]:
+        _wait_database_ready()
     _wait_redis_ready()
 
-    pool = OpenSearchArchivistPool(
-        # Consumer parameters
-        connection=django_rq.get_connection(),
-        stream_name=settings.GRIMOIRELAB_EVENTS_STREAM_NAME,
+    pool = _create_archivist_pool(
         group_name="opensearch-archivist",
         num_consumers=workers,
-        stream_block_timeout=settings.GRIMOIRELAB_ARCHIVIST["BLOCK_TIMEOUT"],
         verbose=verbose,
-        # OpenSearch parameters
-        url=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_URL"],
-        user=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_USERNAME"],
-        password=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_PASSWORD"],
-        index=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_INDEX"],
-        bulk_size=settings.GRIMOIRELAB_ARCHIVIST["BULK_SIZE"],
-        verify_certs=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_VERIFY_CERT"],
-        rollover_indices=settings.GRIMOIRELAB_ARCHIVIST["ROLLOVER_INDICES"],
-        rollover_size=settings.GRIMOIRELAB_ARCHIVIST["ROLLOVER_SIZE"],
     )
     pool.start(burst=burst)
 
@@ -406,7 +446,9 @@ def ushers(workers: int, verbose: bool, burst: bool):
     """Start a pool of workers that store identities from events.
 
     The workers will fetch events from a redis stream.
-    Identities will be stored in SortingHat.
+    Identities will be stored in SortingHat. When the identities
+    stream is enabled, workers will only read the identity events
+    published there, instead of reading every event.
 
     The number of workers can be defined with the parameter '--workers'.
     To enable verbose mode, use the '--verbose' flag.
@@ -414,18 +456,190 @@ def ushers(workers: int, verbose: bool, burst: bool):
     If the '--burst' flag is enabled, the pool will process all the events
     and exit.
     """
-    from grimoirelab.core.consumers.identities import SortingHatConsumerPool
-
     _wait_database_ready()
     _wait_redis_ready()
 
-    pool = SortingHatConsumerPool(
-        # Consumer parameters
+    if settings.GRIMOIRELAB_IDENTITIES_STREAM_NAME:
+        _check_events_ushers_group()
+
+    pool = _create_ushers_pool(
+        group_name=USHERS_GROUP_NAME,
+        num_consumers=workers,
+        verbose=verbose,
+        stream_name=settings.GRIMOIRELAB_IDENTITIES_STREAM_NAME,
+    )
+    pool.start(burst=burst)
+
+
+FANOUT_HANDLERS = ["archivist", "identities"]
+
+
+@run.command()
+@worker_options(workers=20)
+@click.option(
+    "--handler",
+    "handlers",
+    multiple=True,
+    type=click.Choice(FANOUT_HANDLERS),
+    default=FANOUT_HANDLERS,
+    show_default=True,
+    help="Handler that will process the events. Can be set multiple times.",
+)
+@click.option(
+    "--group-name",
+    default="fanout-consumers",
+    show_default=True,
+    help="Name of the consumer group.",
+)
+def fanout_consumers(workers: int, verbose: bool, burst: bool, handlers: tuple, group_name: str):
+    """Start a pool of workers that dispatch events to multiple handlers.
+
+    The workers will fetch events from a redis stream only once and
+    they will dispatch them to each handler defined with '--handler'.
+    By default, events are stored in OpenSearch ('archivist') and
+    identities are stored in SortingHat ('identities'). Each worker
+    runs every handler, so it's not needed to run 'archivists' and
+    'ushers' pools.
+
+    Take into account the consumer group is different from the one
+    used by 'archivists' and 'ushers', so the first time this pool
+    runs, it will process the stream from the oldest entry that is
+    still available. Entries trimmed before the group was created
+    won't be processed by it.
+
+    The number of workers can be defined with the parameter '--workers'.
+    To enable verbose mode, use the '--verbose' flag.
+
+    If the '--burst' flag is enabled, the pool will process all the events
+    and exit.
+    """
+    from grimoirelab.core.consumers.fanout import FanOutConsumerPool
+
+    handler_pools = {}
+
+    if "archivist" in handlers:
+        _wait_opensearch_ready(
+            settings.GRIMOIRELAB_ARCHIVIST["STORAGE_URL"],
+            settings.GRIMOIRELAB_ARCHIVIST["STORAGE_USERNAME"],
+            settings.GRIMOIRELAB_ARCHIVIST["STORAGE_PASSWORD"],
+            settings.GRIMOIRELAB_ARCHIVIST["STORAGE_INDEX"],
+            settings.GRIMOIRELAB_ARCHIVIST["STORAGE_VERIFY_CERT"],
+        )
+        handler_pools["archivist"] = _create_archivist_pool(
+            group_name=group_name,
+            num_consumers=workers,
+            verbose=verbose,
+        )
+    if "identities" in handlers and settings.GRIMOIRELAB_IDENTITIES_STREAM_NAME:
+        # Identity events of the identities stream wouldn't be read
+        logger.warning(
+            "'identities' handler skipped; run 'ushers' to read the identities stream",
+            stream=settings.GRIMOIRELAB_IDENTITIES_STREAM_NAME,
+        )
+        handlers = tuple(handler for handler in handlers if handler != "identities")
+    if "identities" in handlers:
+        _wait_database_ready()
+        handler_pools["identities"] = _create_ushers_pool(
+            group_name=group_name,
+            num_consumers=workers,
+            verbose=verbose,
+        )
+
+    _wait_redis_ready()
+
+    pool = FanOutConsumerPool(
+        handler_pools=handler_pools,
         connection=django_rq.get_connection(),
         stream_name=settings.GRIMOIRELAB_EVENTS_STREAM_NAME,
-        group_name="sortinghat-identities",
+        group_name=group_name,
         num_consumers=workers,
         stream_block_timeout=settings.GRIMOIRELAB_ARCHIVIST["BLOCK_TIMEOUT"],
         verbose=verbose,
+        catchup_threshold=settings.GRIMOIRELAB_CONSUMERS_CATCHUP_THRESHOLD or None,
     )
     pool.start(burst=burst)
+
+
+def _create_archivist_pool(group_name: str, num_consumers: int, verbose: bool):
+    """Create a pool of OpenSearch archivists using the settings."""
+
+    from grimoirelab.core.consumers.archivist import OpenSearchArchivistPool
+
+    return OpenSearchArchivistPool(
+        # Consumer parameters
+        connection=django_rq.get_connection(),
+        stream_name=settings.GRIMOIRELAB_EVENTS_STREAM_NAME,
+        group_name=group_name,
+        num_consumers=num_consumers,
+        stream_block_timeout=settings.GRIMOIRELAB_ARCHIVIST["BLOCK_TIMEOUT"],
+        verbose=verbose,
+        catchup_threshold=settings.GRIMOIRELAB_CONSUMERS_CATCHUP_THRESHOLD or None,
+        # OpenSearch parameters
+        url=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_URL"],
+        user=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_USERNAME"],
+        password=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_PASSWORD"],
+        index=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_INDEX"],
+        bulk_size=settings.GRIMOIRELAB_ARCHIVIST["BULK_SIZE"],
+        verify_certs=settings.GRIMOIRELAB_ARCHIVIST["STORAGE_VERIFY_CERT"],
+        rollover_indices=settings.GRIMOIRELAB_ARCHIVIST["ROLLOVER_INDICES"],
+        rollover_size=settings.GRIMOIRELAB_ARCHIVIST["ROLLOVER_SIZE"],
+        enrich_identities=settings.GRIMOIRELAB_ARCHIVIST["ENRICH_IDENTITIES"],
+        identities_cache_ttl=settings.GRIMOIRELAB_ARCHIVIST["IDENTITIES_CACHE_TTL"],
+    )
+
+
+def _check_events_ushers_group():
+    """Warn when the group of the ushers still exists on the events stream.
+
+    Ushers read the identities stream when it's enabled, so the group
+    they used on the events stream is not read anymore and it keeps
+    that stream from being trimmed.
+    """
+    connection = django_rq.get_connection()
+    stream_name = settings.GRIMOIRELAB_EVENTS_STREAM_NAME
+
+    try:
+        groups = connection.xinfo_groups(stream_name)
+    except redis.exceptions.ResponseError:
+        # The stream doesn't exist
+        return
+
+    for group in groups:
+        name = group["name"]
+        name = name.decode() if isinstance(name, bytes) else name
+        if name != USHERS_GROUP_NAME:
+            continue
+        logger.warning(
+            "Ushers read the identities stream; destroy their old group on the events stream "
+            "once it has processed its entries",
+            stream=stream_name,
+            group=USHERS_GROUP_NAME,
+            pending=group["pending"],
+            lag=group.get("lag"),
+        )
+
+
+def _create_ushers_pool(
+    group_name: str,
+    num_consumers: int,
+    verbose: bool,
+    stream_name: str | None = None,
+):
+    """Create a pool of SortingHat identities consumers using the settings."""
+
+    from grimoirelab.core.consumers.identities import SortingHatConsumerPool
+
+    return SortingHatConsumerPool(
+        # Consumer parameters
+        connection=django_rq.get_connection(),
+        stream_name=stream_name or settings.GRIMOIRELAB_EVENTS_STREAM_NAME,
+        group_name=group_name,
+        num_consumers=num_consumers,
+        stream_block_timeout=settings.GRIMOIRELAB_ARCHIVIST["BLOCK_TIMEOUT"],
+        verbose=verbose,
+        catchup_threshold=settings.GRIMOIRELAB_CONSUMERS_CATCHUP_THRESHOLD or None,
+        # Identities parameters
+        identity_cache_ttl=settings.GRIMOIRELAB_USHERS["IDENTITY_CACHE_TTL"],
+        identity_cache_size=settings.GRIMOIRELAB_USHERS["IDENTITY_CACHE_SIZE"],
+        identities_bloom_filter=settings.GRIMOIRELAB_USHERS["IDENTITIES_BLOOM_FILTER"],
+    )
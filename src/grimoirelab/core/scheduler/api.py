@@ -16,6 +16,8 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
+import django_rq
+
 from django.db.models import (
     F,
     OuterRef,
@@ -32,6 +34,8 @@ from rest_framework import (
 from rest_framework.exceptions import ValidationError
 
 from .errors import NotFoundError
+from .leader import current_leader
+from .lease import discarded_jobs
 from .models import SchedulerStatus, get_registered_task_model
 from .scheduler import schedule_task, reschedule_task, cancel_task
 from .serializers import (
@@ -243,3 +247,22 @@ class JobLogs(generics.RetrieveAPIView):
             raise ValidationError(f"Unknown task type: '{task_type}'")
 
         return job_model.objects.filter(task__uuid=task_id)
+
+
+class MaintenanceStatus(views.APIView):
+    """API view to show the status of the maintenance of the scheduler.
+
+    It returns the replica of the server that runs the maintenance
+    and the number of jobs discarded because another job of their
+    task was running.
+    """
+
+    def get(self, request, *args, **kwargs):
+        connection = django_rq.get_connection()
+        leader, expires_in = current_leader(connection)
+        data = {
+            "leader": leader,
+            "expires_in": expires_in,
+            "discarded_jobs": discarded_jobs(connection),
+        }
+        return response.Response(data, status=200)
@@ -18,17 +18,32 @@
 
 from __future__ import annotations
 
+import itertools
 import typing
 
-from .models import SchedulerStatus, get_all_registered_task_models
+import structlog
+
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.sql import UpdateQuery
+
+from .models import (
+    SchedulerStatus,
+    TaskLocator,
+    get_all_registered_task_models,
+    get_registered_task_model,
+)
 from .errors import NotFoundError
 
 
 if typing.TYPE_CHECKING:
-    from typing import Iterator
+    from typing import Any, Iterator
     from .models import Task, Job
 
 
+logger = structlog.get_logger(__name__)
+
+
 def find_tasks_by_status(statuses: list[SchedulerStatus]) -> Iterator[Task]:
     """Find tasks by their status.
 
@@ -43,9 +58,13 @@ def find_tasks_by_status(statuses: list[SchedulerStatus]) -> Iterator[Task]:
 def find_task(task_uuid: str) -> Task:
     """Find a task by its uuid.
 
-    Due to the way the tasks are defined with Django,
-    we need to iterate through all the task models to find
-    the task.
+    Due to the way the tasks are defined with Django, tasks
+    are stored in a different table for each type. The type of
+    the task is obtained from the `TaskLocator` index, so only
+    its table is queried. Tasks that aren't indexed (e.g. they
+    were created by a previous version) are searched in all the
+    task models. Entries of deleted tasks are removed from the
+    index when they are found.
 
     :param task_uuid: the task uuid to find.
 
@@ -53,6 +72,13 @@ def find_task(task_uuid: str) -> Task:
     .
     :raises NotFoundError: when the task is not found.
     """
+    task_class = _locate_model(task_uuid, job=False)
+    if task_class:
+        try:
+            return task_class.objects.get(uuid=task_uuid)
+        except task_class.DoesNotExist:
+            _delete_stale_locator(task_uuid)
+
     for task_class, _ in get_all_registered_task_models():
         try:
             task = task_class.objects.get(uuid=task_uuid)
@@ -66,9 +92,13 @@ def find_task(task_uuid: str) -> Task:
 def find_job(job_uuid: str) -> Job:
     """Find a job by its uuid.
 
-    Due to the way the jobs are defined with Django,
-    we need to iterate through all the job models to find
-    the job.
+    Due to the way the jobs are defined with Django, jobs
+    are stored in a different table for each type of task.
+    The type of the task is obtained from the `TaskLocator`
+    index, so only its table is queried. Jobs that aren't
+    indexed (e.g. they were created by a previous version)
+    are searched in all the job models. Entries of deleted
+    jobs are removed from the index when they are found.
 
     :param job_uuid: the job uuid to find.
 
@@ -76,6 +106,13 @@ def find_job(job_uuid: str) -> Job:
 
     :raises NotFoundError: if the job is not found.
     """
+    job_class = _locate_model(job_uuid, job=True)
+    if job_class:
+        try:
+            return job_class.objects.get(uuid=job_uuid)
+        except job_class.DoesNotExist:
+            _delete_stale_locator(job_uuid)
+
     for _, job_class in get_all_registered_task_models():
         try:
             job = job_class.objects.get(uuid=job_uuid)
@@ -84,3 +121,107 @@ def find_job(job_uuid: str) -> Job:
         else:
             return job
     raise NotFoundError(element=job_uuid)
+
+
+def increase_job_count(task: Task, **values: Any) -> int:
+    """Increase the job counter of a task and return its new value.
+
+    The counter and the rest of `values` are written with a single
+    UPDATE. On backends that can return the rows updated (PostgreSQL
+    and SQLite), the new value is obtained from that statement.
+    Otherwise, the row of the task is locked to read the counter
+    before updating it, so concurrent calls can't get the same value.
+
+    :param task: task which counter will be increased.
+    :param values: other fields of the task to update.
+
+    :returns: the new value of the job counter.
+    """
+    queryset = type(task).objects.filter(pk=task.pk)
+    connection = connections[queryset.db]
+
+    if _can_return_updated_rows(connection):
+        query = queryset.query.chain(UpdateQuery)
+        query.add_update_values({"job_count": F("job_count") + 1, **values})
+        sql, params = query.get_compiler(queryset.db).as_sql()
+        column = connection.ops.quote_name(task._meta.get_field("job_count").column)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"{sql} RETURNING {column}", params)
+            return cursor.fetchone()[0]
+
+    with transaction.atomic(using=queryset.db, savepoint=False):
+        job_count = queryset.select_for_update().values_list("job_count", flat=True).get() + 1
+        queryset.update(job_count=job_count, **values)
+
+    return job_count
+
+
+def backfill_locators(batch_size: int = 1000) -> int:
+    """Index the tasks and jobs that are not in the `TaskLocator` index.
+
+    Tasks and jobs created before the index existed are only
+    found scanning every model. This function adds them to
+    the index. Entries already indexed are ignored.
+
+    :param batch_size: number of entries inserted at once.
+
+    :returns: number of tasks and jobs processed.
+    """
+    total = 0
+
+    for task_class, job_class in get_all_registered_task_models():
+        tasks = task_class.objects.values_list("uuid", "task_type")
+        locators = (TaskLocator(uuid=uuid, task_type=task_type) for uuid, task_type in tasks)
+        total += _bulk_create_locators(locators, batch_size)
+
+        jobs = job_class.objects.values_list("uuid", "task__task_type", "task__uuid")
+        locators = (
+            TaskLocator(uuid=uuid, task_type=task_type, task_uuid=task_uuid)
+            for uuid, task_type, task_uuid in jobs
+        )
+        total += _bulk_create_locators(locators, batch_size)
+
+    return total
+
+
+def _locate_model(uuid: str, job: bool) -> type[Task] | type[Job] | None:
+    """Return the model of an indexed task or job, if any."""
+
+    task_type = TaskLocator.objects.filter(uuid=uuid).values_list("task_type", flat=True).first()
+    if task_type is None:
+        return None
+
+    try:
+        task_class, job_class = get_registered_task_model(task_type)
+    except KeyError:
+        return None
+
+    return job_class if job else task_class
+
+
+def _delete_stale_locator(uuid: str) -> None:
+    """Remove an entry of the index which task or job doesn't exist."""
+
+    logger.warning("stale task locator removed", uuid=uuid)
+    TaskLocator.objects.filter(uuid=uuid).delete()
+
+
+def _can_return_updated_rows(connection) -> bool:
+    """Check whether the database supports UPDATE ... RETURNING."""
+
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def _bulk_create_locators(locators: Iterator[TaskLocator], batch_size: int) -> int:
+    total = 0
+
+    while batch := list(itertools.islice(locators, batch_size)):
+        TaskLocator.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+
+    return total
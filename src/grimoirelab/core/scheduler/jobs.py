@@ -18,7 +18,10 @@
 
 from __future__ import annotations
 
+import json
 import logging
+import threading
+import time
 import typing
 
 import rq.job
@@ -27,6 +30,8 @@ import structlog
 if typing.TYPE_CHECKING:
     from typing import Any
     from logging import LogRecord
+    from redis import Redis
+    from redis.client import Pipeline
     from rq.types import FunctionReferenceType
 
 
@@ -39,7 +44,20 @@ class GrimoireLabJob(rq.job.Job):
     This class is a wrapper around the RQ job class to run jobs
     for GrimoireLab. It adds some extra functionality such as
     logging and progress handling. The log entries generated
-    by the job can be accessed through the property `log`.
+    by the job can be accessed through the property `job_log`.
+
+    Log entries are buffered and appended in batches to a Redis
+    list, instead of rewriting the metadata of the job on every
+    entry. The buffer is flushed when it has `LOG_FLUSH_ENTRIES`
+    entries, when `LOG_FLUSH_INTERVAL` seconds passed since the
+    last flush, and when the job finishes. Only the last
+    `LOG_MAX_ENTRIES` entries are kept.
+
+    Progress updates are kept in memory and written to the metadata
+    at most every `PROGRESS_SAVE_INTERVAL` seconds, and always when
+    the job finishes. Each write also stores the progress in a
+    lightweight key and publishes it in `PROGRESS_CHANNEL`, so live
+    readers don't need to fetch the whole job.
 
     To create an instance of this class, you must use the
     classmethod `create`. This method ensures that all the elements
@@ -49,9 +67,25 @@ class GrimoireLabJob(rq.job.Job):
     # Default packages to log
     PACKAGES_TO_LOG = [__name__, "chronicler", "perceval", "rq", "sortinghat"]
 
+    LOG_KEY_PREFIX = "grimoirelab:job:log:"
+    LOG_FLUSH_ENTRIES = 100
+    LOG_FLUSH_INTERVAL = 5
+    LOG_MAX_ENTRIES = 10000
+    LOG_TTL = 60 * 60 * 24
+
+    PROGRESS_KEY_PREFIX = "grimoirelab:job:progress:"
+    PROGRESS_CHANNEL = "grimoirelab:job:progress"
+    PROGRESS_SAVE_INTERVAL = 5
+    PROGRESS_TTL = 60 * 60 * 24
+
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self._loggers = self.PACKAGES_TO_LOG
+        self._log_buffer = []
+        self._log_lock = threading.Lock()
+        self._log_flushed_at = time.monotonic()
+        self._progress_pending = False
+        self._progress_saved_at = None
         self.meta["log"] = []
         self.meta["progress"] = None
 
@@ -76,6 +110,7 @@ class GrimoireLabJob(rq.job.Job):
         kwargs["meta"] = {
             "log": [],
             "progress": None,
+            **(kwargs.get("meta") or {}),
         }
         job = super().create(func, *args, **kwargs)
         job._loggers = loggers if loggers else job.PACKAGES_TO_LOG
@@ -90,22 +125,134 @@ class GrimoireLabJob(rq.job.Job):
 
     @progress.setter
     def progress(self, value: Any) -> None:
-        """Set the progress of the job."""
+        """Set the progress of the job.
 
+        The first value is written right away; the next ones
+        are written when `PROGRESS_SAVE_INTERVAL` seconds passed
+        since the last write.
+        """
         self.meta["progress"] = value
+        self._progress_pending = True
+
+        if (
+            self._progress_saved_at is None
+            or time.monotonic() - self._progress_saved_at >= self.PROGRESS_SAVE_INTERVAL
+        ):
+            self.save_progress()
+
+    @property
+    def progress_key(self) -> str:
+        """Returns the key that stores the live progress of the job."""
+
+        return f"{self.PROGRESS_KEY_PREFIX}{self.id}"
+
+    def save_progress(self, force: bool = False) -> None:
+        """Write the pending progress of the job.
+
+        The progress is saved in the metadata of the job, stored
+        in `progress_key` and published in `PROGRESS_CHANNEL`.
+
+        :param force: write the progress even when it wasn't set
+            again; objects updated in place are not detected as
+            pending
+        """
+        if not self._progress_pending and not (force and self.progress is not None):
+            return
+
+        self._progress_pending = False
+        self._progress_saved_at = time.monotonic()
         self.save_meta()
 
+        progress = self.meta["progress"]
+        if hasattr(progress, "to_dict"):
+            progress = progress.to_dict()
+        data = json.dumps(progress, default=str)
+        message = json.dumps({"job_id": self.id, "progress": progress}, default=str)
+
+        pipeline = self.connection.pipeline(transaction=False)
+        pipeline.set(self.progress_key, data, ex=self.PROGRESS_TTL)
+        pipeline.publish(self.PROGRESS_CHANNEL, message)
+        pipeline.execute()
+
+    @classmethod
+    def fetch_progress(cls, job_id: str, connection: Redis) -> Any:
+        """Returns the last progress written by a job, if any.
+
+        The progress is returned as it was serialized; objects
+        are returned as dictionaries.
+        """
+        data = connection.get(f"{cls.PROGRESS_KEY_PREFIX}{job_id}")
+        return json.loads(data) if data is not None else None
+
+    @property
+    def log_key(self) -> str:
+        """Returns the key of the Redis list that stores the log."""
+
+        return f"{self.LOG_KEY_PREFIX}{self.id}"
+
     @property
     def job_log(self) -> list[dict[str, Any]] | None:
-        """Returns the log of the job."""
+        """Returns the log of the job.
+
+        It includes the entries stored in Redis and those
+        still buffered by this instance.
+        """
+        # Jobs created by previous versions stored the log in 'meta'
+        log = list(self.meta.get("log", []))
+        log.extend(json.loads(entry) for entry in self.connection.lrange(self.log_key, 0, -1))
 
-        return self.meta.get("log", [])
+        with self._log_lock:
+            log.extend(self._log_buffer)
+
+        return log[-self.LOG_MAX_ENTRIES :]
 
     def add_log(self, log: dict[str, Any]) -> None:
-        """Add a log entry."""
+        """Add a log entry.
 
-        self.meta["log"].append(log)
-        self.save_meta()
+        The entry is buffered and it will be stored with
+        the next flush of the log.
+        """
+        with self._log_lock:
+            self._log_buffer.append(log)
+            flush = (
+                len(self._log_buffer) >= self.LOG_FLUSH_ENTRIES
+                or time.monotonic() - self._log_flushed_at >= self.LOG_FLUSH_INTERVAL
+            )
+
+        if flush:
+            self.flush_log()
+
+    def flush_log(self) -> None:
+        """Store the buffered log entries in Redis."""
+
+        with self._log_lock:
+            entries, self._log_buffer = self._log_buffer, []
+            self._log_flushed_at = time.monotonic()
+
+        if not entries:
+            return
+
+        pipeline = self.connection.pipeline(transaction=False)
+        pipeline.rpush(self.log_key, *[json.dumps(entry) for entry in entries])
+        pipeline.ltrim(self.log_key, -self.LOG_MAX_ENTRIES, -1)
+        pipeline.expire(self.log_key, self.LOG_TTL)
+        pipeline.execute()
+
+    def delete(
+        self,
+        pipeline: Pipeline | None = None,
+        remove_from_queue: bool = True,
+        delete_dependents: bool = False,
+    ) -> None:
+        """Delete the job and its log."""
+
+        connection = pipeline if pipeline is not None else self.connection
+        connection.delete(self.log_key, self.progress_key)
+        super().delete(
+            pipeline=pipeline,
+            remove_from_queue=remove_from_queue,
+            delete_dependents=delete_dependents,
+        )
 
     def _add_log_handler(self):
         """Add the log handler to the job."""
@@ -135,12 +282,16 @@ class GrimoireLabJob(rq.job.Job):
             raise ex
         finally:
             self._remove_log_handler()
+            # The final progress is always written because jobs
+            # may update the progress object in place
+            self.save_progress(force=True)
+            self.flush_log()
 
 
 class JobLogHandler(logging.StreamHandler):
     """Handler class for the job logs.
 
-    Log entries will be stored in the job metadata.
+    Log entries will be stored in the log of the job.
 
     :param job: job to store the logs
     """
@@ -150,7 +301,7 @@ class JobLogHandler(logging.StreamHandler):
         self.job = job
 
     def emit(self, record: LogRecord) -> None:
-        """Emit a log entry storing it in the job metadata.
+        """Emit a log entry storing it in the log of the job.
 
         :param record: log record to emit
         """
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import typing
+import uuid
+
+import redis.exceptions
+import structlog
+
+if typing.TYPE_CHECKING:
+    import redis
+
+
+MAINTENANCE_LEADER_KEY = "grimoirelab:maintenance:leader"
+LEADER_TTL = 60
+
+
+logger = structlog.get_logger(__name__)
+
+
+# Extend the lock only when it's still held by this process
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Remove the lock only when it's still held by this process
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """Elect a single leader among the processes sharing a Redis server.
+
+    The leader is the process holding a lock stored in `key`. The
+    lock expires after `ttl` seconds, so it has to be renewed before
+    that. Calling `start` runs a background thread that tries to
+    acquire the lock, or renew it when this process is already the
+    leader, every third of the TTL. When the leader dies or can't
+    reach Redis, the lock expires and another process takes over.
+
+    Each process is identified by `identity`; by default, the host
+    name and the PID of the process followed by a random suffix.
+
+    :param connection: Redis connection object
+    :param key: name of the key that stores the lock
+    :param ttl: seconds the lock is valid without renewing it
+    :param identity: identity of this process
+    """
+
+    def __init__(
+        self,
+        connection: redis.Redis,
+        key: str = MAINTENANCE_LEADER_KEY,
+        ttl: int = LEADER_TTL,
+        identity: str | None = None,
+    ):
+        self.connection = connection
+        self.key = key
+        self.ttl = ttl
+        self.identity = identity or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._is_leader = False
+        self._leader = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._renew = connection.register_script(RENEW_SCRIPT)
+        self._release = connection.register_script(RELEASE_SCRIPT)
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process holds the lock."""
+
+        return self._is_leader
+
+    def acquire(self) -> bool:
+        """Try to become the leader, or remain it.
+
+        :returns: whether this process is the leader
+        """
+        try:
+            if self._is_leader:
+                renewed = self._renew(keys=[self.key], args=[self.identity, self.ttl * 1000])
+                is_leader = bool(renewed)
+            else:
+                is_leader = bool(self.connection.set(self.key, self.identity, nx=True, ex=self.ttl))
+            leader = self.identity if is_leader else current_leader(self.connection, self.key)[0]
+        except redis.exceptions.RedisError as exc:
+            logger.error(
+                "Unable to reach Redis to elect the leader", identity=self.identity, err=exc
+            )
+            is_leader = False
+            leader = None
+
+        if is_leader and not self._is_leader:
+            logger.info("Elected as leader", identity=self.identity, key=self.key)
+        elif self._is_leader and not is_leader:
+            logger.warning("Leadership lost", identity=self.identity, key=self.key)
+        elif not is_leader and leader and leader != self._leader:
+            logger.info("Following leader", identity=self.identity, leader=leader, key=self.key)
+
+        self._is_leader = is_leader
+        self._leader = leader
+
+        return is_leader
+
+    def release(self):
+        """Give up the leadership, if this process holds it."""
+
+        if not self._is_leader:
+            return
+
+        self._is_leader = False
+        try:
+            self._release(keys=[self.key], args=[self.identity])
+        except redis.exceptions.RedisError as exc:
+            # The lock will expire by itself
+            logger.error("Unable to release the leadership", identity=self.identity, err=exc)
+        else:
+            logger.info("Leadership released", identity=self.identity, key=self.key)
+
+    def start(self):
+        """Run the election in a background thread."""
+
+        self.acquire()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="leader-election", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and release the leadership."""
+
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.release()
+
+    def _run(self):
+        while not self._stop_event.wait(self.ttl / 3):
+            self.acquire()
+
+
+def current_leader(
+    connection: redis.Redis,
+    key: str = MAINTENANCE_LEADER_KEY,
+) -> tuple[str | None, int | None]:
+    """Return the identity of the leader and the seconds its lock is valid.
+
+    :param connection: Redis connection object
+    :param key: name of the key that stores the lock
+
+    :returns: a tuple with the identity of the leader and the seconds
+        until its lock expires, or `(None, None)` when there is no leader
+    """
+    pipeline = connection.pipeline(transaction=False)
+    pipeline.get(key)
+    pipeline.ttl(key)
+    leader, ttl = pipeline.execute()
+
+    if leader is None:
+        return None, None
+
+    leader = leader.decode() if isinstance(leader, bytes) else leader
+    return leader, max(ttl, 0)
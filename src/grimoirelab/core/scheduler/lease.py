@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import annotations
+
+import contextlib
+import threading
+import typing
+
+import structlog
+
+from django.conf import settings
+
+from .leader import RELEASE_SCRIPT, RENEW_SCRIPT
+
+if typing.TYPE_CHECKING:
+    import redis
+
+
+TASK_LEASE_PREFIX = "grimoirelab:task:lease:"
+DISCARDED_JOBS_KEY = "grimoirelab:task:lease:discarded"
+
+
+logger = structlog.get_logger(__name__)
+
+
+class TaskLease:
+    """Lease that allows a single job of a task to run at once.
+
+    The job holding the lease is stored in Redis under a key with
+    the uuid of the task. The lease expires after `ttl` seconds, so
+    it has to be renewed while the job runs; when the worker dies,
+    the lease expires and a new job can take it.
+
+    :param connection: Redis connection object
+    :param task_uuid: uuid of the task
+    :param job_id: identifier of the job that holds the lease
+    :param ttl: seconds the lease is valid without renewing it
+    """
+
+    def __init__(
+        self,
+        connection: redis.Redis,
+        task_uuid: str,
+        job_id: str,
+        ttl: int = settings.GRIMOIRELAB_TASK_LEASE_TTL,
+    ):
+        self.connection = connection
+        self.task_uuid = task_uuid
+        self.job_id = job_id
+        self.ttl = ttl
+
+    @property
+    def key(self) -> str:
+        return f"{TASK_LEASE_PREFIX}{self.task_uuid}"
+
+    def acquire(self) -> bool:
+        """Take the lease for the job.
+
+        :returns: whether the job holds the lease; a job that
+            already held it renews the lease
+        """
+        if self.connection.set(self.key, self.job_id, nx=True, ex=self.ttl):
+            return True
+        return self.renew()
+
+    def renew(self) -> bool:
+        """Extend the lease, if the job still holds it."""
+
+        script = self.connection.register_script(RENEW_SCRIPT)
+        return bool(script(keys=[self.key], args=[self.job_id, self.ttl * 1000]))
+
+    def release(self):
+        """Give up the lease, if the job still holds it."""
+
+        script = self.connection.register_script(RELEASE_SCRIPT)
+        script(keys=[self.key], args=[self.job_id])
+
+    @contextlib.contextmanager
+    def keep(self, interval: float | None = None) -> typing.Iterator[TaskLease]:
+        """Renew the lease in the background while the context runs.
+
+        The lease is renewed from the process that runs the job,
+        so it expires when that process dies, whatever the type
+        of worker running it.
+
+        :param interval: seconds between renewals; by default, a
+            third of the `ttl` of the lease
+        """
+        if interval is None:
+            interval = self.ttl / 3
+
+        stopped = threading.Event()
+
+        def renew():
+            while not stopped.wait(interval):
+                if not self.renew():
+                    logger.warning(
+                        "task lease lost", task_uuid=self.task_uuid, job_uuid=self.job_id
+                    )
+                    return
+
+        thread = threading.Thread(target=renew, name=f"lease-{self.task_uuid}", daemon=True)
+        thread.start()
+
+        try:
+            yield self
+        finally:
+            stopped.set()
+            thread.join()
+
+
+def find_lease_holders(connection: redis.Redis, task_uuids: list[str]) -> dict[str, str]:
+    """Find the jobs holding the lease of the tasks.
+
+    :param connection: Redis connection object
+    :param task_uuids: uuids of the tasks
+
+    :returns: dictionary with the uuid of the task as key and the
+        identifier of the job holding its lease as value; tasks
+        without lease are not included
+    """
+    if not task_uuids:
+        return {}
+
+    holders = connection.mget([f"{TASK_LEASE_PREFIX}{uuid}" for uuid in task_uuids])
+
+    return {
+        uuid: holder.decode() if isinstance(holder, bytes) else holder
+        for uuid, holder in zip(task_uuids, holders)
+        if holder is not None
+    }
+
+
+def count_discarded_job(connection: redis.Redis) -> int:
+    """Increase the number of jobs discarded because of the lease."""
+
+    return connection.incr(DISCARDED_JOBS_KEY)
+
+
+def discarded_jobs(connection: redis.Redis) -> int:
+    """Return the number of jobs discarded because of the lease."""
+
+    return int(connection.get(DISCARDED_JOBS_KEY) or 0)
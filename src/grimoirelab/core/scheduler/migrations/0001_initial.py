@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:43
+
+import grimoirelab.core.models
+import grimoirelab_toolkit.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskLocator",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "created_at",
+                    grimoirelab.core.models.CreationDateTimeField(
+                        default=grimoirelab_toolkit.datetime.datetime_utcnow, editable=False
+                    ),
+                ),
+                (
+                    "last_modified",
+                    grimoirelab.core.models.LastModificationDateTimeField(
+                        default=grimoirelab_toolkit.datetime.datetime_utcnow, editable=False
+                    ),
+                ),
+                ("uuid", models.CharField(max_length=191, unique=True)),
+                ("task_type", models.CharField(max_length=128)),
+                (
+                    "task_uuid",
+                    models.CharField(db_index=True, default=None, max_length=191, null=True),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
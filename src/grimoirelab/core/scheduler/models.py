@@ -34,7 +34,9 @@ from django.db.models import (
     IntegerChoices,
     ForeignKey,
     CASCADE,
+    UniqueConstraint,
 )
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 
 from grimoirelab_toolkit.datetime import datetime_utcnow
@@ -110,6 +112,7 @@ class Task(BaseModel):
     runs = PositiveIntegerField(default=0)
     failures = PositiveIntegerField(default=0)
     last_run = DateTimeField(null=True, default=None)
+    job_count = PositiveIntegerField(default=0)
 
     # Scheduling configuration
     scheduled_at = DateTimeField(null=True, default=None)
@@ -156,6 +159,21 @@ class Task(BaseModel):
         task.save()
         return task
 
+    def save(self, *args, **kwargs) -> None:
+        """Save the task without overwriting its job counter.
+
+        The counter is only increased by the scheduler with an atomic
+        update, so saving a task loaded before that would roll it back.
+        When no fields are given, every field but the counter is saved.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "job_count"
+            ]
+        super().save(*args, **kwargs)
+
     def save_run(self, status: SchedulerStatus) -> None:
         """Save the result of the task execution.
 
@@ -172,7 +190,7 @@ class Task(BaseModel):
         else:
             self.failures = 0
         self.status = status
-        self.save()
+        self.save(update_fields=["runs", "last_run", "failures", "status", "last_modified"])
 
     def prepare_job_parameters(self) -> dict[str, Any]:
         """Generate the parameters for running the job."""
@@ -184,6 +202,26 @@ class Task(BaseModel):
 
         raise NotImplementedError
 
+    @property
+    def effective_interval(self) -> int:
+        """Return the seconds between the jobs of the task.
+
+        It's the interval after successful jobs; failed jobs
+        are always retried after `job_interval` seconds.
+        """
+
+        return self.job_interval
+
+    def adapt_interval(self, result: Any) -> None:
+        """Adapt the interval between jobs to the result of the last one.
+
+        Tasks run their jobs every `job_interval` seconds, unless
+        they override this method and `effective_interval`.
+
+        :param result: result of the last job of the task.
+        """
+        pass
+
     @property
     def task_id(self) -> str:
         """Return the task id."""
@@ -296,6 +334,60 @@ class Job(BaseModel):
         return f"{GRIMOIRELAB_JOB_PREFIX}{self.uuid}"
 
 
+class TaskLocator(BaseModel):
+    """Index to find the type of a task or a job by its uuid.
+
+    Tasks and jobs of each type are stored in their own tables,
+    so finding one by its uuid requires to query every table.
+    This model maps the uuid of every task and job to the type
+    of task, so only the right table is queried. Jobs also store
+    the uuid of their task, to remove them when the task is deleted.
+
+    Entries are added and removed automatically for the models
+    registered with `register_task_model`. Rows removed without
+    Django (e.g. running SQL) leave stale entries; they are
+    removed when a search finds them.
+    """
+
+    uuid = CharField(max_length=MAX_SIZE_CHAR_INDEX, unique=True)
+    task_type = CharField(max_length=MAX_SIZE_CHAR_FIELD)
+    task_uuid = CharField(max_length=MAX_SIZE_CHAR_INDEX, null=True, default=None, db_index=True)
+
+
+def _add_task_locator(sender: type[Task], instance: Task, created: bool, **kwargs) -> None:
+    """Index a new task."""
+
+    if created:
+        TaskLocator.objects.bulk_create(
+            [TaskLocator(uuid=instance.uuid, task_type=instance.task_type)],
+            ignore_conflicts=True,
+        )
+
+
+def _add_job_locator(sender: type[Job], instance: Job, created: bool, **kwargs) -> None:
+    """Index a new job."""
+
+    if created:
+        task = instance.task
+        TaskLocator.objects.bulk_create(
+            [TaskLocator(uuid=instance.uuid, task_type=task.task_type, task_uuid=task.uuid)],
+            ignore_conflicts=True,
+        )
+
+
+def _delete_task_locators(sender: type[Task], instance: Task, **kwargs) -> None:
+    """Remove a deleted task and its jobs from the index."""
+
+    TaskLocator.objects.filter(task_uuid=instance.uuid).delete()
+    TaskLocator.objects.filter(uuid=instance.uuid).delete()
+
+
+def _delete_job_locator(sender: type[Job], instance: Job, **kwargs) -> None:
+    """Remove a deleted job from the index."""
+
+    TaskLocator.objects.filter(uuid=instance.uuid).delete()
+
+
 def _create_job_class(task_class: type[Task]) -> type[Job]:
     """Create a new job class related to the given task class.
 
@@ -318,6 +410,18 @@ def _create_job_class(task_class: type[Task]) -> type[Job]:
                 on_delete=CASCADE,
                 related_name="jobs",
             ),
+            "Meta": type(
+                "Meta",
+                (),
+                {
+                    "constraints": [
+                        UniqueConstraint(
+                            fields=["task", "job_num"],
+                            name=f"unique_{class_name.lower()}_job_num",
+                        ),
+                    ],
+                },
+            ),
             "__module__": task_class.__module__,
         },
     )
@@ -353,6 +457,13 @@ def register_task_model(task_type: str, task_class: type[Task]) -> tuple[type[Ta
 
     GRIMOIRELAB_TASK_MODELS[task_type] = (task_class, job_class)
 
+    # Having 'post_delete' receivers, Django sends the signal for
+    # every row removed with 'QuerySet.delete()' or by cascade.
+    post_save.connect(_add_task_locator, sender=task_class)
+    post_save.connect(_add_job_locator, sender=job_class)
+    post_delete.connect(_delete_task_locators, sender=task_class)
+    post_delete.connect(_delete_job_locator, sender=job_class)
+
     return task_class, job_class
 
 
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import typing
+
+import structlog
+
+if typing.TYPE_CHECKING:
+    import redis
+
+
+START_SLOTS_PREFIX = "grimoirelab:scheduler:slots:"
+START_SLOTS_HORIZON = 24 * 60
+
+
+logger = structlog.get_logger(__name__)
+
+
+# Find the first minute from ARGV[2] with less than ARGV[1] jobs
+# and add the job ARGV[5] to it. Sets expire a minute after their
+# minute passed, taking ARGV[4] as the current time. Returns -1 when
+# every minute of the horizon is full.
+#
+# The keys of the minutes are built here from the prefix in KEYS[1],
+# so they aren't declared to Redis. This assumes a non-cluster Redis,
+# where all the keys are in the same server.
+RESERVE_SLOT_SCRIPT = """
+local max_jobs = tonumber(ARGV[1])
+local minute = tonumber(ARGV[2])
+local now = tonumber(ARGV[4])
+for i = 0, tonumber(ARGV[3]) - 1 do
+    local key = KEYS[1] .. (minute + i)
+    if redis.call("scard", key) < max_jobs then
+        redis.call("sadd", key, ARGV[5])
+        redis.call("expire", key, (minute + i + 2) * 60 - now)
+        return minute + i
+    end
+end
+return -1
+"""
+
+
+def task_offset(task_uuid: str, salt: int = 0) -> float:
+    """Return a fixed fraction in [0, 1) derived from the uuid of the task.
+
+    Different values of `salt` return independent fractions
+    for the same task.
+    """
+    digest = hashlib.sha1(f"{task_uuid}:{salt}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+def job_jitter(
+    task_uuid: str,
+    scheduled_at: datetime.datetime,
+    interval: int,
+    fraction: float,
+    first: bool = False,
+) -> float:
+    """Return the seconds to move a job of a recurring task to its phase.
+
+    Each task has a fixed phase in the interval, derived from its
+    uuid. The phase of a task is the remainder of the timestamps
+    of its jobs divided by the interval. Jobs are moved to the
+    closest time with the phase of the task, but no more than
+    `fraction / 2` times the interval. After a few jobs, the
+    task is locked to its phase and runs once per interval.
+
+    The first job of a task can't run earlier, so it's delayed up
+    to `fraction` times the interval. Tasks that run at the same
+    time, like the ones created at once, are spread over the
+    interval from their first job.
+
+    :param task_uuid: uuid of the task
+    :param scheduled_at: time of the job before moving it
+    :param interval: seconds between jobs of the task
+    :param fraction: fraction of the interval the jobs can be moved
+    :param first: whether the job is the first one of the task
+
+    :returns: seconds to add to the time of the job
+    """
+    if interval <= 0 or fraction <= 0:
+        return 0
+
+    phase = task_offset(task_uuid) * interval
+    ahead = (phase - scheduled_at.timestamp()) % interval
+
+    if first:
+        return ahead % (fraction * interval)
+
+    if ahead > interval / 2:
+        ahead -= interval
+
+    limit = fraction * interval / 2
+    return max(-limit, min(limit, ahead))
+
+
+def adaptive_interval(
+    interval: int,
+    fetched: int,
+    min_interval: int,
+    max_interval: int,
+    factor: float,
+) -> int:
+    """Return the interval for the next job of a task polling a data source.
+
+    Data sources without new items are polled less often: when the
+    last job fetched nothing, the interval is multiplied by `factor`.
+    When it fetched items, the interval is divided by `factor`, so
+    active data sources go back to be polled often.
+
+    :param interval: current seconds between jobs of the task
+    :param fetched: number of items fetched by the last job
+    :param min_interval: minimum seconds between jobs
+    :param max_interval: maximum seconds between jobs
+    :param factor: number to multiply or divide the interval
+
+    :returns: seconds between the last job and the next one
+    """
+    if fetched > 0:
+        interval = interval / factor
+    else:
+        interval = interval * factor
+
+    return int(min(max(interval, min_interval), max_interval))
+
+
+def reserve_start_slot(
+    connection: redis.Redis,
+    job_id: str,
+    scheduled_at: datetime.datetime,
+    max_jobs: int,
+    now: datetime.datetime,
+    horizon: int = START_SLOTS_HORIZON,
+) -> datetime.datetime:
+    """Reserve a place for a job in a minute with room for it.
+
+    The jobs scheduled to start in each minute are stored in a set
+    in Redis. When the minute of `scheduled_at` already has
+    `max_jobs`, the job is delayed to the first of the following
+    minutes with room, keeping its second. Jobs that won't run at
+    that time must release their place with `release_start_slot`.
+
+    :param connection: Redis connection object
+    :param job_id: identifier of the job
+    :param scheduled_at: time the job would start
+    :param max_jobs: maximum number of jobs started per minute
+    :param now: current time; jobs scheduled in the past start
+        in the current minute
+    :param horizon: number of minutes to look for room; when they
+        are full, the job keeps its time
+
+    :returns: time the job will start
+    """
+    start = max(scheduled_at, now)
+    minute = int(start.timestamp()) // 60
+
+    script = connection.register_script(RESERVE_SLOT_SCRIPT)
+    reserved = script(
+        keys=[START_SLOTS_PREFIX],
+        args=[max_jobs, minute, horizon, int(now.timestamp()), job_id],
+    )
+
+    if reserved < 0:
+        logger.warning("No room to schedule the job; rate limit ignored", scheduled_at=start)
+        return start
+    elif reserved == minute:
+        return start
+
+    return start + datetime.timedelta(minutes=reserved - minute)
+
+
+def release_start_slot(connection: redis.Redis, job_id: str, scheduled_at: datetime.datetime):
+    """Release the place reserved for a job that won't start.
+
+    :param connection: Redis connection object
+    :param job_id: identifier of the job
+    :param scheduled_at: time the job was going to start
+    """
+    minute = int(scheduled_at.timestamp()) // 60
+    connection.srem(f"{START_SLOTS_PREFIX}{minute}", job_id)
@@ -29,21 +29,25 @@ import rq.job
 import structlog
 
 from django.conf import settings
-from rq.registry import StartedJobRegistry
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from rq.command import send_stop_job_command
 
 from grimoirelab_toolkit.datetime import datetime_utcnow
 
 from .db import (
-    find_tasks_by_status,
     find_job,
     find_task,
+    increase_job_count,
 )
 from .errors import NotFoundError
+from .lease import TaskLease, find_lease_holders
+from .policy import job_jitter, release_start_slot, reserve_start_slot
 from .models import (
     Job,
     SchedulerStatus,
     Task,
+    get_all_registered_task_models,
     get_registered_task_model,
 )
 
@@ -59,10 +63,31 @@ RQ_JOB_STOPPED_STATUS = [
     rq.job.JobStatus.CANCELED,
 ]
 
+ACTIVE_STATUS = [
+    SchedulerStatus.RUNNING,
+    SchedulerStatus.RECOVERY,
+    SchedulerStatus.ENQUEUED,
+    SchedulerStatus.NEW,
+]
+
+MAINTENANCE_CHUNK_SIZE = 1000
+MAINTENANCE_FULL_PASS_INTERVAL = 3600
+
 
 logger = structlog.get_logger(__name__)
 
 
+class _MaintenancePasses:
+    """Start time of the last passes of `maintain_tasks` in this process."""
+
+    def __init__(self):
+        self.last_pass_at = None
+        self.last_full_pass_at = None
+
+
+_maintenance = _MaintenancePasses()
+
+
 def schedule_task(
     task_type: str,
     task_args: dict[str, Any],
@@ -87,7 +112,7 @@ def schedule_task(
     task = task_class.create_task(
         task_args, job_interval, job_max_retries, burst=burst, *args, **kwargs
     )
-    _enqueue_task(task, scheduled_at=datetime_utcnow())
+    _enqueue_task(task, scheduled_at=_first_job_time(task))
 
     logger.info(
         "task scheduled",
@@ -116,6 +141,8 @@ def cancel_task(task_uuid: str) -> None:
     jobs = task.jobs.all()
     for job in jobs:
         connection = django_rq.get_connection(task.default_job_queue)
+        if job.status == SchedulerStatus.ENQUEUED:
+            _release_start_slot(task, job)
         try:
             job_rq = rq.job.Job.fetch(job.uuid, connection=connection)
         except rq.exceptions.NoSuchJobError:
@@ -130,7 +157,7 @@ def cancel_task(task_uuid: str) -> None:
 
     if task.status not in (SchedulerStatus.COMPLETED, SchedulerStatus.FAILED):
         task.status = SchedulerStatus.CANCELED
-        task.save()
+        task.save(update_fields=["status", "last_modified"])
 
     logger.info("task canceled", task_uuid=task.uuid)
 
@@ -158,12 +185,19 @@ def reschedule_task(task_uuid: str) -> None:
             job_rq.delete()
         except (rq.exceptions.NoSuchJobError, rq.exceptions.InvalidJobOperation):
             pass
-        _schedule_job(task, job, datetime_utcnow(), job.job_args)
+        _release_start_slot(task, job)
+        current_time = datetime_utcnow()
+        scheduled_at = _reserve_start_slot(task, job.uuid, current_time, current_time)
+        _schedule_job(task, job, scheduled_at, job.job_args)
     elif task.status == SchedulerStatus.RUNNING:
         # Make sure it is running
         job = task.jobs.order_by("-scheduled_at").first()
-        if _is_job_removed_or_stopped(job, task.default_job_queue):
-            job.save_run(SchedulerStatus.CANCELED)
+        connection = django_rq.get_connection(task.default_job_queue)
+        if find_lease_holders(connection, [task.uuid]):
+            logger.info("task still running; not rescheduled", task_uuid=task.uuid)
+        elif _is_job_removed_or_stopped(job, task.default_job_queue):
+            # Keep the last checkpoint to resume the task from there
+            job.save_run(SchedulerStatus.CANCELED, progress=job.progress)
             _enqueue_task(task)
     else:
         _enqueue_task(task)
@@ -171,22 +205,94 @@ def reschedule_task(task_uuid: str) -> None:
     logger.info("task rescheduled", task_uuid=task.uuid)
 
 
-def maintain_tasks() -> None:
+def maintain_tasks(full: bool = False, chunk_size: int = MAINTENANCE_CHUNK_SIZE) -> None:
     """Maintain the tasks that are scheduled to be executed.
 
     This function will check the status of the tasks and jobs
     that are scheduled, rescheduling them if necessary.
+
+    Tasks are processed in chunks of `chunk_size`. For each chunk,
+    the latest active job of every task is loaded with a single
+    query, and the status of the jobs is read from Redis with one
+    pipeline per queue.
+
+    After the first pass, only the tasks whose state could have
+    changed are checked. Tasks enqueued for the future that weren't
+    modified since the previous pass are skipped because their jobs
+    were already checked. A full pass is run every
+    `MAINTENANCE_FULL_PASS_INTERVAL` seconds, or when `full` is set,
+    to find the jobs removed from Redis by other means.
+
+    :param full: check every active task.
+    :param chunk_size: number of tasks checked at once.
     """
-    active_status = [
-        SchedulerStatus.RUNNING,
-        SchedulerStatus.RECOVERY,
-        SchedulerStatus.ENQUEUED,
-        SchedulerStatus.NEW,
-    ]
-    tasks = find_tasks_by_status(active_status)
+    started_at = datetime_utcnow()
+
+    full = (
+        full
+        or _maintenance.last_full_pass_at is None
+        or (started_at - _maintenance.last_full_pass_at).total_seconds()
+        >= MAINTENANCE_FULL_PASS_INTERVAL
+    )
+
+    checked = 0
+    for task_class, job_class in get_all_registered_task_models():
+        tasks = task_class.objects.filter(status__in=ACTIVE_STATUS)
+        if not full:
+            tasks = tasks.exclude(
+                status=SchedulerStatus.ENQUEUED,
+                scheduled_at__gt=started_at,
+                last_modified__lt=_maintenance.last_pass_at,
+            )
+
+        last_pk = None
+        while True:
+            chunk = tasks.order_by("pk")
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            chunk = list(chunk[:chunk_size])
+            if not chunk:
+                break
+            _maintain_task_chunk(chunk, job_class)
+            checked += len(chunk)
+            last_pk = chunk[-1].pk
+
+    # Tasks modified while the pass was running will be checked again
+    _maintenance.last_pass_at = started_at
+    if full:
+        _maintenance.last_full_pass_at = started_at
+
+    logger.debug("Maintenance of tasks completed", full=full, checked=checked)
+
+
+def _maintain_task_chunk(tasks: list[Task], job_class: type[Job]) -> None:
+    """Check a chunk of tasks of the same type, rescheduling them if necessary."""
+
+    jobs = _find_latest_active_jobs(tasks, job_class)
+
+    stopped = set()
+    queues = {}
+    for job in jobs.values():
+        queues.setdefault(job.task.default_job_queue, []).append(job.uuid)
+    for queue, job_ids in queues.items():
+        stopped.update(_find_stopped_jobs(django_rq.get_connection(queue), job_ids))
+
+    # Tasks whose lease is still held have a job running
+    leased = set()
+    queues = {}
+    for task in tasks:
+        job_db = jobs.get(task.pk)
+        if not job_db or job_db.uuid in stopped:
+            queues.setdefault(task.default_job_queue, []).append(task.uuid)
+    for queue, task_uuids in queues.items():
+        leased.update(find_lease_holders(django_rq.get_connection(queue), task_uuids))
 
     for task in tasks:
-        job_db = task.jobs.filter(status__in=active_status).order_by("-scheduled_at").first()
+        if task.uuid in leased:
+            logger.info("task still running; not rescheduled", task_uuid=task.uuid)
+            continue
+
+        job_db = jobs.get(task.pk)
 
         if not job_db:
             logger.error(
@@ -196,7 +302,7 @@ def maintain_tasks() -> None:
             _enqueue_task(task, scheduled_at=datetime_utcnow())
             continue
 
-        if not _is_job_removed_or_stopped(job_db, task.default_job_queue):
+        if job_db.uuid not in stopped:
             continue
 
         logger.error(
@@ -209,10 +315,71 @@ def maintain_tasks() -> None:
         current_time = datetime_utcnow()
         scheduled_at = max(task.scheduled_at, current_time)
 
-        job_db.save_run(SchedulerStatus.CANCELED)
+        # Keep the last checkpoint to resume the task from there
+        _release_start_slot(task, job_db)
+        job_db.save_run(SchedulerStatus.CANCELED, progress=job_db.progress)
         _enqueue_task(task, scheduled_at=scheduled_at)
 
-    logger.debug("Maintenance of tasks completed")
+
+def _find_latest_active_jobs(tasks: list[Task], job_class: type[Job]) -> dict[int, Job]:
+    """Find the latest active job of each task with a single query.
+
+    :param tasks: tasks of the same type.
+    :param job_class: job model of the tasks.
+
+    :returns: dictionary with the primary key of the task as key
+        and its latest active job as value.
+    """
+    tasks_by_pk = {task.pk: task for task in tasks}
+
+    jobs = (
+        job_class.objects.filter(task__in=tasks_by_pk.keys(), status__in=ACTIVE_STATUS)
+        .annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F("task_id")],
+                order_by=F("scheduled_at").desc(),
+            )
+        )
+        .filter(row_number=1)
+    )
+
+    latest = {}
+    for job in jobs:
+        job.task = tasks_by_pk[job.task_id]
+        latest[job.task_id] = job
+
+    return latest
+
+
+def _find_stopped_jobs(connection: redis.Redis, job_ids: list[str]) -> set[str]:
+    """Find which jobs were removed or stopped in Redis.
+
+    The jobs are fetched with a single pipeline. Jobs in `STARTED`
+    status are considered stopped when none of their executions
+    is alive, which happens when the heartbeat of the worker
+    expired because it was forcibly stopped.
+
+    :param connection: Redis connection of the queue of the jobs.
+    :param job_ids: identifiers of the jobs to check.
+
+    :returns: identifiers of the jobs removed or stopped.
+    """
+    stopped = set()
+
+    for job_id, job_rq in zip(job_ids, rq.job.Job.fetch_many(job_ids, connection=connection)):
+        if job_rq is None:
+            stopped.add(job_id)
+            continue
+        status = job_rq.get_status(refresh=False)
+        if status == rq.job.JobStatus.STARTED:
+            # Expired executions are removed from the registry
+            if not job_rq.execution_registry.get_execution_ids():
+                stopped.add(job_id)
+        elif status in RQ_JOB_STOPPED_STATUS:
+            stopped.add(job_id)
+
+    return stopped
 
 
 def _is_job_removed_or_stopped(job: Job, queue: str) -> bool:
@@ -222,26 +389,11 @@ def _is_job_removed_or_stopped(job: Job, queue: str) -> bool:
     :param job: job to check.
     :param queue: queue where the job is enqueued.
     """
-    try:
-        connection = django_rq.get_connection(queue)
-        job_rq = rq.job.Job.fetch(job.uuid, connection=connection)
-        status = job_rq.get_status()
-        if status == rq.job.JobStatus.STARTED:
-            # Sometimes, the worker may be forcibly stopped, leaving the job
-            # in the STARTED status. We need to check if the job has expired
-            # due to a missing heartbeat.
-            try:
-                expiration_date = StartedJobRegistry(queue, connection).get_expiration_time(job_rq)
-            except TypeError:
-                return True
-            return expiration_date < datetime.datetime.now()
-        else:
-            return status in RQ_JOB_STOPPED_STATUS
-    except rq.exceptions.NoSuchJobError:
-        return True
-
-
-def _enqueue_task(task: Task, scheduled_at: datetime.datetime | None = None) -> Job:
+    connection = django_rq.get_connection(queue)
+    return job.uuid in _find_stopped_jobs(connection, [job.uuid])
+
+
+def _enqueue_task(task: Task, scheduled_at: datetime.datetime | None = None) -> Job | None:
     """Enqueue the task to be executed in the future.
 
     A new job for the task will be created and enqueued in the
@@ -250,39 +402,124 @@ def _enqueue_task(task: Task, scheduled_at: datetime.datetime | None = None) ->
     this parameter is not set, the job will be run as soon as
     possible.
 
+    When `GRIMOIRELAB_JOBS_PER_MINUTE` is set, the job is delayed
+    to the first minute with room for it.
+
+    The task is not enqueued while a job of the task holds its
+    lease; that job will enqueue the next one when it finishes.
+
     :param task: task to be enqueued.
     :param scheduled_at: datetime when the task should be executed.
 
-    :return: the job object created.
+    :return: the job object created, or `None` when the task
+        wasn't enqueued.
     """
+    connection = django_rq.get_connection(task.default_job_queue)
+    holders = find_lease_holders(connection, [task.uuid])
+    if holders:
+        logger.warning(
+            "job not enqueued; another job of the task is running",
+            task_uuid=task.uuid,
+            job_uuid=holders[task.uuid],
+        )
+        return None
+
+    current_time = datetime_utcnow()
     if not scheduled_at:
-        scheduled_at = datetime_utcnow()
+        scheduled_at = current_time
+
+    job_uuid = str(uuid.uuid4())
+    scheduled_at = _reserve_start_slot(task, job_uuid, scheduled_at, current_time)
 
     job_args = task.prepare_job_parameters()
-    queue = task.default_job_queue
 
+    # The job must be in the database before it's enqueued;
+    # workers look for it as soon as they pick it. The job and
+    # the task are written in this transaction; after scheduling
+    # the job, they are only written again if scheduling fails.
+    with django.db.transaction.atomic():
+        job = _create_job(task, job_uuid, job_args, scheduled_at)
+
+    _schedule_job(task, job, scheduled_at, job_args)
+
+    return job
+
+
+def _reserve_start_slot(
+    task: Task,
+    job_uuid: str,
+    scheduled_at: datetime.datetime,
+    current_time: datetime.datetime,
+) -> datetime.datetime:
+    """Return when the job can start without exceeding the jobs per minute.
+
+    When `GRIMOIRELAB_JOBS_PER_MINUTE` is not set, the job keeps its time.
+    """
+    if not settings.GRIMOIRELAB_JOBS_PER_MINUTE:
+        return scheduled_at
+
+    return reserve_start_slot(
+        django_rq.get_connection(task.default_job_queue),
+        job_uuid,
+        scheduled_at,
+        settings.GRIMOIRELAB_JOBS_PER_MINUTE,
+        now=current_time,
+    )
+
+
+def _release_start_slot(task: Task, job: Job) -> None:
+    """Release the start slot of a job that won't run at its time."""
+
+    if not settings.GRIMOIRELAB_JOBS_PER_MINUTE or not job.scheduled_at:
+        return
+
+    release_start_slot(django_rq.get_connection(task.default_job_queue), job.uuid, job.scheduled_at)
+
+
+def _create_job(
+    task: Task, job_uuid: str, job_args: dict[str, Any], scheduled_at: datetime.datetime
+) -> Job:
+    """Create a new job for the task, already set as enqueued.
+
+    The number of the job is taken from the job counter of the
+    task, which is increased atomically together with the new
+    status of the task.
+    """
     _, job_class = get_registered_task_model(task.task_type)
 
-    job = job_class.objects.create(
-        uuid=str(uuid.uuid4()),
-        job_num=job_class.objects.filter(task=task).count() + 1,
+    task.job_count = increase_job_count(
+        task,
+        status=SchedulerStatus.ENQUEUED,
+        scheduled_at=scheduled_at,
+        last_modified=datetime_utcnow(),
+    )
+    task.status = SchedulerStatus.ENQUEUED
+    task.scheduled_at = scheduled_at
+
+    return job_class.objects.create(
+        uuid=job_uuid,
+        job_num=task.job_count,
         job_args=job_args,
-        queue=queue,
+        queue=task.default_job_queue,
+        status=SchedulerStatus.ENQUEUED,
         scheduled_at=scheduled_at,
         task=task,
     )
 
-    _schedule_job(task, job, scheduled_at, job_args)
-
-    return job
-
 
 def _schedule_job(
     task: Task, job: Job, scheduled_at: datetime.datetime, job_args: dict[str, Any]
 ) -> rq.job.Job:
-    """Schedule the job to be executed."""
+    """Schedule the job to be executed.
 
+    RQ stores the job and schedules it using a single pipeline.
+    The status of the job and the task are only written to the
+    database, in a new transaction, when they change. Jobs
+    created by `_create_job` are already enqueued, so this only
+    happens when scheduling the job fails.
+    """
     queue = task.default_job_queue
+    status = (job.status, task.status, job.scheduled_at, task.scheduled_at)
 
     try:
         queue_rq = django_rq.get_queue(queue)
@@ -294,6 +531,7 @@ def _schedule_job(
             on_success=rq.job.Callback(task.on_success_callback),
             on_failure=rq.job.Callback(task.on_failure_callback),
             job_id=job.uuid,
+            meta={"task_uuid": task.uuid},
             **job_args,
         )
 
@@ -312,8 +550,11 @@ def _schedule_job(
         )
         raise ex
     finally:
-        job.save()
-        task.save()
+        if status != (job.status, task.status, job.scheduled_at, task.scheduled_at):
+            fields = ["status", "scheduled_at", "last_modified"]
+            with django.db.transaction.atomic():
+                job.save(update_fields=fields)
+                task.save(update_fields=fields)
 
     logger.info(
         "job scheduled",
@@ -327,6 +568,44 @@ def _schedule_job(
     return rq_job
 
 
+def _first_job_time(task: Task) -> datetime.datetime:
+    """Return when the first job of a task will run.
+
+    Jobs run as soon as possible. When `GRIMOIRELAB_JOB_JITTER`
+    is set, the first job of a recurring task is delayed to the
+    phase of the task by up to that fraction of the interval, so
+    tasks created at the same time don't run at once.
+    """
+    current_time = datetime_utcnow()
+
+    if task.burst:
+        return current_time
+
+    jitter = job_jitter(
+        task.uuid,
+        current_time,
+        task.effective_interval,
+        settings.GRIMOIRELAB_JOB_JITTER,
+        first=True,
+    )
+    return current_time + datetime.timedelta(seconds=jitter)
+
+
+def _next_job_time(task: Task) -> datetime.datetime:
+    """Return when the next job of a recurring task will run.
+
+    Jobs run `effective_interval` seconds after the previous one
+    finished successfully. When `GRIMOIRELAB_JOB_JITTER` is set, the
+    time is moved towards the phase of the task by up to half that
+    fraction of the interval, so tasks keep running apart.
+    """
+    interval = task.effective_interval
+    scheduled_at = datetime_utcnow() + datetime.timedelta(seconds=interval)
+    jitter = job_jitter(task.uuid, scheduled_at, interval, settings.GRIMOIRELAB_JOB_JITTER)
+
+    return scheduled_at + datetime.timedelta(seconds=jitter)
+
+
 def _on_success_callback(
     job: rq.job.Job, connection: redis.Redis, result: Any, *args, **kwargs
 ) -> None:
@@ -348,10 +627,13 @@ def _on_success_callback(
     job_db.save_run(
         SchedulerStatus.COMPLETED,
         progress=result,
-        logs=job.meta.get("log", None),
+        logs=job.job_log,
     )
     task = job_db.task
 
+    # Let the next job of the task run
+    TaskLease(connection, task.uuid, job.id).release()
+
     logger.info("job completed", job_uuid=job_db.uuid, task_uuid=task.uuid)
 
     # Reschedule task
@@ -359,7 +641,8 @@ def _on_success_callback(
         logger.info("task completed", task_uuid=task.uuid, burst=True)
         return
     else:
-        scheduled_at = datetime_utcnow() + datetime.timedelta(seconds=task.job_interval)
+        task.adapt_interval(result)
+        scheduled_at = _next_job_time(task)
         _enqueue_task(task, scheduled_at=scheduled_at)
 
 
@@ -390,10 +673,13 @@ def _on_failure_callback(
     job_db.save_run(
         SchedulerStatus.FAILED,
         progress=job.meta["progress"],
-        logs=job.meta.get("log", None),
+        logs=job.job_log,
     )
     task = job_db.task
 
+    # Let the next job of the task run
+    TaskLease(connection, task.uuid, job.id).release()
+
     logger.error("job failed", job_uuid=job_db.uuid, task_uuid=task.uuid, error=value)
 
     # Define new log to reuse parameters
@@ -408,7 +694,8 @@ def _on_failure_callback(
         return
     else:
         task.status = SchedulerStatus.RECOVERY
-        task.save()
+        task.save(update_fields=["status", "last_modified"])
+        # Retries are not moved by the jitter of the recurring jobs
         scheduled_at = datetime_utcnow() + datetime.timedelta(seconds=task.job_interval)
         _enqueue_task(task, scheduled_at=scheduled_at)
         log.error("task failed; recovered")
@@ -24,6 +24,7 @@ from rest_framework import (
     serializers,
 )
 
+from .jobs import GrimoireLabJob
 from .models import SchedulerStatus
 from .tasks.models import (
     EventizerTask,
@@ -81,6 +82,7 @@ class TaskSerializerMixin(serializers.ModelSerializer):
     task_args = serializers.JSONField(required=True)
     job_max_retries = serializers.IntegerField(required=False)
     job_interval = serializers.IntegerField(required=False)
+    effective_interval = serializers.IntegerField(read_only=True)
     burst = serializers.BooleanField(required=False)
 
     class Meta:
@@ -92,6 +94,7 @@ class TaskSerializerMixin(serializers.ModelSerializer):
             "failures",
             "last_run",
             "job_interval",
+            "effective_interval",
             "scheduled_at",
             "job_max_retries",
             "task_args",
@@ -162,8 +165,12 @@ class JobSerializer(JobSummarySerializer):
 
     def get_progress(self, obj):
         if obj.status == SchedulerStatus.RUNNING:
+            connection = django_rq.get_connection(obj.queue)
+            progress = GrimoireLabJob.fetch_progress(obj.uuid, connection)
+            if progress is not None:
+                return progress
             rq_job = django_rq.get_queue(obj.queue).fetch_job(obj.uuid)
-            if rq_job:
+            if rq_job and rq_job.progress:
                 return rq_job.progress.to_dict()
         return obj.progress
 
@@ -18,9 +18,22 @@
 
 from __future__ import annotations
 
+import copy
+import functools
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import pkgutil
+import time
 import typing
 
+from collections import namedtuple
+
 import cloudevents.conversion
+import django.db
+import redis
 import rq
 import structlog
 
@@ -28,24 +41,81 @@ import perceval.backend
 import perceval.backends
 import chronicler.eventizer
 
+from chronicler.events.core.git import (
+    GIT_EVENT_COMMIT_AUTHORED_BY,
+    GIT_EVENT_COMMIT_COMMITTED_BY,
+    GIT_EVENT_COMMIT_ACKED_BY,
+    GIT_EVENT_COMMIT_CO_AUTHORED_BY,
+    GIT_EVENT_COMMIT_HELPED_BY,
+    GIT_EVENT_COMMIT_MENTORED_BY,
+    GIT_EVENT_COMMIT_REPORTED_BY,
+    GIT_EVENT_COMMIT_REVIEWED_BY,
+    GIT_EVENT_COMMIT_SIGNED_OFF_BY,
+    GIT_EVENT_COMMIT_SUGGESTED_BY,
+    GIT_EVENT_COMMIT_TESTED_BY,
+)
 from grimoirelab_toolkit.datetime import str_to_datetime
 
+from ...consumers.envelope import ENVELOPE_MAX_BYTES, EnvelopeBuilder
+from ...consumers.trimmer import stream_backlog
+from ...scheduler.db import find_job
 from ...scheduler.errors import NotFoundError
 
 if typing.TYPE_CHECKING:
-    from typing import Any
+    from typing import Any, Iterable, Iterator
     from datetime import datetime
+    from cloudevents.http import CloudEvent
 
 
 logger = structlog.get_logger("__name__")
 
 
+IDENTITY_EVENTS = (
+    GIT_EVENT_COMMIT_AUTHORED_BY,
+    GIT_EVENT_COMMIT_COMMITTED_BY,
+    GIT_EVENT_COMMIT_ACKED_BY,
+    GIT_EVENT_COMMIT_CO_AUTHORED_BY,
+    GIT_EVENT_COMMIT_HELPED_BY,
+    GIT_EVENT_COMMIT_MENTORED_BY,
+    GIT_EVENT_COMMIT_REPORTED_BY,
+    GIT_EVENT_COMMIT_REVIEWED_BY,
+    GIT_EVENT_COMMIT_SIGNED_OFF_BY,
+    GIT_EVENT_COMMIT_SUGGESTED_BY,
+    GIT_EVENT_COMMIT_TESTED_BY,
+)
+IDENTITY_FIELDS = ("source", "name", "email", "username")
+
+EVENTS_CHUNK_SIZE = 100
+EVENTS_DEDUP_PREFIX = "grimoirelab:events:published:"
+BACKPRESSURE_CHECK_INTERVAL = 5
+BACKPRESSURE_MAX_WAIT = 30 * 60
+CHECKPOINT_EVENTS = 10000
+CHECKPOINT_INTERVAL = 60
+PUBLISH_MAX_COMMANDS = 500
+PUBLISH_MAX_BYTES = 4 * 1024 * 1024
+PUBLISH_MAX_RETRIES = 5
+PUBLISH_RETRY_BACKOFF = 0.5
+PUBLISH_RETRY_MAX_BACKOFF = 30
+
+
 def chronicler_job(
     datasource_type: str,
     datasource_category: str,
     events_stream: str,
     stream_max_length: int,
     job_args: dict[str, Any] = None,
+    identities_stream: str | None = None,
+    identities_stream_max_length: int | None = None,
+    dedup_window: int | None = None,
+    envelope_size: int | None = None,
+    envelope_max_bytes: int | None = None,
+    compression: str | None = None,
+    high_watermark: int | None = None,
+    low_watermark: int | None = None,
+    backpressure_max_wait: int | None = BACKPRESSURE_MAX_WAIT,
+    groups_idle_timeout: int | None = None,
+    checkpoint_events: int | None = None,
+    checkpoint_interval: int | None = None,
 ) -> ChroniclerProgress:
     """Fetch and eventize data.
 
@@ -66,12 +136,41 @@ def chronicler_job(
     :param stream_max_length: maximum length of the stream
     :param job_args: extra arguments to pass to the job
         (e.g., 'url', 'owner', 'repository')
+    :param identities_stream: Redis queue where a compact version of
+        the identity events will also be published; `None` disables it
+    :param identities_stream_max_length: maximum length of the
+        identities stream
+    :param dedup_window: seconds the ids of the published events
+        are remembered to avoid publishing them again (e.g. when
+        a job is retried); `None` disables it
+    :param envelope_size: maximum number of events packed in a single
+        stream entry (see `grimoirelab.core.consumers.envelope`);
+        `None` publishes one event per entry
+    :param envelope_max_bytes: maximum size in bytes of the events
+        packed in a single entry
+    :param compression: algorithm to compress the envelopes
+        ('zlib' or 'zstd'); `None` doesn't compress them
+    :param high_watermark: number of entries not processed by the
+        consumers of the events stream that pauses the job;
+        `None` disables it
+    :param low_watermark: number of entries not processed by the
+        consumers that resumes a paused job; by default, half of
+        `high_watermark`
+    :param backpressure_max_wait: maximum seconds the job is paused
+        in total; after that, it keeps publishing; `None` waits
+        without limit
+    :param groups_idle_timeout: seconds after which a consumer group
+        without activity is ignored to pause the job; `None` takes
+        into account every group
+    :param checkpoint_events: number of published events between
+        checkpoints of the progress; `None` disables it
+    :param checkpoint_interval: seconds between checkpoints of the
+        progress; `None` disables it
     """
     rq_job = rq.get_current_job()
 
     try:
-        backends = perceval.backend.find_backends(perceval.backends)[0]
-        backend_class = backends[datasource_type]
+        backend_class = _find_backends()[datasource_type]
     except KeyError:
         raise NotFoundError(element=datasource_type)
 
@@ -84,30 +183,587 @@ def chronicler_job(
     progress = ChroniclerProgress(rq_job.id, datasource_type, datasource_category, None)
     rq_job.progress = progress
 
+    dedup = None
+    if dedup_window:
+        scope = f"{datasource_type}:{datasource_category}:{perceval_gen.backend.origin}"
+        dedup = EventDeduplicator(rq_job.connection, scope, dedup_window)
+
+    envelope = None
+    if envelope_size and envelope_size > 1:
+        envelope = EnvelopeBuilder(
+            envelope_size,
+            max_bytes=envelope_max_bytes or ENVELOPE_MAX_BYTES,
+            compression=compression,
+        )
+
+    backpressure = None
+    if high_watermark:
+        backpressure = StreamBackpressure(
+            rq_job.connection,
+            events_stream,
+            high_watermark,
+            low_watermark=low_watermark,
+            max_wait=backpressure_max_wait,
+            idle_timeout=groups_idle_timeout,
+        )
+
+    checkpoint = ProgressCheckpoint(
+        rq_job,
+        progress,
+        events=checkpoint_events,
+        interval=checkpoint_interval,
+    )
+    publisher = EventPublisher(rq_job.connection, dedup=dedup)
+
+    def items() -> Iterator[dict]:
+        # The eventizer requests the next item once all the events
+        # of the previous one were generated. The summary isn't
+        # updated until the next item is fetched.
+        for item in perceval_gen.items:
+            yield item
+            checkpoint.completed(perceval_gen.summary)
+
+    suppressed = 0
+
     # The chronicler generator will eventize the data items
     # that are fetched by the perceval generator.
     try:
-        events = chronicler.eventizer.eventize(datasource_type, perceval_gen.items)
-        pipeline = rq_job.connection.pipeline()
-        for event in events:
-            data = cloudevents.conversion.to_json(event)
-            message = {
-                "data": data,
-            }
-
-            pipeline.xadd(events_stream, message, maxlen=stream_max_length)
-            if len(pipeline.command_stack) > 100:
-                pipeline.execute()
-
-        if len(pipeline.command_stack) > 0:
-            pipeline.execute()
+        events = chronicler.eventizer.eventize(datasource_type, items())
+
+        for chunk in _chunks(events, EVENTS_CHUNK_SIZE):
+            if backpressure and backpressure.wait():
+                progress.blocked_time = backpressure.blocked_time
+                rq_job.progress = progress
+
+            published = dedup.published([event["id"] for event in chunk]) if dedup else set()
+            messages = []
+            new_ids = []
+
+            for event in chunk:
+                if event["id"] in published:
+                    suppressed += 1
+                    continue
+
+                data = cloudevents.conversion.to_json(event)
+
+                if envelope is not None:
+                    envelope.add(event["id"], event["type"], data)
+                    if envelope.is_full:
+                        new_ids.extend(envelope.event_ids)
+                        messages.append((events_stream, envelope.build(), stream_max_length))
+                else:
+                    # Header fields let consumers filter entries
+                    # without decoding the payload of the event
+                    message = {
+                        "id": event["id"],
+                        "type": event["type"],
+                        "source": event["source"],
+                        "data": data,
+                    }
+                    messages.append((events_stream, message, stream_max_length))
+                    new_ids.append(event["id"])
+
+                if identities_stream and event["type"] in IDENTITY_EVENTS:
+                    messages.append(
+                        (identities_stream, _identity_message(event), identities_stream_max_length)
+                    )
 
+            summary = None
+            if checkpoint.due(len(chunk)):
+                # Events waiting in the envelope must be in the
+                # stream before saving the checkpoint.
+                if envelope is not None and len(envelope) > 0:
+                    new_ids.extend(envelope.event_ids)
+                    messages.append((events_stream, envelope.build(), stream_max_length))
+                summary = checkpoint.summary
+
+            # Only events already in the stream are remembered;
+            # those in a partial envelope will be added later.
+            publisher.publish(PublishBatch(messages, new_ids, summary))
+
+            # Checkpoints are saved once their events were published
+            if summary := publisher.checkpoint():
+                progress.suppressed = suppressed
+                checkpoint.save(summary)
+
+        if envelope is not None and len(envelope) > 0:
+            new_ids = envelope.event_ids
+            messages = [(events_stream, envelope.build(), stream_max_length)]
+            publisher.publish(PublishBatch(messages, new_ids, None))
     finally:
         progress.summary = perceval_gen.summary
+        progress.suppressed = suppressed
+        if backpressure:
+            progress.blocked_time = backpressure.blocked_time
 
     return progress
 
 
+def preload_registries():
+    """Load the registries of Perceval backends and eventizers.
+
+    Finding the backends and the eventizers imports all their
+    modules, which is expensive compared to the runtime of small
+    jobs. The registry of backends is resolved once per process
+    and cached, and the modules of the eventizers are imported,
+    so Chronicler finds them without importing them again.
+    Workers that fork a new process for each job should call this
+    function before forking, so jobs inherit the loaded registries.
+    """
+    _find_backends()
+    _import_eventizers()
+
+
+@functools.cache
+def _find_backends() -> dict[str, type[perceval.backend.Backend]]:
+    """Return the Perceval backends by name."""
+
+    return perceval.backend.find_backends(perceval.backends)[0]
+
+
+def _import_eventizers():
+    """Import the modules of the package where Chronicler finds the eventizers."""
+
+    package = importlib.import_module(os.environ.get("CHRONICLER_EVENTIZERS", "chronicler.events"))
+
+    for module in pkgutil.walk_packages(package.__path__, prefix=package.__name__ + "."):
+        importlib.import_module(module.name)
+
+
+def _identity_message(event: CloudEvent) -> dict[str, str]:
+    """Create a stream message with the identity of an event.
+
+    Only the fields needed to store the identity are kept
+    in the payload, so the message is much smaller than the
+    original event.
+    """
+    identity = event.data or {}
+    data = {
+        "id": event["id"],
+        "type": event["type"],
+        "source": event["source"],
+        "data": {field: identity.get(field) for field in IDENTITY_FIELDS},
+    }
+
+    return {
+        "id": event["id"],
+        "type": event["type"],
+        "source": event["source"],
+        "data": json.dumps(data),
+    }
+
+
+class EventDeduplicator:
+    """Remember the events published recently for a scope.
+
+    The ids of the events published for a scope (e.g. a datasource)
+    are stored in Redis sets, one for each period of `window`
+    seconds. Events found in the sets of the current or the previous
+    period are considered published, so an event is remembered
+    between `window` and twice `window` seconds. Event ids that
+    are hexadecimal digests are stored in binary form to save
+    memory.
+
+    :param connection: Redis connection object
+    :param scope: identifier of the group of events
+    :param window: seconds each set stores event ids
+    """
+
+    def __init__(self, connection: redis.Redis, scope: str, window: int):
+        self.connection = connection
+        self.window = window
+        digest = hashlib.sha1(scope.encode("utf-8")).hexdigest()
+        self.prefix = f"{EVENTS_DEDUP_PREFIX}{digest}:"
+
+    def published(self, event_ids: list[str]) -> set[str]:
+        """Return the ids of the events already published."""
+
+        if not event_ids:
+            return set()
+
+        members = [_compact_id(event_id) for event_id in event_ids]
+        current, previous = self._bucket_keys()
+
+        pipeline = self.connection.pipeline(transaction=False)
+        pipeline.smismember(current, members)
+        pipeline.smismember(previous, members)
+        in_current, in_previous = pipeline.execute()
+
+        return {
+            event_id
+            for event_id, cur, prev in zip(event_ids, in_current, in_previous)
+            if cur or prev
+        }
+
+    def add(self, pipeline: redis.client.Pipeline, event_ids: list[str]):
+        """Queue the commands to remember the events in the pipeline."""
+
+        key, _ = self._bucket_keys()
+        pipeline.sadd(key, *[_compact_id(event_id) for event_id in event_ids])
+        pipeline.expire(key, self.window * 2)
+
+    def _bucket_keys(self) -> tuple[str, str]:
+        bucket = int(time.time() // self.window)
+        return f"{self.prefix}{bucket}", f"{self.prefix}{bucket - 1}"
+
+
+class StreamBackpressure:
+    """Pause producers when consumers don't keep up with a stream.
+
+    The backlog of the stream is the number of entries not processed
+    by its slowest consumer group (see `stream_backlog`). When the
+    backlog reaches `high_watermark`, calls to `wait` block until the
+    backlog goes down to `low_watermark`.
+
+    To reduce the load on Redis, the backlog is checked at most once
+    every `check_interval` seconds; meanwhile, the last value is used.
+
+    Abandoned consumer groups would pause the producer forever, so
+    when `idle_timeout` is set, groups without activity in that number
+    of seconds are ignored (see `active_groups`). As a safeguard, once
+    the producer was paused `max_wait` seconds in total, a warning is
+    logged and calls to `wait` don't block anymore.
+
+    :param connection: Redis connection object
+    :param stream_name: name of the stream
+    :param high_watermark: backlog that pauses the producer
+    :param low_watermark: backlog that resumes the producer;
+        by default, half of `high_watermark`
+    :param check_interval: seconds between checks of the backlog
+    :param max_wait: maximum seconds blocked in total; `None` blocks
+        without limit
+    :param idle_timeout: seconds after which a group without activity
+        is ignored; `None` takes into account every group
+    """
+
+    def __init__(
+        self,
+        connection: redis.Redis,
+        stream_name: str,
+        high_watermark: int,
+        low_watermark: int | None = None,
+        check_interval: float = BACKPRESSURE_CHECK_INTERVAL,
+        max_wait: float | None = BACKPRESSURE_MAX_WAIT,
+        idle_timeout: int | None = None,
+    ):
+        if low_watermark is None:
+            low_watermark = high_watermark // 2
+        if low_watermark > high_watermark:
+            raise ValueError("'low_watermark' can't be greater than 'high_watermark'")
+
+        self.connection = connection
+        self.stream_name = stream_name
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.check_interval = check_interval
+        self.max_wait = max_wait
+        self.idle_timeout = idle_timeout
+        self.blocked_time = 0.0
+        self._backlog = 0
+        self._last_check = None
+
+    @property
+    def backlog(self) -> int:
+        """Backlog of the stream, cached for `check_interval` seconds."""
+
+        now = time.monotonic()
+        if self._last_check is None or now - self._last_check >= self.check_interval:
+            self._backlog = stream_backlog(
+                self.connection, self.stream_name, idle_timeout=self.idle_timeout
+            )
+            self._last_check = now
+
+        return self._backlog
+
+    def wait(self) -> float:
+        """Block while the backlog is above the watermarks.
+
+        :returns: seconds the call was blocked
+        """
+        if self._max_wait_reached() or self.backlog < self.high_watermark:
+            return 0.0
+
+        logger.info(
+            "events stream backlog too high; pausing",
+            stream=self.stream_name,
+            backlog=self._backlog,
+            high_watermark=self.high_watermark,
+        )
+
+        start = time.monotonic()
+        while self.backlog > self.low_watermark:
+            if self._max_wait_reached(time.monotonic() - start):
+                break
+            time.sleep(self.check_interval)
+        blocked = time.monotonic() - start
+
+        self.blocked_time += blocked
+
+        if self._max_wait_reached():
+            logger.warning(
+                "events stream backlog still too high; max wait reached, resuming",
+                stream=self.stream_name,
+                backlog=self._backlog,
+                blocked_time=round(self.blocked_time, 2),
+                max_wait=self.max_wait,
+            )
+        else:
+            logger.info(
+                "events stream backlog below low watermark; resuming",
+                stream=self.stream_name,
+                backlog=self._backlog,
+                blocked_time=round(blocked, 2),
+            )
+
+        return blocked
+
+    def _max_wait_reached(self, blocked: float = 0.0) -> bool:
+        if self.max_wait is None:
+            return False
+        return self.blocked_time + blocked >= self.max_wait
+
+
+class ProgressCheckpoint:
+    """Save the progress of a job while it's running.
+
+    The progress of a job is only known when it finishes. If the
+    worker dies, the job would start over. This class stores the
+    progress in the job metadata and in the database every `events`
+    events or every `interval` seconds, so the job can be recovered
+    from the last checkpoint.
+
+    Only the items whose events were all published can be part of
+    a checkpoint. Once the number of events or the interval is
+    reached, a copy of the summary is taken the next time the
+    events of an item were all generated (see `completed`). Then,
+    the checkpoint is `due`: the job publishes the pending events
+    and saves the checkpoint with that copy. The summary is only
+    copied once per checkpoint.
+
+    :param rq_job: job to checkpoint
+    :param progress: progress object of the job
+    :param events: number of events between checkpoints
+    :param interval: seconds between checkpoints
+    """
+
+    def __init__(
+        self,
+        rq_job: rq.job.Job,
+        progress: ChroniclerProgress,
+        events: int | None = CHECKPOINT_EVENTS,
+        interval: int | None = CHECKPOINT_INTERVAL,
+    ):
+        self.rq_job = rq_job
+        self.progress = progress
+        self.events = events
+        self.interval = interval
+        self.summary = None
+        self._requested = False
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+
+    def completed(self, summary: perceval.backend.Summary):
+        """Copy the summary, when requested, once the events of an item were generated."""
+
+        if self._requested:
+            self.summary = _copy_summary(summary)
+            self._requested = False
+
+    def due(self, count: int) -> bool:
+        """Count the events generated and check whether a checkpoint is due."""
+
+        self._pending += count
+
+        if self.summary is None:
+            elapsed = time.monotonic() - self._last_checkpoint
+            self._requested = bool(
+                (self.events and self._pending >= self.events)
+                or (self.interval and elapsed >= self.interval)
+            )
+            return False
+
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+
+        return True
+
+    def save(self, summary: perceval.backend.Summary):
+        """Save the progress in the job metadata and in the database."""
+
+        self.summary = None
+        self.progress.summary = summary
+        self.rq_job.progress = self.progress
+        self.rq_job.save_progress()
+
+        # After long-running tasks, the connection may be closed.
+        django.db.close_old_connections()
+
+        try:
+            job_db = find_job(self.rq_job.id)
+            job_db.progress = self.progress
+            job_db.save(update_fields=["progress"])
+        except NotFoundError:
+            logger.debug("job not found; checkpoint not saved", job_id=self.rq_job.id)
+            return
+        except django.db.Error as exc:
+            logger.warning("unable to save checkpoint", job_id=self.rq_job.id, err=exc)
+            return
+
+        logger.debug("checkpoint saved", job_id=self.rq_job.id, items=summary.total)
+
+
+PublishBatch = namedtuple("PublishBatch", ["messages", "event_ids", "summary"])
+
+
+class EventPublisher:
+    """Publish batches of messages in Redis streams.
+
+    Batches are tuples with the messages to add (a tuple with the
+    stream, the fields and the maximum length of the stream), the
+    ids of the events that will be remembered by `dedup`, and the
+    summary of a checkpoint, if any.
+
+    Messages are sent using non-transactional pipelines. A pipeline
+    is flushed when it reaches `max_commands` commands or when its
+    messages reach `max_bytes` bytes, so large batches don't create
+    huge requests that block the Redis server. The ids of the events
+    are remembered once all the messages of the batch were sent.
+
+    When a pipeline fails because of a transient error (e.g. the
+    connection was lost or timed out), its messages are kept and
+    sent again up to `max_retries` times, waiting between attempts
+    with an exponential backoff. Messages that were already added
+    before the error might be added twice; consumers must tolerate
+    duplicated events.
+
+    The summary of a checkpoint is returned by `checkpoint` once
+    its batch was published.
+
+    :param connection: Redis connection object
+    :param dedup: deduplicator of events
+    :param max_commands: maximum number of commands in a pipeline
+    :param max_bytes: maximum size in bytes of the messages in a pipeline
+    :param max_retries: number of times a failed pipeline is sent again
+    :param retry_backoff: seconds to wait before the first retry
+    """
+
+    def __init__(
+        self,
+        connection: redis.Redis,
+        dedup: EventDeduplicator | None = None,
+        max_commands: int = PUBLISH_MAX_COMMANDS,
+        max_bytes: int = PUBLISH_MAX_BYTES,
+        max_retries: int = PUBLISH_MAX_RETRIES,
+        retry_backoff: float = PUBLISH_RETRY_BACKOFF,
+    ):
+        self.connection = connection
+        self.dedup = dedup
+        self.max_commands = max_commands
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._checkpoint = None
+
+    def publish(self, batch: PublishBatch):
+        """Publish a batch of messages."""
+
+        buffer = []
+        size = 0
+
+        for message in batch.messages:
+            buffer.append(message)
+            size += _message_size(message[1])
+            if len(buffer) >= self.max_commands or size >= self.max_bytes:
+                self._flush(buffer)
+                buffer = []
+                size = 0
+
+        event_ids = batch.event_ids if self.dedup else None
+        if buffer or event_ids:
+            self._flush(buffer, event_ids)
+
+        if batch.summary is not None:
+            self._checkpoint = batch.summary
+
+    def checkpoint(self) -> perceval.backend.Summary | None:
+        """Return the summary of the last checkpoint published, if any."""
+
+        summary, self._checkpoint = self._checkpoint, None
+        return summary
+
+    def _flush(self, messages: list[tuple], event_ids: list[str] | None = None):
+        """Send the messages in a pipeline, retrying on transient errors."""
+
+        attempt = 0
+
+        while True:
+            # Failed pipelines are reset, so commands are added
+            # again on each attempt from the buffered messages.
+            pipeline = self.connection.pipeline(transaction=False)
+            for stream, message, max_length in messages:
+                pipeline.xadd(stream, message, maxlen=max_length)
+            if event_ids:
+                self.dedup.add(pipeline, event_ids)
+
+            try:
+                pipeline.execute()
+                return
+            except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(self.retry_backoff * 2**attempt, PUBLISH_RETRY_MAX_BACKOFF)
+                attempt += 1
+                logger.warning(
+                    "unable to publish events; retrying",
+                    messages=len(messages),
+                    attempt=attempt,
+                    delay=delay,
+                    err=str(exc),
+                )
+                time.sleep(delay)
+
+
+def _copy_summary(summary: perceval.backend.Summary | None) -> perceval.backend.Summary | None:
+    """Copy a summary; only `extras` can be modified in place."""
+
+    if summary is None:
+        return None
+
+    summary = copy.copy(summary)
+    summary.extras = copy.deepcopy(summary.extras)
+
+    return summary
+
+
+def _message_size(message: dict) -> int:
+    """Return the approximate size in bytes of the fields of a message."""
+
+    size = 0
+    for key, value in message.items():
+        if not isinstance(value, (str, bytes)):
+            value = str(value)
+        size += len(key) + len(value)
+
+    return size
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    """Split an iterable into lists of `size` elements."""
+
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _compact_id(event_id: str) -> bytes:
+    """Convert hexadecimal ids to bytes to use less memory."""
+
+    try:
+        return bytes.fromhex(event_id)
+    except ValueError:
+        return event_id.encode("utf-8")
+
+
 class ChroniclerProgress:
     """Class to store the progress of a Chronicler job.
 
@@ -118,6 +774,11 @@ class ChroniclerProgress:
     :param job_id: job identifier
     :param backend: backend used to fetch the items
     :param category: category of the fetched items
+    :param summary: summary of the items fetched
+    :param suppressed: number of events not published because
+        they were published recently
+    :param blocked_time: seconds the job was paused because the
+        consumers didn't keep up with the events stream
     """
 
     def __init__(
@@ -126,11 +787,15 @@ class ChroniclerProgress:
         backend: str,
         category: str,
         summary: perceval.backend.Summary | None = None,
+        suppressed: int = 0,
+        blocked_time: float = 0.0,
     ) -> None:
         self.job_id = job_id
         self.backend = backend
         self.category = category
         self.summary = summary
+        self.suppressed = suppressed
+        self.blocked_time = blocked_time
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> ChroniclerProgress:
@@ -156,7 +821,14 @@ class ChroniclerProgress:
         else:
             summary = None
 
-        return cls(data["job_id"], data["backend"], data["category"], summary=summary)
+        return cls(
+            data["job_id"],
+            data["backend"],
+            data["category"],
+            summary=summary,
+            suppressed=data.get("suppressed", 0),
+            blocked_time=data.get("blocked_time", 0.0),
+        )
 
     def to_dict(self) -> dict[str, str | int]:
         """Convert object to a dict."""
@@ -192,6 +864,8 @@ class ChroniclerProgress:
             "backend": self.backend,
             "category": self.category,
             "summary": summary,
+            "suppressed": self.suppressed,
+            "blocked_time": self.blocked_time,
         }
 
         return result
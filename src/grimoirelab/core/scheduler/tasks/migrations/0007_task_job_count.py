@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+TASK_MODELS = [
+    "AffiliateTask",
+    "EventizerTask",
+    "GenderizeTask",
+    "ImportIdentitiesTask",
+    "RecommendAffiliationsTask",
+    "RecommendGenderTask",
+    "RecommendMatchesTask",
+    "UnifyTask",
+]
+
+
+def count_jobs(apps, schema_editor):
+    for task_name in TASK_MODELS:
+        Task = apps.get_model("tasks", task_name)
+        Job = apps.get_model("tasks", task_name.replace("Task", "Job"))
+
+        jobs = (
+            Job.objects.filter(task=OuterRef("pk"))
+            .order_by()
+            .values("task")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        Task.objects.update(job_count=Coalesce(Subquery(jobs), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tasks", "0006_affiliatetask_genderizetask_importidentitiestask_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="affiliatetask",
+            name="job_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="eventizertask",
+            name="job_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="genderizetask",
+            name="job_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importidentitiestask",
+            name="job_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="recommendaffiliationstask",
+            name="job_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="recommendgendertask",
+            name="job_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="recommendmatchestask",
+            name="job_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="unifytask",
+            name="job_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_jobs, reverse_code=migrations.RunPython.noop),
+    ]
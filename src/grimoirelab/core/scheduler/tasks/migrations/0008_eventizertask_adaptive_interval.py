@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tasks", "0007_task_job_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eventizertask",
+            name="adaptive_interval",
+            field=models.PositiveIntegerField(default=None, null=True),
+        ),
+    ]
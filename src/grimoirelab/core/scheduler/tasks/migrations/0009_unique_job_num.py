@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:04
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+
+
+TASK_MODELS = [
+    "AffiliateTask",
+    "EventizerTask",
+    "GenderizeTask",
+    "ImportIdentitiesTask",
+    "RecommendAffiliationsTask",
+    "RecommendGenderTask",
+    "RecommendMatchesTask",
+    "UnifyTask",
+]
+
+
+def renumber_jobs(apps, schema_editor):
+    """Give new numbers to duplicated jobs and fix the job counters.
+
+    Jobs used to be numbered counting the jobs of the task, so they
+    could share a number when old jobs were removed.
+    """
+    for task_name in TASK_MODELS:
+        Task = apps.get_model("tasks", task_name)
+        Job = apps.get_model("tasks", task_name.replace("Task", "Job"))
+
+        duplicated = (
+            Job.objects.values("task")
+            .annotate(total=Count("pk"), numbers=Count("job_num", distinct=True))
+            .filter(total__gt=models.F("numbers"))
+            .values_list("task", flat=True)
+        )
+        for task_id in list(duplicated):
+            jobs = Job.objects.filter(task_id=task_id)
+            last = jobs.aggregate(last=Max("job_num"))["last"]
+            seen = set()
+            for job in jobs.order_by("job_num", "pk"):
+                if job.job_num in seen:
+                    last += 1
+                    job.job_num = last
+                    job.save(update_fields=["job_num"])
+                else:
+                    seen.add(job.job_num)
+
+        last_job = (
+            Job.objects.filter(task=OuterRef("pk")).order_by("-job_num").values("job_num")[:1]
+        )
+        Task.objects.filter(job_count__lt=Subquery(last_job)).update(job_count=Subquery(last_job))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tasks", "0008_eventizertask_adaptive_interval"),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="affiliatejob",
+            constraint=models.UniqueConstraint(
+                fields=("task", "job_num"), name="unique_affiliatejob_job_num"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="eventizerjob",
+            constraint=models.UniqueConstraint(
+                fields=("task", "job_num"), name="unique_eventizerjob_job_num"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="genderizejob",
+            constraint=models.UniqueConstraint(
+                fields=("task", "job_num"), name="unique_genderizejob_job_num"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="importidentitiesjob",
+            constraint=models.UniqueConstraint(
+                fields=("task", "job_num"), name="unique_importidentitiesjob_job_num"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recommendaffiliationsjob",
+            constraint=models.UniqueConstraint(
+                fields=("task", "job_num"), name="unique_recommendaffiliationsjob_job_num"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recommendgenderjob",
+            constraint=models.UniqueConstraint(
+                fields=("task", "job_num"), name="unique_recommendgenderjob_job_num"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recommendmatchesjob",
+            constraint=models.UniqueConstraint(
+                fields=("task", "job_num"), name="unique_recommendmatchesjob_job_num"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="unifyjob",
+            constraint=models.UniqueConstraint(
+                fields=("task", "job_num"), name="unique_unifyjob_job_num"
+            ),
+        ),
+    ]
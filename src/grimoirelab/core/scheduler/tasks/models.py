@@ -22,7 +22,13 @@ import typing
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import CharField, JSONField, BooleanField, DateTimeField
+from django.db.models import (
+    CharField,
+    JSONField,
+    BooleanField,
+    DateTimeField,
+    PositiveIntegerField,
+)
 
 from sortinghat.core.context import SortingHatContext
 from sortinghat.core.importer.backend import find_import_identities_backends
@@ -42,6 +48,7 @@ from ...scheduler.models import (
     Task,
     register_task_model,
 )
+from ...scheduler.policy import adaptive_interval
 from ...scheduler.scheduler import (
     _on_success_callback,
     _on_failure_callback,
@@ -75,10 +82,15 @@ class EventizerTask(Task):
         (e.g., 'pull_request', 'issue')
     :param job_args: extra arguments to pass to the job
         (e.g., 'url', 'owner', 'repository')
+
+    When `GRIMOIRELAB_ADAPTIVE_INTERVAL` is set, the interval between
+    jobs adapts to the number of items fetched by each job, and it's
+    stored in `adaptive_interval`.
     """
 
     datasource_type = CharField(max_length=MAX_SIZE_CHAR_FIELD)
     datasource_category = CharField(max_length=MAX_SIZE_CHAR_FIELD)
+    adaptive_interval = PositiveIntegerField(null=True, default=None)
 
     TASK_TYPE = "eventizer"
 
@@ -135,6 +147,18 @@ class EventizerTask(Task):
             "datasource_category": self.datasource_category,
             "events_stream": settings.GRIMOIRELAB_EVENTS_STREAM_NAME,
             "stream_max_length": settings.GRIMOIRELAB_EVENTS_STREAM_MAX_LENGTH,
+            "identities_stream": settings.GRIMOIRELAB_IDENTITIES_STREAM_NAME,
+            "identities_stream_max_length": settings.GRIMOIRELAB_IDENTITIES_STREAM_MAX_LENGTH,
+            "dedup_window": settings.GRIMOIRELAB_EVENTS_DEDUP_WINDOW or None,
+            "envelope_size": settings.GRIMOIRELAB_EVENTS_ENVELOPE_SIZE or None,
+            "envelope_max_bytes": settings.GRIMOIRELAB_EVENTS_ENVELOPE_MAX_BYTES,
+            "compression": settings.GRIMOIRELAB_EVENTS_COMPRESSION,
+            "high_watermark": settings.GRIMOIRELAB_EVENTS_STREAM_HIGH_WATERMARK or None,
+            "low_watermark": settings.GRIMOIRELAB_EVENTS_STREAM_LOW_WATERMARK or None,
+            "backpressure_max_wait": settings.GRIMOIRELAB_EVENTS_STREAM_MAX_WAIT or None,
+            "groups_idle_timeout": settings.GRIMOIRELAB_STREAMS_GROUP_IDLE_TIMEOUT or None,
+            "checkpoint_events": settings.GRIMOIRELAB_JOB_CHECKPOINT_EVENTS or None,
+            "checkpoint_interval": settings.GRIMOIRELAB_JOB_CHECKPOINT_INTERVAL or None,
         }
 
         args_gen = get_chronicler_argument_generator(self.datasource_type)
@@ -161,6 +185,10 @@ class EventizerTask(Task):
             job = self.jobs.order_by("-job_num").first()
             if job and job.status == SchedulerStatus.CANCELED:
                 job_args = job.job_args["job_args"]
+                # Resume from the last checkpoint saved by the job
+                if job.progress:
+                    progress = ChroniclerProgress.from_dict(job.progress)
+                    job_args = job_args | args_gen.recovery_args(job_args, progress)
             else:
                 job_args = args_gen.initial_args(self.task_args)
         else:
@@ -173,6 +201,37 @@ class EventizerTask(Task):
     def can_be_retried(self):
         return True
 
+    @property
+    def effective_interval(self) -> int:
+        if settings.GRIMOIRELAB_ADAPTIVE_INTERVAL and self.adaptive_interval:
+            return self.adaptive_interval
+        return self.job_interval
+
+    def adapt_interval(self, result: Any) -> None:
+        """Adapt the interval between jobs to the items fetched by the last one.
+
+        Tasks whose last job fetched nothing wait longer for the next
+        one, and tasks that fetched items run more often. Jobs without
+        a summary of the fetch don't change the interval.
+
+        :param result: progress of the last job of the task.
+        """
+        if not settings.GRIMOIRELAB_ADAPTIVE_INTERVAL:
+            return
+
+        summary = getattr(result, "summary", None)
+        if summary is None:
+            return
+
+        self.adaptive_interval = adaptive_interval(
+            self.effective_interval,
+            summary.fetched,
+            settings.GRIMOIRELAB_ADAPTIVE_INTERVAL_MIN,
+            settings.GRIMOIRELAB_ADAPTIVE_INTERVAL_MAX,
+            settings.GRIMOIRELAB_ADAPTIVE_INTERVAL_FACTOR,
+        )
+        self.save(update_fields=["adaptive_interval"])
+
     @property
     def default_job_queue(self):
         return settings.GRIMOIRELAB_Q_EVENTIZER_JOBS
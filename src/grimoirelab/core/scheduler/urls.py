@@ -41,3 +41,7 @@ tasks_urlpatterns = [
         name="job-logs",
     ),
 ]
+
+scheduler_urlpatterns = [
+    path("maintenance/", api.MaintenanceStatus.as_view(), name="maintenance-status"),
+]
@@ -27,9 +27,13 @@ import structlog
 from grimoirelab_toolkit.datetime import datetime_utcnow
 
 from .db import find_job
+from .errors import NotFoundError
+from .lease import TaskLease, count_discarded_job
 from .models import SchedulerStatus
 
 if typing.TYPE_CHECKING:
+    import rq.queue
+
     from .jobs import GrimoireLabJob
 
 
@@ -43,6 +47,75 @@ class GrimoireLabWorkerMixin:
     jobs, like for example, update Job status on models.
     """
 
+    def perform_job(self, job: GrimoireLabJob, queue: rq.queue.Queue) -> bool:
+        """Run the job when no other job of its task is running.
+
+        Before preparing the execution, the job takes the lease of
+        its task. When another job holds it, the job is discarded:
+        it's removed from Redis and canceled, and the number of
+        discarded jobs is increased.
+
+        The lease is renewed by the process running the job until
+        the job finishes.
+        """
+        lease = self._task_lease(job)
+
+        if not lease:
+            return super().perform_job(job, queue)
+
+        if not lease.acquire():
+            self._discard_job(job, lease)
+            return False
+
+        try:
+            with lease.keep():
+                return super().perform_job(job, queue)
+        finally:
+            lease.release()
+
+    def _task_lease(self, job: GrimoireLabJob) -> TaskLease | None:
+        """Return the lease of the task of the job.
+
+        Jobs enqueued by previous versions don't store the uuid
+        of their task, so it's read from the database once and
+        stored in the metadata of the job.
+        """
+        task_uuid = job.meta.get("task_uuid")
+
+        if not task_uuid:
+            try:
+                task_uuid = find_job(job.id).task.uuid
+            except NotFoundError:
+                return None
+            job.meta["task_uuid"] = task_uuid
+            job.save_meta()
+
+        return TaskLease(self.connection, task_uuid, job.id)
+
+    def _discard_job(self, job: GrimoireLabJob, lease: TaskLease):
+        """Remove a job that didn't get the lease of its task."""
+
+        logger.warning(
+            "job discarded; another job of the task is running",
+            job_uuid=job.id,
+            task_uuid=lease.task_uuid,
+        )
+
+        with self.connection.pipeline() as pipeline:
+            self.cleanup_execution(job, pipeline=pipeline)
+            job.delete(pipeline=pipeline)
+            pipeline.execute()
+
+        count_discarded_job(self.connection)
+
+        try:
+            job_db = find_job(job.id)
+        except NotFoundError:
+            return
+
+        job_db.status = SchedulerStatus.CANCELED
+        job_db.save(update_fields=["status", "last_modified"])
+
     def prepare_job_execution(
         self, job: GrimoireLabJob, remove_from_intermediate_queue: bool = False
     ):
@@ -57,7 +130,7 @@ class GrimoireLabWorkerMixin:
             job_db.status = SchedulerStatus.RUNNING
             job_db.save()
             job_db.task.status = SchedulerStatus.RUNNING
-            job_db.task.save()
+            job_db.task.save(update_fields=["status", "last_modified"])
 
 
 class GrimoireLabWorker(GrimoireLabWorkerMixin, rq.worker.Worker):
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Benchmark of the scheduler enqueuing jobs of tasks.
+
+The benchmark creates `--tasks` eventizer tasks and enqueues
+`--rounds` jobs for each of them, like the scheduler does each
+time a job finishes. The current implementation is compared with
+the previous one, that numbered the jobs counting the jobs of the
+task and saved every field of the job and the task.
+
+Tasks are stored in a temporary SQLite database and jobs are
+enqueued in an in-memory Redis server. Besides the number of jobs
+enqueued per second, it reports the number of SQL statements run
+per job, including those that open and close transactions.
+
+Run it from the root of the repository:
+
+    python -m tests.benchmarks.bench_enqueue_tasks --tasks 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.testing")
+
+import django  # noqa: E402
+
+from django.conf import settings  # noqa: E402
+
+DB_DIR = tempfile.TemporaryDirectory()
+settings.DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(DB_DIR.name, "benchmark.sqlite3"),
+    }
+}
+
+django.setup()
+
+import django_rq  # noqa: E402
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from grimoirelab_toolkit.datetime import datetime_utcnow  # noqa: E402
+
+from grimoirelab.core.scheduler import scheduler  # noqa: E402
+from grimoirelab.core.scheduler.models import (  # noqa: E402
+    SchedulerStatus,
+    get_registered_task_model,
+)
+from grimoirelab.core.scheduler.tasks.models import EventizerTask  # noqa: E402
+
+
+def legacy_enqueue_task(task, scheduled_at=None):
+    """Enqueue a task like the scheduler did before the job counter."""
+
+    if not scheduled_at:
+        scheduled_at = datetime_utcnow()
+
+    job_args = task.prepare_job_parameters()
+    _, job_class = get_registered_task_model(task.task_type)
+
+    job = job_class.objects.create(
+        uuid=str(uuid.uuid4()),
+        job_num=job_class.objects.filter(task=task).count() + 1,
+        job_args=job_args,
+        queue=task.default_job_queue,
+        scheduled_at=scheduled_at,
+        task=task,
+    )
+
+    queue_rq = django_rq.get_queue(task.default_job_queue)
+    queue_rq.enqueue_at(
+        datetime=scheduled_at,
+        f=task.job_function,
+        result_ttl=settings.GRIMOIRELAB_JOB_RESULT_TTL,
+        job_timeout=settings.GRIMOIRELAB_JOB_TIMEOUT,
+        job_id=job.uuid,
+        **job_args,
+    )
+
+    job.status = SchedulerStatus.ENQUEUED
+    task.status = SchedulerStatus.ENQUEUED
+    job.scheduled_at = scheduled_at
+    task.scheduled_at = scheduled_at
+    job.save()
+    task.save()
+
+    return job
+
+
+def create_tasks(total: int) -> list[EventizerTask]:
+    tasks = [
+        EventizerTask(
+            uuid=str(uuid.uuid4()),
+            task_type=EventizerTask.TASK_TYPE,
+            datasource_type="git",
+            datasource_category="commit",
+            task_args={"uri": f"https://example.com/repo-{i}.git"},
+        )
+        for i in range(total)
+    ]
+    return EventizerTask.objects.bulk_create(tasks, batch_size=1000)
+
+
+class QueryCounter:
+    """Count the SQL statements run on the database connection."""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+def run(enqueue, total: int, rounds: int) -> tuple[list[float], int]:
+    """Enqueue `rounds` jobs of each task.
+
+    Returns the seconds of each round and the number of SQL
+    statements run while enqueuing the jobs.
+    """
+    EventizerTask.objects.all().delete()
+    django_rq.get_connection().flushall()
+
+    tasks = create_tasks(total)
+    timings = []
+    counter = QueryCounter()
+
+    with connection.execute_wrapper(counter):
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for task in tasks:
+                enqueue(task)
+            timings.append(time.perf_counter() - start)
+
+    return timings, counter.total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000, help="number of tasks")
+    parser.add_argument("--rounds", type=int, default=3, help="jobs enqueued per task")
+    args = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+
+    results = {}
+    for name, enqueue in (
+        ("legacy", legacy_enqueue_task),
+        ("current", scheduler._enqueue_task),
+    ):
+        timings, queries = run(enqueue, args.tasks, args.rounds)
+        jobs = args.tasks * args.rounds
+        results[name] = sum(timings)
+        rounds = ", ".join(f"{t:.1f}s" for t in timings)
+        print(
+            f"{name:>8}: {results[name]:.1f}s "
+            f"({jobs / results[name]:.0f} jobs/s; {queries / jobs:.1f} queries/job; "
+            f"rounds: {rounds})"
+        )
+
+    print(f" speedup: {results['legacy'] / results['current']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
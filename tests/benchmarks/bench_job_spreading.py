@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Simulation of the jobs started by tasks created at once.
+
+The simulation creates `--tasks` tasks at the same time, like a
+project import does, and schedules their jobs for `--hours` hours.
+Each job runs between 1 and `--max-duration` seconds, and the next
+one is scheduled `--interval` seconds after it finished, with and
+without moving them to the phase of their task by up to `--jitter`
+times the interval.
+
+It reports the maximum number of jobs started in a minute, including
+the first round of jobs, and the average interval between the jobs
+of each task.
+
+Run it from the root of the repository:
+
+    python -m tests.benchmarks.bench_job_spreading --tasks 5000
+"""
+
+import argparse
+import collections
+import datetime
+import random
+import statistics
+import uuid
+
+from grimoirelab.core.scheduler.policy import job_jitter
+
+
+START = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def simulate(tasks: int, interval: int, hours: int, max_duration: int, jitter: float):
+    """Return the jobs started per minute and the average interval of the tasks."""
+
+    rng = random.Random(0)
+    end = START + datetime.timedelta(hours=hours)
+    started = collections.Counter()
+    intervals = []
+
+    for _ in range(tasks):
+        task_uuid = str(uuid.UUID(int=rng.getrandbits(128)))
+        delay = job_jitter(task_uuid, START, interval, jitter, first=True)
+        scheduled_at = START + datetime.timedelta(seconds=delay)
+        runs = []
+
+        while scheduled_at < end:
+            runs.append(scheduled_at)
+            started[int((scheduled_at - START).total_seconds()) // 60] += 1
+
+            finished_at = scheduled_at + datetime.timedelta(seconds=rng.randint(1, max_duration))
+            scheduled_at = finished_at + datetime.timedelta(seconds=interval)
+            delay = job_jitter(task_uuid, scheduled_at, interval, jitter)
+            scheduled_at += datetime.timedelta(seconds=delay)
+
+        if len(runs) > 1:
+            elapsed = (runs[-1] - runs[0]).total_seconds()
+            intervals.append(elapsed / (len(runs) - 1))
+
+    return started, statistics.mean(intervals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000, help="number of tasks")
+    parser.add_argument("--interval", type=int, default=7200, help="seconds between jobs")
+    parser.add_argument("--hours", type=int, default=24, help="hours to simulate")
+    parser.add_argument("--max-duration", type=int, default=300, help="maximum seconds of a job")
+    parser.add_argument("--jitter", type=float, default=0.5, help="fraction of the interval")
+    args = parser.parse_args()
+
+    for name, jitter in (("fixed", 0), ("jitter", args.jitter)):
+        started, mean_interval = simulate(
+            args.tasks, args.interval, args.hours, args.max_duration, jitter
+        )
+        minutes = args.hours * 60
+        print(
+            f"{name:>6}: peak {max(started.values())} jobs/min, "
+            f"mean {sum(started.values()) / minutes:.1f} jobs/min, "
+            f"idle minutes {minutes - len(started)}, "
+            f"mean interval {mean_interval:.0f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Benchmark of the startup overhead of eventizer jobs.
+
+RQ workers run each job in a process forked from the worker. The
+benchmark forks a process that resolves the backend and eventizer
+needed by a job, as `chronicler_job` does, and measures the time it
+takes, with and without preloading the registries in the parent.
+
+Run it from the root of the repository:
+
+    python -m tests.benchmarks.bench_job_startup --runs 20
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.testing")
+
+import django  # noqa: E402
+
+django.setup()
+
+from grimoirelab.core.scheduler.tasks import chronicler  # noqa: E402
+
+
+def resolve_job_classes(datasource_type: str, timings):
+    start = time.perf_counter()
+    chronicler._find_backends()[datasource_type]
+    list(chronicler.chronicler.eventizer.eventize(datasource_type, iter(())))
+    timings.put(time.perf_counter() - start)
+
+
+def run_jobs(context, datasource_type: str, runs: int) -> list[float]:
+    """Run `runs` forked jobs and return the time each one took."""
+
+    timings = context.Queue()
+    for _ in range(runs):
+        process = context.Process(target=resolve_job_classes, args=(datasource_type, timings))
+        process.start()
+        process.join()
+
+    return [timings.get() for _ in range(runs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="number of jobs of each mode")
+    parser.add_argument("--datasource", default="git", help="type of the datasource")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("fork")
+
+    cold = run_jobs(context, args.datasource, args.runs)
+    chronicler.preload_registries()
+    warm = run_jobs(context, args.datasource, args.runs)
+
+    print(f"   cold: {statistics.median(cold) * 1000:.2f} ms/job")
+    print(f"preload: {statistics.median(warm) * 1000:.2f} ms/job")
+
+
+if __name__ == "__main__":
+    main()
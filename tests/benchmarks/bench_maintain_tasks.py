@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Benchmark of the maintenance of scheduled tasks.
+
+The benchmark creates `--tasks` eventizer tasks with a job
+enqueued for the future, and runs a maintenance pass with the
+previous implementation, that checked the tasks one by one, and
+with the current one, both running a full pass and an incremental
+pass.
+
+Tasks are stored in a temporary SQLite database and jobs in an
+in-memory Redis server. Use `--redis-latency` to simulate the
+round trip time to a remote Redis server.
+
+Run it from the root of the repository:
+
+    python -m tests.benchmarks.bench_maintain_tasks --tasks 100000 \\
+        --redis-latency 0.2
+"""
+
+import argparse
+import datetime
+import os
+import tempfile
+import time
+import uuid
+
+from unittest.mock import patch
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.testing")
+
+import django  # noqa: E402
+
+from django.conf import settings  # noqa: E402
+
+DB_DIR = tempfile.TemporaryDirectory()
+settings.DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(DB_DIR.name, "benchmark.sqlite3"),
+    }
+}
+
+django.setup()
+
+import django_rq  # noqa: E402
+import redis.client  # noqa: E402
+import rq.exceptions  # noqa: E402
+import rq.job  # noqa: E402
+
+from django.core.management import call_command  # noqa: E402
+
+from grimoirelab.core.scheduler import scheduler  # noqa: E402
+from grimoirelab.core.scheduler.models import (  # noqa: E402
+    SchedulerStatus,
+    get_registered_task_model,
+)
+from grimoirelab.core.scheduler.tasks.models import EventizerTask  # noqa: E402
+
+
+SCHEDULED_AT = datetime.datetime(2100, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def legacy_maintain_tasks():
+    """Maintain the tasks like the scheduler did before batching the checks."""
+
+    for task in EventizerTask.objects.filter(status__in=scheduler.ACTIVE_STATUS).iterator():
+        job_db = (
+            task.jobs.filter(status__in=scheduler.ACTIVE_STATUS).order_by("-scheduled_at").first()
+        )
+        connection = django_rq.get_connection(task.default_job_queue)
+        try:
+            job_rq = rq.job.Job.fetch(job_db.uuid, connection=connection)
+            job_rq.get_status()
+        except rq.exceptions.NoSuchJobError:
+            pass
+
+
+def create_tasks(total: int):
+    """Create tasks with a job scheduled in the future."""
+
+    tasks = EventizerTask.objects.bulk_create(
+        [
+            EventizerTask(
+                uuid=str(uuid.uuid4()),
+                task_type=EventizerTask.TASK_TYPE,
+                datasource_type="git",
+                datasource_category="commit",
+                task_args={"uri": f"https://example.com/repo-{i}.git"},
+                status=SchedulerStatus.ENQUEUED,
+                scheduled_at=SCHEDULED_AT,
+            )
+            for i in range(total)
+        ],
+        batch_size=1000,
+    )
+    _, job_class = get_registered_task_model(EventizerTask.TASK_TYPE)
+    jobs = job_class.objects.bulk_create(
+        [
+            job_class(
+                uuid=str(uuid.uuid4()),
+                job_num=1,
+                queue=task.default_job_queue,
+                status=SchedulerStatus.ENQUEUED,
+                scheduled_at=SCHEDULED_AT,
+                task=task,
+            )
+            for task in tasks
+        ],
+        batch_size=1000,
+    )
+
+    pipeline = django_rq.get_connection().pipeline(transaction=False)
+    for job in jobs:
+        pipeline.hset(rq.job.Job.key_for(job.uuid), "status", rq.job.JobStatus.SCHEDULED)
+    pipeline.execute()
+
+
+def with_latency(latency: float):
+    """Add a delay to each round trip to the Redis server."""
+
+    execute_command = redis.client.Redis.execute_command
+    execute = redis.client.Pipeline.execute
+
+    def slow_execute_command(self, *args, **kwargs):
+        time.sleep(latency)
+        return execute_command(self, *args, **kwargs)
+
+    def slow_execute(self, *args, **kwargs):
+        time.sleep(latency)
+        return execute(self, *args, **kwargs)
+
+    return (
+        patch.object(redis.client.Redis, "execute_command", slow_execute_command),
+        patch.object(redis.client.Pipeline, "execute", slow_execute),
+    )
+
+
+def measure(maintain) -> float:
+    start = time.perf_counter()
+    maintain()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000, help="number of tasks")
+    parser.add_argument(
+        "--redis-latency", type=float, default=0, help="ms of each round trip to Redis"
+    )
+    args = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+    create_tasks(args.tasks)
+
+    redis_patch, pipeline_patch = with_latency(args.redis_latency / 1000)
+
+    with redis_patch, pipeline_patch:
+        results = {
+            "legacy": measure(legacy_maintain_tasks),
+            "full": measure(lambda: scheduler.maintain_tasks(full=True)),
+            "incremental": measure(scheduler.maintain_tasks),
+        }
+
+    for name, elapsed in results.items():
+        print(f"{name:>11}: {elapsed:.2f}s ({args.tasks / elapsed:.0f} tasks/s)")
+
+    print(f"    speedup: {results['legacy'] / results['full']:.2f}x (full pass)")
+
+
+if __name__ == "__main__":
+    main()
@@ -165,3 +165,52 @@ class TestOpenSearchArchivist(GrimoireLabTestCase):
             index="test_index",
         )
         archivist.ack_entries.assert_called_once_with(["1-0", "3-0"])
+
+    @patch("grimoirelab.core.consumers.archivist.OpenSearch")
+    def test_process_entries_enrich_identities(self, mock_opensearch):
+        """Test whether identities are enriched once per bulk before storing them"""
+
+        mock_client = MagicMock()
+        mock_opensearch.return_value = mock_client
+        mock_client.bulk.return_value = {
+            "items": [
+                {"index": {"status": 201, "_id": "value_1"}},
+                {"index": {"status": 201, "_id": "value_2"}},
+            ],
+            "errors": False,
+        }
+        entries = [
+            Entry(message_id="1-0", event={"id": "value_1"}),
+            Entry(message_id="2-0", event={"id": "value_2"}),
+            Entry(message_id="3-0", event={"id": "value_3"}),
+        ]
+
+        archivist = OpenSearchArchivist(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            url="https://localhost:9200",
+            bulk_size=2,
+            enrich_identities=True,
+        )
+        archivist.ack_entries = MagicMock()
+
+        def enrich(events):
+            for event in events:
+                event["individual"] = "mk"
+
+        with patch.object(archivist.identity_resolver, "enrich", side_effect=enrich) as mock:
+            archivist.process_entries(entries)
+            self.assertEqual(mock.call_count, 2)
+
+        self.assertEqual(mock_client.bulk.call_count, 2)
+        mock_client.bulk.assert_any_call(
+            body=(
+                '{"index" : {"_id" : "value_1" } }\n'
+                '{"id": "value_1", "individual": "mk"}\n'
+                '{"index" : {"_id" : "value_2" } }\n'
+                '{"id": "value_2", "individual": "mk"}\n'
+            ),
+            index="events",
+        )
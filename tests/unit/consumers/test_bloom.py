@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from grimoirelab.core.consumers.bloom import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    """Unit tests for BloomFilter class"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix="grimoirelab_core_")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_create(self):
+        """Test whether the size of the filter depends on the capacity and error rate"""
+
+        bloom = BloomFilter.create(1000, error_rate=0.01)
+
+        self.assertEqual(bloom.num_bits, 9586)
+        self.assertEqual(bloom.num_hashes, 7)
+        self.assertEqual(bloom.num_items, 0)
+
+    def test_add(self):
+        """Test whether added keys are in the filter"""
+
+        bloom = BloomFilter.create(1000)
+
+        keys = [f"key_{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertEqual(bloom.num_items, 1000)
+        for key in keys:
+            self.assertIn(key, bloom)
+
+        false_positives = sum(1 for i in range(1000) if f"other_{i}" in bloom)
+        self.assertLess(false_positives, 30)
+
+    def test_build_and_open(self):
+        """Test whether the filter is stored in a file and opened"""
+
+        path = os.path.join(self.tmp_path, "bloom")
+        keys = [f"key_{i}" for i in range(100)]
+
+        loaded = BloomFilter.build(path, iter(keys), capacity=100)
+        self.assertEqual(loaded, 100)
+        self.assertListEqual(os.listdir(self.tmp_path), ["bloom"])
+
+        bloom = BloomFilter.open(path)
+        try:
+            self.assertEqual(bloom.num_items, 100)
+            for key in keys:
+                self.assertIn(key, bloom)
+            self.assertNotIn("other", bloom)
+        finally:
+            bloom.close()
+
+    def test_open_invalid_file(self):
+        """Test whether an error is raised when the file is not a filter"""
+
+        path = os.path.join(self.tmp_path, "bloom")
+        with open(path, "wb") as fp:
+            fp.write(b"\x00" * 64)
+
+        with self.assertRaisesRegex(ValueError, "is not a Bloom filter file"):
+            BloomFilter.open(path)
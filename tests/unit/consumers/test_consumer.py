@@ -25,6 +25,7 @@ from unittest.mock import MagicMock, patch
 import redis
 
 from grimoirelab.core.consumers.consumer import Consumer, Entry
+from grimoirelab.core.consumers.envelope import unpack_envelope
 
 from ..base import GrimoireLabTestCase
 from ...utils import RedisStream
@@ -42,6 +43,10 @@ class SampleConsumer(Consumer):
             self.ack_entries([entry.message_id])
 
 
+class FilteredConsumer(SampleConsumer):
+    EVENT_TYPES = ("commit",)
+
+
 class TestConsumer(GrimoireLabTestCase):
     """Unit tests for Consumer class"""
 
@@ -163,6 +168,171 @@ class TestConsumer(GrimoireLabTestCase):
         pending = self.conn.xpending("test_stream", "test_group")
         self.assertEqual(pending["pending"], 0)
 
+    def test_filter_event_types(self):
+        """Test whether entries of other types are acknowledged without processing them"""
+
+        stream = RedisStream(self.conn, "test_stream")
+        stream.create_group("test_group")
+        stream.add_entry(
+            event={"id": "1", "type": "commit", "source": "src"}, message_id="1-0", headers=True
+        )
+        stream.add_entry(
+            event={"id": "2", "type": "issue", "source": "src"}, message_id="2-0", headers=True
+        )
+        # Entries without headers are always processed
+        stream.add_entry(event={"id": "3", "type": "issue", "source": "src"}, message_id="3-0")
+
+        consumer = FilteredConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            stream_block_timeout=1000,
+            logging_level="DEBUG",
+        )
+
+        with patch.object(consumer, "_parse_message", wraps=consumer._parse_message) as parser:
+            entries = list(consumer.fetch_new_entries())
+            self.assertEqual(parser.call_count, 2)
+
+        ids = [entry.message_id.decode() for entry in entries]
+        self.assertListEqual(ids, ["1-0", "3-0"])
+
+        # The filtered entry was acknowledged
+        pending = self.conn.xpending_range("test_stream", "test_group", "-", "+", 10)
+        pending_ids = [p["message_id"].decode() for p in pending]
+        self.assertListEqual(pending_ids, ["1-0", "3-0"])
+
+    def test_fetch_envelopes(self):
+        """Test whether envelopes and plain entries are read from the same stream"""
+
+        stream = RedisStream(self.conn, "test_stream")
+        stream.create_group("test_group")
+        stream.add_entry(event={"key": "value_1"}, message_id="1-0")
+        stream.add_envelope(
+            events=[{"id": "2", "key": "value_2"}, {"id": "3", "key": "value_3"}],
+            message_id="2-0",
+            compression="zlib",
+        )
+        stream.add_entry(event={"key": "value_4"}, message_id="3-0")
+
+        consumer = Consumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            stream_block_timeout=1000,
+        )
+        entries = list(consumer.fetch_new_entries())
+
+        ids = [entry.message_id.decode() for entry in entries]
+        self.assertListEqual(ids, ["1-0", "2-0", "2-0", "3-0"])
+
+        values = [entry.event["key"] for entry in entries]
+        self.assertListEqual(values, ["value_1", "value_2", "value_3", "value_4"])
+
+    def test_ack_envelopes(self):
+        """Test whether envelopes are acknowledged when all their entries are"""
+
+        stream = RedisStream(self.conn, "test_stream")
+        stream.create_group("test_group")
+        stream.add_envelope(
+            events=[{"id": "1", "key": "value_1"}, {"id": "2", "key": "value_2"}],
+            message_id="1-0",
+        )
+
+        consumer = Consumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            stream_block_timeout=1000,
+        )
+        entries = list(consumer.fetch_new_entries())
+        self.assertEqual(len(entries), 2)
+
+        consumer.ack_entries([entries[0].message_id])
+        pending = self.conn.xpending("test_stream", "test_group")
+        self.assertEqual(pending["pending"], 1)
+
+        # The envelope is recovered as a whole
+        time.sleep(0.1)
+        entries = list(consumer.recover_stream_entries(recover_idle_time=50))
+        self.assertEqual(len(entries), 2)
+
+        consumer.ack_entries([entry.message_id for entry in entries])
+        pending = self.conn.xpending("test_stream", "test_group")
+        self.assertEqual(pending["pending"], 0)
+
+    def test_filter_envelopes(self):
+        """Test whether envelopes are filtered by the types of their events"""
+
+        stream = RedisStream(self.conn, "test_stream")
+        stream.create_group("test_group")
+        stream.add_envelope(
+            events=[{"id": "1", "type": "issue"}, {"id": "2", "type": "issue"}],
+            message_id="1-0",
+        )
+        stream.add_envelope(
+            events=[{"id": "3", "type": "issue"}, {"id": "4", "type": "commit"}],
+            message_id="2-0",
+        )
+
+        consumer = FilteredConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            stream_block_timeout=1000,
+        )
+
+        with patch(
+            "grimoirelab.core.consumers.consumer.unpack_envelope",
+            wraps=unpack_envelope,
+        ) as unpack:
+            entries = list(consumer.fetch_new_entries())
+            self.assertEqual(unpack.call_count, 1)
+
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].event["id"], "4")
+
+        pending = self.conn.xpending_range("test_stream", "test_group", "-", "+", 10)
+        self.assertListEqual([p["message_id"] for p in pending], [b"2-0"])
+
+        consumer.ack_entries([entries[0].message_id])
+        pending = self.conn.xpending("test_stream", "test_group")
+        self.assertEqual(pending["pending"], 0)
+
+    def test_skip_undecodable_entries(self):
+        """Test whether entries that can't be decoded are skipped and acknowledged"""
+
+        stream = RedisStream(self.conn, "test_stream")
+        stream.create_group("test_group")
+        stream.add_entry(event={"key": "value_1"}, message_id="1-0")
+        self.conn.xadd(
+            "test_stream",
+            {"format": "envelope", "count": 1, "compression": "zlib", "data": b"invalid"},
+            id="2-0",
+        )
+        self.conn.xadd("test_stream", {"data": "{invalid"}, id="3-0")
+        stream.add_entry(event={"key": "value_4"}, message_id="4-0")
+
+        consumer = Consumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            stream_block_timeout=1000,
+        )
+        entries = list(consumer.fetch_new_entries())
+
+        ids = [entry.message_id.decode() for entry in entries]
+        self.assertListEqual(ids, ["1-0", "4-0"])
+
+        pending = self.conn.xpending_range("test_stream", "test_group", "-", "+", 10)
+        pending_ids = [p["message_id"].decode() for p in pending]
+        self.assertListEqual(pending_ids, ["1-0", "4-0"])
+
     def test_stop_consumer(self):
         """Test whether the consumer stops correctly"""
 
@@ -286,3 +456,139 @@ class TestConsumer(GrimoireLabTestCase):
             consumer.logger.error.assert_any_call(
                 "Could not connect to Redis instance: fail 3 Retrying in 4 seconds..."
             )
+
+
+class FailingConsumer(SampleConsumer):
+    """Consumer that doesn't acknowledge some entries"""
+
+    def __init__(self, *args, fail_on=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_on = fail_on or []
+
+    def process_entries(self, entries, recovery=False):
+        for entry in entries:
+            self.entries.append(entry)
+            if entry.event["key"] not in self.fail_on:
+                self.ack_entries([entry.message_id])
+
+
+class TestConsumerCatchUp(GrimoireLabTestCase):
+    """Unit tests for the catch-up mode of the Consumer class"""
+
+    def setUp(self):
+        super().setUp()
+
+        stream = RedisStream(self.conn, "test_stream")
+        stream.create_group("test_group")
+        for i in range(1, 11):
+            stream.add_entry(event={"key": f"value_{i}"}, message_id=f"{i}-0")
+
+    def _group_info(self):
+        return self.conn.xinfo_groups("test_stream")[0]
+
+    def test_catch_up_disabled(self):
+        """Test whether catch-up mode is not run when it's disabled"""
+
+        consumer = SampleConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+        )
+
+        self.assertFalse(consumer.catch_up())
+        self.assertEqual(len(consumer.entries), 0)
+
+    def test_catch_up_under_threshold(self):
+        """Test whether catch-up mode is not run when the lag is small"""
+
+        consumer = SampleConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            catchup_threshold=10,
+        )
+
+        self.assertFalse(consumer.catch_up())
+        self.assertEqual(len(consumer.entries), 0)
+
+    def test_catch_up(self):
+        """Test whether entries are processed and the group position is moved forward"""
+
+        consumer = SampleConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            catchup_threshold=5,
+        )
+
+        with patch("grimoirelab.core.consumers.consumer.CATCHUP_READ_COUNT", 3):
+            self.assertFalse(consumer.catch_up())
+
+        # Catch-up stops once the group is close to the head
+        ids = [entry.message_id.decode() for entry in consumer.entries]
+        self.assertListEqual(ids, ["1-0", "2-0", "3-0", "4-0", "5-0", "6-0"])
+
+        group = self._group_info()
+        self.assertEqual(group["last-delivered-id"], b"6-0")
+        self.assertEqual(group["pending"], 0)
+        self.assertEqual(group["lag"], 4)
+
+        # Remaining entries are read in normal mode
+        consumer.entries = []
+        consumer.start(burst=True)
+
+        ids = [entry.message_id.decode() for entry in consumer.entries]
+        self.assertListEqual(ids, ["7-0", "8-0", "9-0", "10-0"])
+
+    def test_catch_up_entry_not_acked(self):
+        """Test whether catch-up stops before the first entry not acknowledged"""
+
+        consumer = FailingConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            catchup_threshold=1,
+            fail_on=["value_4"],
+        )
+        self.assertFalse(consumer.catch_up())
+
+        self.assertEqual(len(consumer.entries), 10)
+
+        group = self._group_info()
+        self.assertEqual(group["last-delivered-id"], b"3-0")
+        self.assertEqual(group["pending"], 0)
+
+        # The entry is delivered again in normal mode
+        consumer.entries = []
+        consumer.fail_on = []
+        consumer.start(burst=True)
+
+        ids = [entry.message_id.decode() for entry in consumer.entries]
+        self.assertEqual(ids[0], "4-0")
+        self.assertEqual(self._group_info()["pending"], 0)
+
+    def test_catch_up_running_in_other_consumer(self):
+        """Test whether the consumer waits when other consumer is catching up"""
+
+        lock = self.conn.lock("grimoirelab:consumers:catchup:test_stream:test_group", timeout=10)
+        lock.acquire()
+
+        consumer = SampleConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            catchup_threshold=1,
+        )
+
+        with patch("grimoirelab.core.consumers.consumer.CATCHUP_WAIT_TIME", 0):
+            self.assertTrue(consumer.catch_up())
+
+        self.assertEqual(len(consumer.entries), 0)
+        self.assertEqual(self._group_info()["last-delivered-id"], b"0-0")
+
+        lock.release()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import unittest
+import zlib
+
+from unittest.mock import patch
+
+from grimoirelab.core.consumers.envelope import (
+    EnvelopeBuilder,
+    decompress,
+    envelope_types,
+    is_envelope,
+    unpack_envelope,
+)
+
+
+def _encode(message):
+    """Convert a message to the format returned by Redis"""
+
+    return {
+        key.encode(): str(value).encode() if isinstance(value, (str, int)) else value
+        for key, value in message.items()
+    }
+
+
+class TestEnvelopeBuilder(unittest.TestCase):
+    """Unit tests for EnvelopeBuilder class"""
+
+    def test_full_by_events(self):
+        """Test whether the envelope is full when it reaches the number of events"""
+
+        builder = EnvelopeBuilder(max_events=2)
+
+        builder.add("1", "commit", json.dumps({"id": "1"}))
+        self.assertFalse(builder.is_full)
+        builder.add("2", "commit", json.dumps({"id": "2"}))
+        self.assertTrue(builder.is_full)
+        self.assertEqual(len(builder), 2)
+
+    def test_full_by_bytes(self):
+        """Test whether the envelope is full when it reaches the size"""
+
+        builder = EnvelopeBuilder(max_events=100, max_bytes=20)
+
+        builder.add("1", "commit", json.dumps({"id": "1"}))
+        self.assertFalse(builder.is_full)
+        builder.add("2", "commit", json.dumps({"id": "2", "data": "1234567890"}))
+        self.assertTrue(builder.is_full)
+
+    def test_build(self):
+        """Test whether the envelope message is built and a new one is started"""
+
+        builder = EnvelopeBuilder(max_events=10)
+        builder.add("1", "commit", json.dumps({"id": "1", "type": "commit"}))
+        builder.add("2", "issue", json.dumps({"id": "2", "type": "issue"}).encode())
+
+        self.assertListEqual(builder.event_ids, ["1", "2"])
+
+        message = builder.build()
+
+        self.assertEqual(message["format"], "envelope")
+        self.assertEqual(message["count"], 2)
+        self.assertEqual(message["types"], "commit issue")
+        self.assertEqual(message["compression"], "none")
+
+        fields = _encode(message)
+        self.assertTrue(is_envelope(fields))
+        self.assertSetEqual(envelope_types(fields), {"commit", "issue"})
+        self.assertListEqual(
+            unpack_envelope(fields),
+            [{"id": "1", "type": "commit"}, {"id": "2", "type": "issue"}],
+        )
+
+        self.assertEqual(len(builder), 0)
+        self.assertListEqual(builder.event_ids, [])
+
+    def test_zlib_compression(self):
+        """Test whether envelopes are compressed with zlib"""
+
+        builder = EnvelopeBuilder(max_events=10, compression="zlib")
+        builder.add("1", "commit", json.dumps({"id": "1"}))
+
+        message = builder.build()
+        self.assertEqual(message["compression"], "zlib")
+        self.assertEqual(zlib.decompress(message["data"]), b'[{"id": "1"}]')
+        self.assertListEqual(unpack_envelope(_encode(message)), [{"id": "1"}])
+
+    def test_zstd_not_available(self):
+        """Test whether an error is raised when zstandard is not installed"""
+
+        with patch("grimoirelab.core.consumers.envelope.zstandard", None):
+            with self.assertRaisesRegex(ValueError, "'zstandard' package is required"):
+                EnvelopeBuilder(max_events=10, compression="zstd")
+
+    def test_unknown_compression(self):
+        """Test whether an error is raised for unknown algorithms"""
+
+        with self.assertRaisesRegex(ValueError, "Unknown compression algorithm 'lz4'"):
+            EnvelopeBuilder(max_events=10, compression="lz4")
+
+    def test_invalid_data(self):
+        """Test whether an error is raised when the data can't be decompressed"""
+
+        with self.assertRaisesRegex(ValueError, "Invalid zlib data"):
+            decompress(b"invalid", "zlib")
+
+        with self.assertRaisesRegex(ValueError, "Unknown compression algorithm 'lz4'"):
+            decompress(b"invalid", "lz4")
+
+    def test_plain_entry(self):
+        """Test whether plain entries are not envelopes"""
+
+        self.assertFalse(is_envelope({b"data": b"{}"}))
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import time
+
+from grimoirelab.core.consumers.consumer import Consumer, Entry
+from grimoirelab.core.consumers.consumer_pool import ConsumerPool
+from grimoirelab.core.consumers.fanout import FanOutConsumer, FanOutConsumerPool
+
+from ..base import GrimoireLabTestCase
+from ...utils import RedisStream
+
+
+class RecorderConsumer(Consumer):
+    """Consumer that records the entries and acknowledges them"""
+
+    def __init__(self, *args, fail=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail = fail
+        self.entries = []
+        self.recovered = []
+
+    def process_entries(self, entries, recovery=False):
+        for entry in entries:
+            if recovery:
+                self.recovered.append(entry)
+            else:
+                self.entries.append(entry)
+            if not self.fail:
+                self.ack_entries([entry.message_id])
+
+
+class RecorderConsumerPool(ConsumerPool):
+    CONSUMER_CLASS = RecorderConsumer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setup_called = False
+
+    @property
+    def extra_consumer_kwargs(self):
+        return {"fail": False}
+
+    def _setup_consumer_pool(self, burst=False):
+        self.setup_called = True
+
+
+class TestFanOutConsumer(GrimoireLabTestCase):
+    """Unit tests for FanOutConsumer class"""
+
+    def _create_consumer(self, handlers):
+        return FanOutConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            stream_block_timeout=1000,
+            logging_level="DEBUG",
+            handlers=handlers,
+        )
+
+    def _add_entries(self, total):
+        stream = RedisStream(self.conn, "test_stream")
+        stream.create_group("test_group")
+        for i in range(1, total + 1):
+            stream.add_entry(event={"id": f"event_{i}"}, message_id=f"{i}-0")
+
+    def test_initialization(self):
+        """Test whether the handlers are created"""
+
+        consumer = self._create_consumer(
+            {
+                "first": (RecorderConsumer, {}),
+                "second": (RecorderConsumer, {"fail": True}),
+            }
+        )
+
+        self.assertListEqual(list(consumer.handlers.keys()), ["first", "second"])
+
+        handler = consumer.handlers["first"].consumer
+        self.assertIsInstance(handler, RecorderConsumer)
+        self.assertEqual(handler.stream_name, "test_stream")
+        self.assertEqual(handler.consumer_group, "test_group")
+        self.assertEqual(handler.consumer_name, "test_consumer:first")
+        self.assertFalse(handler.fail)
+        self.assertTrue(consumer.handlers["second"].consumer.fail)
+
+    def test_dispatch_to_all_handlers(self):
+        """Test whether every handler receives the entries read once"""
+
+        self._add_entries(5)
+
+        consumer = self._create_consumer(
+            {
+                "first": (RecorderConsumer, {}),
+                "second": (RecorderConsumer, {}),
+            }
+        )
+        consumer.start(burst=True)
+
+        for handler in consumer.handlers.values():
+            ids = [entry.message_id.decode() for entry in handler.consumer.entries]
+            self.assertListEqual(ids, ["1-0", "2-0", "3-0", "4-0", "5-0"])
+            self.assertDictEqual(handler.consumer.entries[0].event, {"id": "event_1"})
+
+        # All the entries were acknowledged
+        pending = self.conn.xpending("test_stream", "test_group")
+        self.assertEqual(pending["pending"], 0)
+
+    def test_ack_when_all_handlers_ack(self):
+        """Test whether entries are not acknowledged until every handler does it"""
+
+        self._add_entries(3)
+
+        consumer = self._create_consumer(
+            {
+                "first": (RecorderConsumer, {}),
+                "second": (RecorderConsumer, {"fail": True}),
+            }
+        )
+        consumer.start(burst=True)
+
+        self.assertEqual(len(consumer.handlers["first"].consumer.entries), 3)
+        self.assertEqual(len(consumer.handlers["second"].consumer.entries), 3)
+
+        pending = self.conn.xpending("test_stream", "test_group")
+        self.assertEqual(pending["pending"], 3)
+
+    def test_recover_only_failed_handlers(self):
+        """Test whether recovered entries are only sent to the handlers that failed"""
+
+        self._add_entries(3)
+
+        consumer = self._create_consumer(
+            {
+                "first": (RecorderConsumer, {}),
+                "second": (RecorderConsumer, {"fail": True}),
+            }
+        )
+        consumer.start(burst=True)
+
+        first = consumer.handlers["first"].consumer
+        second = consumer.handlers["second"].consumer
+        second.fail = False
+
+        time.sleep(0.1)
+        consumer._start_handlers()
+        entries = consumer.recover_stream_entries(recover_idle_time=50)
+        consumer.process_entries(entries, recovery=True)
+        consumer._stop_handlers()
+
+        self.assertEqual(len(first.recovered), 0)
+        self.assertEqual(len(second.recovered), 3)
+
+        pending = self.conn.xpending("test_stream", "test_group")
+        self.assertEqual(pending["pending"], 0)
+
+    def test_recover_unknown_entries(self):
+        """Test whether entries unknown by the consumer are sent to all handlers"""
+
+        self._add_entries(2)
+
+        # Claim the entries with another consumer
+        RedisStream(self.conn, "test_stream").read_group("test_group", "other_consumer", 2)
+        time.sleep(0.1)
+
+        consumer = self._create_consumer(
+            {
+                "first": (RecorderConsumer, {}),
+                "second": (RecorderConsumer, {}),
+            }
+        )
+        consumer._start_handlers()
+        entries = consumer.recover_stream_entries(recover_idle_time=50)
+        consumer.process_entries(entries, recovery=True)
+        consumer._stop_handlers()
+
+        for handler in consumer.handlers.values():
+            self.assertEqual(len(handler.consumer.recovered), 2)
+
+        pending = self.conn.xpending("test_stream", "test_group")
+        self.assertEqual(pending["pending"], 0)
+
+    def test_recover_envelopes(self):
+        """Test whether every entry of a recovered envelope is sent to the failed handlers"""
+
+        stream = RedisStream(self.conn, "test_stream")
+        stream.create_group("test_group")
+        stream.add_envelope(
+            events=[{"id": "event_1"}, {"id": "event_2"}, {"id": "event_3"}],
+            message_id="1-0",
+        )
+
+        consumer = self._create_consumer(
+            {
+                "first": (RecorderConsumer, {}),
+                "second": (RecorderConsumer, {"fail": True}),
+            }
+        )
+        consumer.start(burst=True)
+
+        first = consumer.handlers["first"].consumer
+        second = consumer.handlers["second"].consumer
+        self.assertEqual(len(first.entries), 3)
+        self.assertEqual(len(second.entries), 3)
+
+        pending = self.conn.xpending("test_stream", "test_group")
+        self.assertEqual(pending["pending"], 1)
+
+        second.fail = False
+        time.sleep(0.1)
+        consumer._start_handlers()
+        entries = consumer.recover_stream_entries(recover_idle_time=50)
+        consumer.process_entries(entries, recovery=True)
+        consumer._stop_handlers()
+
+        self.assertEqual(len(first.recovered), 0)
+        self.assertEqual(len(second.recovered), 3)
+
+        pending = self.conn.xpending("test_stream", "test_group")
+        self.assertEqual(pending["pending"], 0)
+
+    def test_evict_claimed_entries(self):
+        """Test whether failed entries claimed by other consumers are not tracked anymore"""
+
+        self._add_entries(3)
+
+        consumer = self._create_consumer(
+            {
+                "first": (RecorderConsumer, {}),
+                "second": (RecorderConsumer, {"fail": True}),
+            }
+        )
+        consumer.start(burst=True)
+        self.assertListEqual(sorted(consumer._tracker.failed()), [b"1-0", b"2-0", b"3-0"])
+
+        # Another consumer claims one entry and a third one is acknowledged
+        self.conn.xclaim("test_stream", "test_group", "other_consumer", 0, ["1-0"])
+        self.conn.xack("test_stream", "test_group", "2-0")
+
+        entries = list(consumer.recover_stream_entries(recover_idle_time=60000))
+
+        self.assertListEqual(entries, [])
+        self.assertListEqual(consumer._tracker.failed(), [b"3-0"])
+        self.assertNotIn(b"1-0", consumer._tracker._pending)
+        self.assertNotIn(b"2-0", consumer._tracker._pending)
+
+    def test_evict_keeps_entries_in_process(self):
+        """Test whether entries still processed by a handler are not evicted"""
+
+        tracker = self._create_consumer(
+            {
+                "first": (RecorderConsumer, {}),
+                "second": (RecorderConsumer, {}),
+            }
+        )._tracker
+
+        tracker.register("1-0", ["first", "second"])
+        tracker.release("second", ["1-0"])
+        self.assertListEqual(tracker.failed(), [])
+
+        tracker.evict(["1-0"])
+        self.assertDictEqual(tracker._pending, {"1-0": {"first": 1}})
+        self.assertDictEqual(tracker._failed, {"1-0": {"second"}})
+
+        tracker.ack("first", ["1-0"])
+        self.assertListEqual(tracker.failed(), ["1-0"])
+
+        tracker.evict(["1-0"])
+        self.assertDictEqual(tracker._pending, {})
+        self.assertDictEqual(tracker._failed, {})
+
+
+class TestFanOutConsumerPool(GrimoireLabTestCase):
+    """Unit tests for FanOutConsumerPool class"""
+
+    def test_handlers_from_pools(self):
+        """Test whether the handlers and their setup are taken from the pools"""
+
+        handler_pool = RecorderConsumerPool(
+            connection=self.conn,
+            stream_name="test_stream",
+            group_name="test_group",
+        )
+        pool = FanOutConsumerPool(
+            handler_pools={"recorder": handler_pool},
+            connection=self.conn,
+            stream_name="test_stream",
+            group_name="test_group",
+            num_consumers=2,
+            handler_batch_size=50,
+        )
+
+        kwargs = pool.extra_consumer_kwargs
+        self.assertDictEqual(kwargs["handlers"], {"recorder": (RecorderConsumer, {"fail": False})})
+        self.assertEqual(kwargs["handler_batch_size"], 50)
+
+        pool._setup_consumer_pool()
+        self.assertTrue(handler_pool.setup_called)
+
+    def test_ack_from_unknown_handler(self):
+        """Test whether acks from handlers that didn't get the entry are ignored"""
+
+        consumer = FanOutConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            handlers={"first": (RecorderConsumer, {})},
+        )
+        consumer.process_entries([Entry(message_id="1-0", event={})])
+
+        consumer._ack_handler_entries("unknown", ["1-0"])
+        self.assertListEqual(consumer._tracker.ack("first", ["1-0"]), ["1-0"])
@@ -16,18 +16,30 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
+import datetime
 import logging
+import os
+import shutil
+import tempfile
 
 from unittest.mock import patch
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
-from chronicler.events.core.git import GIT_EVENT_COMMIT_COMMITTED_BY
-from grimoirelab.core.consumers.identities import SortingHatConsumer, GIT_EVENT_COMMIT_AUTHORED_BY
+from chronicler.events.core.git import GIT_EVENT_COMMIT_AUTHORED_BY, GIT_EVENT_COMMIT_COMMITTED_BY
+from grimoirelab.core.consumers.identities import (
+    IdentityCache,
+    IdentityResolver,
+    SortingHatConsumer,
+    SortingHatConsumerPool,
+)
 from grimoirelab.core.consumers.consumer import Entry
 
-from sortinghat.core.models import Individual
+from sortinghat.core.api import add_identity, add_organization, enroll
+from sortinghat.core.context import SortingHatContext
+from sortinghat.core.models import Identity, Individual, Operation, Profile
+from sortinghat.utils import generate_uuid
 
 from ..base import GrimoireLabTestCase
 
@@ -158,3 +170,391 @@ class TestSortingHatConsumer(GrimoireLabTestCase):
         self.assertEqual(identity.name, None)
         self.assertEqual(identity.source, "git")
         self.assertEqual(identity.uuid, "e0fd947fca0d7949939ea4e911e9e3817f762181")
+
+    def test_identities_cached(self):
+        """Test whether identities stored by other consumers are not stored again"""
+
+        entry = Entry(
+            message_id="1-0",
+            event={
+                "id": "event_1",
+                "type": GIT_EVENT_COMMIT_AUTHORED_BY,
+                "data": {
+                    "source": "git",
+                    "username": "johndoe",
+                    "email": "johndoe@example.com",
+                    "name": None,
+                },
+            },
+        )
+
+        consumers = [
+            SortingHatConsumer(
+                connection=self.conn,
+                stream_name="test_stream",
+                consumer_group="test_group",
+                consumer_name=f"test_consumer_{i}",
+            )
+            for i in range(2)
+        ]
+
+        with patch.object(SortingHatConsumer, "_add_identities") as mock_add:
+            consumers[0].process_entries([entry])
+            consumers[1].process_entries([entry])
+            consumers[1].process_entries([entry])
+
+            self.assertEqual(mock_add.call_count, 1)
+
+        self.assertEqual(consumers[0].identity_cache.misses, 1)
+        self.assertEqual(consumers[1].identity_cache.hits, 2)
+
+    def _identity_entry(self, message_id, username):
+        return Entry(
+            message_id=message_id,
+            event={
+                "id": f"event_{message_id}",
+                "type": GIT_EVENT_COMMIT_AUTHORED_BY,
+                "data": {
+                    "source": "git",
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "name": None,
+                },
+            },
+        )
+
+    def test_process_entries_batch(self):
+        """Test whether identities are deduplicated and stored in a batch"""
+
+        entries = [
+            self._identity_entry("1-0", "johndoe"),
+            self._identity_entry("2-0", "janedoe"),
+            self._identity_entry("3-0", "johndoe"),
+            self._identity_entry("4-0", "JohnDoe"),
+            Entry(message_id="5-0", event={"id": "event_5", "type": "commit"}),
+        ]
+
+        consumer = SortingHatConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+        )
+
+        with patch.object(consumer, "ack_entries") as mock_ack:
+            consumer.process_entries(entries)
+            mock_ack.assert_called_once_with(["5-0", "1-0", "3-0", "4-0", "2-0"])
+
+        self.assertEqual(Identity.objects.count(), 2)
+
+        # Identities that already exist in the database are not stored again
+        consumer.identity_cache = IdentityCache(self.conn, prefix="other:")
+
+        with patch.object(consumer, "_add_identities") as mock_add:
+            consumer.process_entries(entries + [self._identity_entry("6-0", "jsmith")])
+            self.assertEqual(mock_add.call_count, 1)
+
+            identities = mock_add.call_args.args[0]
+            self.assertListEqual([i["username"] for i in identities.values()], ["jsmith"])
+
+    def test_process_entries_batch_error(self):
+        """Test whether identities are stored one by one when the batch fails"""
+
+        entries = [
+            self._identity_entry("1-0", "johndoe"),
+            self._identity_entry("2-0", "janedoe"),
+            self._identity_entry("3-0", "jsmith"),
+        ]
+
+        consumer = SortingHatConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+        )
+
+        def fail_on_janedoe(*args, **kwargs):
+            if kwargs["username"] == "janedoe":
+                raise RuntimeError("database error")
+            return add_identity(*args, **kwargs)
+
+        with (
+            patch.object(consumer, "_add_identities", side_effect=RuntimeError("database error")),
+            patch(
+                "grimoirelab.core.consumers.identities.add_identity", side_effect=fail_on_janedoe
+            ),
+            patch.object(consumer, "ack_entries") as mock_ack,
+        ):
+            consumer.process_entries(entries)
+            mock_ack.assert_called_once_with(["1-0", "3-0"])
+
+        usernames = Identity.objects.values_list("username", flat=True).order_by("username")
+        self.assertListEqual(list(usernames), ["johndoe", "jsmith"])
+
+    def test_store_identities_queries(self):
+        """Test whether the number of queries doesn't depend on the new identities"""
+
+        consumer = SortingHatConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+        )
+
+        for size in (1, 10):
+            identities = {}
+            for i in range(size):
+                identity = {
+                    "source": "git",
+                    "username": f"user_{size}_{i}",
+                    "email": f"user_{size}_{i}@example.com",
+                    "name": None,
+                }
+                identities[generate_uuid(**identity)] = identity
+
+            # Check existing identities, savepoint, open the SortingHat
+            # transaction, insert individuals, profiles, identities and
+            # operations, close the transaction and release the savepoint
+            with self.assertNumQueries(9):
+                stored = consumer.store_identities(identities)
+
+            self.assertSetEqual(stored, set(identities))
+
+        self.assertEqual(Identity.objects.count(), 11)
+        self.assertEqual(Profile.objects.count(), 11)
+
+        individual = Individual.objects.get(mk=generate_uuid(**identity))
+        self.assertEqual(individual.profile.name, "user_10_9")
+        self.assertEqual(individual.profile.email, "user_10_9@example.com")
+        self.assertEqual(individual.identities.get().username, "user_10_9")
+
+        operations = Operation.objects.filter(target=individual.mk)
+        self.assertEqual(operations.count(), 3)
+
+    def test_process_entries_bloom_filter(self):
+        """Test whether identities not in the Bloom filter are not checked in the database"""
+
+        system_ctx = SortingHatContext(user=self.system_user, job_id=None, tenant="default")
+        add_identity(system_ctx, source="git", email="johndoe@example.com", username="johndoe")
+
+        tmp_path = tempfile.mkdtemp(prefix="grimoirelab_core_")
+        self.addCleanup(shutil.rmtree, tmp_path)
+        bloom_path = os.path.join(tmp_path, "identities.bloom")
+
+        pool = SortingHatConsumerPool(
+            connection=self.conn,
+            stream_name="test_stream",
+            group_name="test_group",
+            identities_bloom_filter=bloom_path,
+        )
+        pool._setup_consumer_pool()
+
+        consumer = SortingHatConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            **pool.extra_consumer_kwargs,
+        )
+        self.assertEqual(consumer.bloom_filter.num_items, 1)
+
+        entries = [
+            self._identity_entry("1-0", "johndoe"),
+            self._identity_entry("2-0", "janedoe"),
+        ]
+
+        with (
+            patch.object(Identity.objects, "filter", wraps=Identity.objects.filter) as mock_filter,
+            patch.object(consumer, "_add_identities") as mock_add,
+        ):
+            consumer.process_entries(entries)
+
+            # Only the identity in the filter is checked
+            uuids = mock_filter.call_args.kwargs["uuid__in"]
+            self.assertListEqual(uuids, ["e0fd947fca0d7949939ea4e911e9e3817f762181"])
+
+            self.assertEqual(mock_add.call_count, 1)
+            identities = mock_add.call_args.args[0]
+            self.assertListEqual([i["username"] for i in identities.values()], ["janedoe"])
+
+        consumer.bloom_filter.close()
+
+    def test_missing_bloom_filter(self):
+        """Test whether the consumer works when the Bloom filter file does not exist"""
+
+        consumer = SortingHatConsumer(
+            connection=self.conn,
+            stream_name="test_stream",
+            consumer_group="test_group",
+            consumer_name="test_consumer",
+            identities_bloom_filter="/tmp/grimoirelab_core_not_found.bloom",
+        )
+        self.assertIsNone(consumer.bloom_filter)
+
+
+class TestIdentityResolver(GrimoireLabTestCase):
+    """Unit tests for IdentityResolver class"""
+
+    def setUp(self):
+        super().setUp()
+
+        system_user, _ = get_user_model().objects.get_or_create(username=settings.SYSTEM_BOT_USER)
+        ctx = SortingHatContext(user=system_user, job_id=None, tenant="default")
+
+        identity = add_identity(ctx, source="git", email="jsmith@example.com", name="John Smith")
+        self.identity_uuid = identity.uuid
+        self.individual_uuid = identity.individual.mk
+
+        add_organization(ctx, "Example")
+        add_organization(ctx, "Bitergia")
+        enroll(
+            ctx,
+            self.individual_uuid,
+            "Example",
+            from_date=datetime.datetime(2010, 1, 1, tzinfo=datetime.timezone.utc),
+            to_date=datetime.datetime(2015, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        enroll(
+            ctx,
+            self.individual_uuid,
+            "Bitergia",
+            from_date=datetime.datetime(2015, 1, 1, tzinfo=datetime.timezone.utc),
+            to_date=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+
+    def _event(self, event_id, email, time):
+        return {
+            "id": event_id,
+            "type": GIT_EVENT_COMMIT_AUTHORED_BY,
+            "time": time,
+            "data": {
+                "source": "git",
+                "username": None,
+                "email": email,
+                "name": "John Smith",
+            },
+        }
+
+    def test_enrich(self):
+        """Test whether identity events are enriched with individuals and organizations"""
+
+        events = [
+            self._event("1", "jsmith@example.com", "2012-01-01T00:00:00+00:00"),
+            self._event("2", "jsmith@example.com", "2018-01-01T00:00:00+00:00"),
+            self._event("3", "jsmith@example.com", "2022-01-01T00:00:00+00:00"),
+            self._event("4", "unknown@example.com", "2012-01-01T00:00:00+00:00"),
+            {"id": "5", "type": "commit", "data": {"email": "jsmith@example.com"}},
+        ]
+
+        resolver = IdentityResolver()
+        resolver.enrich(events)
+
+        self.assertEqual(events[0]["data"]["individual_uuid"], self.individual_uuid)
+        self.assertEqual(events[0]["data"]["organization"], "Example")
+        self.assertEqual(events[1]["data"]["individual_uuid"], self.individual_uuid)
+        self.assertEqual(events[1]["data"]["organization"], "Bitergia")
+        self.assertEqual(events[2]["data"]["individual_uuid"], self.individual_uuid)
+        self.assertIsNone(events[2]["data"]["organization"])
+        self.assertNotIn("individual_uuid", events[3]["data"])
+        self.assertNotIn("individual_uuid", events[4]["data"])
+
+    def test_resolve_cache(self):
+        """Test whether identities are resolved in bulk and cached"""
+
+        resolver = IdentityResolver()
+        uuids = [self.identity_uuid, "unknown"]
+
+        with self.assertNumQueries(2):
+            resolved = resolver.resolve(uuids)
+
+        self.assertEqual(resolved[self.identity_uuid][0], self.individual_uuid)
+        self.assertEqual(len(resolved[self.identity_uuid][1]), 2)
+        self.assertIsNone(resolved["unknown"])
+
+        with self.assertNumQueries(0):
+            self.assertDictEqual(resolver.resolve(uuids), resolved)
+
+        self.assertEqual(resolver.hits, 2)
+        self.assertEqual(resolver.misses, 2)
+
+    def test_resolve_expired(self):
+        """Test whether identities are resolved again when they expire"""
+
+        resolver = IdentityResolver(ttl=10)
+
+        with patch("grimoirelab.core.consumers.identities.time.monotonic", return_value=100):
+            resolver.resolve([self.identity_uuid])
+
+        with (
+            patch("grimoirelab.core.consumers.identities.time.monotonic", return_value=111),
+            self.assertNumQueries(2),
+        ):
+            resolver.resolve([self.identity_uuid])
+
+        self.assertEqual(resolver.misses, 2)
+
+
+class TestIdentityCache(GrimoireLabTestCase):
+    """Unit tests for IdentityCache class"""
+
+    def test_lookup(self):
+        """Test whether it returns the identities already seen"""
+
+        cache = IdentityCache(self.conn)
+
+        self.assertSetEqual(cache.lookup(["a", "b"]), set())
+        cache.add(["a"])
+        self.assertSetEqual(cache.lookup(["a", "b"]), {"a"})
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 3)
+
+    def test_shared_cache(self):
+        """Test whether identities are shared between caches"""
+
+        cache = IdentityCache(self.conn)
+        cache.add(["a", "b"])
+
+        other = IdentityCache(self.conn)
+        self.assertSetEqual(other.lookup(["a", "b", "c"]), {"a", "b"})
+
+    def test_local_size(self):
+        """Test whether the local cache removes the least recently used identities"""
+
+        cache = IdentityCache(self.conn, size=2)
+        cache.add(["a", "b"])
+        cache.lookup(["a"])
+        cache.add(["c"])
+
+        self.assertListEqual(list(cache._local), ["a", "c"])
+
+        # Identities are still in Redis
+        self.assertSetEqual(cache.lookup(["b"]), {"b"})
+
+    def test_expiration(self):
+        """Test whether identities are forgotten after two periods"""
+
+        cache = IdentityCache(self.conn, ttl=10)
+
+        with patch("grimoirelab.core.consumers.identities.time.time", return_value=100):
+            cache.add(["a", "b"])
+
+        other = IdentityCache(self.conn, ttl=10)
+
+        # Identities seen in the previous period are kept
+        with patch("grimoirelab.core.consumers.identities.time.time", return_value=110):
+            self.assertSetEqual(other.lookup(["a"]), {"a"})
+
+        other = IdentityCache(self.conn, ttl=10)
+
+        with patch("grimoirelab.core.consumers.identities.time.time", return_value=120):
+            self.assertSetEqual(other.lookup(["a", "b"]), {"a"})
+
+    def test_keys_expire(self):
+        """Test whether Redis sets expire after two periods"""
+
+        cache = IdentityCache(self.conn, ttl=10)
+        cache.add(["a"])
+
+        key, _ = cache._bucket_keys()
+        self.assertEqual(self.conn.ttl(key), 20)
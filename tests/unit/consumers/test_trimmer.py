@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from unittest.mock import patch
+
+from grimoirelab.core.consumers.trimmer import StreamTrimmer, stream_backlog
+
+from ..base import GrimoireLabTestCase
+from ...utils import RedisStream
+
+
+class TestStreamTrimmer(GrimoireLabTestCase):
+    """Unit tests for StreamTrimmer class"""
+
+    def setUp(self):
+        super().setUp()
+        self.stream = RedisStream(self.conn, "test_stream")
+        for i in range(1, 11):
+            self.stream.add_entry(event={"id": f"event_{i}"}, message_id=f"{i}-0")
+
+    def _trimmer(self, **kwargs):
+        return StreamTrimmer(self.conn, "test_stream", approximate=False, **kwargs)
+
+    def test_no_groups(self):
+        """Test whether streams without groups are not trimmed"""
+
+        result = self._trimmer().trim()
+
+        self.assertIsNone(result)
+        self.assertEqual(self.conn.xlen("test_stream"), 10)
+
+    def test_no_stream(self):
+        """Test whether it does nothing when the stream doesn't exist"""
+
+        trimmer = StreamTrimmer(self.conn, "unknown_stream")
+        self.assertIsNone(trimmer.trim())
+
+    def test_trim_acknowledged(self):
+        """Test whether entries delivered and acknowledged are trimmed"""
+
+        self.stream.create_group("test_group")
+        self.stream.read_group("test_group", "consumer", 4)
+        self.conn.xack("test_stream", "test_group", "1-0", "2-0", "3-0", "4-0")
+
+        result = self._trimmer().trim()
+
+        self.assertEqual(result.min_id, "4-1")
+        self.assertEqual(result.trimmed, 4)
+        self.assertEqual(result.unconsumed, 6)
+
+        entries = self.conn.xrange("test_stream")
+        self.assertEqual(entries[0][0], b"5-0")
+
+    def test_keep_pending(self):
+        """Test whether entries pending of acknowledgement are not trimmed"""
+
+        self.stream.create_group("test_group")
+        self.stream.read_group("test_group", "consumer", 6)
+        self.conn.xack("test_stream", "test_group", "1-0", "2-0", "4-0")
+
+        result = self._trimmer().trim()
+
+        self.assertEqual(result.min_id, "3-0")
+        self.assertEqual(result.trimmed, 2)
+        self.assertEqual(result.unconsumed, 7)
+
+    def test_slowest_group(self):
+        """Test whether the slowest group sets where the stream is trimmed"""
+
+        self.stream.create_group("fast_group")
+        self.stream.read_group("fast_group", "consumer", 10)
+        self.conn.xack("test_stream", "fast_group", *[f"{i}-0" for i in range(1, 11)])
+
+        self.stream.create_group("slow_group")
+        self.stream.read_group("slow_group", "consumer", 2)
+        self.conn.xack("test_stream", "slow_group", "1-0", "2-0")
+
+        result = self._trimmer().trim()
+
+        self.assertEqual(result.min_id, "2-1")
+        self.assertEqual(result.trimmed, 2)
+        self.assertEqual(result.unconsumed, 8)
+        self.assertEqual(self.conn.xlen("test_stream"), 8)
+
+    def test_new_group(self):
+        """Test whether nothing is trimmed when a group didn't read the stream"""
+
+        self.stream.create_group("test_group")
+
+        result = self._trimmer().trim()
+
+        self.assertEqual(result.min_id, "0-1")
+        self.assertEqual(result.trimmed, 0)
+        self.assertEqual(self.conn.xlen("test_stream"), 10)
+
+    @patch("grimoirelab.core.consumers.trimmer.logger")
+    def test_alert_max_length(self, mock_logger):
+        """Test whether an alert is logged when unconsumed entries reach the limit"""
+
+        self.stream.create_group("test_group")
+
+        self._trimmer(max_length=100).trim()
+        mock_logger.warning.assert_not_called()
+        mock_logger.error.assert_not_called()
+
+        self._trimmer(max_length=12).trim()
+        mock_logger.warning.assert_called_once()
+        mock_logger.error.assert_not_called()
+
+        self._trimmer(max_length=10).trim()
+        mock_logger.error.assert_called_once()
+
+    def test_ignore_abandoned_groups(self):
+        """Test whether groups without active consumers don't stop the trimming"""
+
+        self.stream.create_group("active_group")
+        self.stream.read_group("active_group", "consumer", 6)
+        self.conn.xack("test_stream", "active_group", *[f"{i}-0" for i in range(1, 7)])
+
+        # Group without consumers and group whose consumer is idle
+        self.stream.create_group("empty_group")
+        self.stream.create_group("idle_group")
+        self.stream.read_group("idle_group", "consumer", 1)
+
+        result = self._trimmer(idle_timeout=3600).trim()
+        self.assertEqual(result.min_id, "1-0")
+        self.assertEqual(result.trimmed, 0)
+
+        consumers = [{"name": b"consumer", "pending": 1, "idle": 7200 * 1000}]
+        xinfo_consumers = self.conn.xinfo_consumers
+
+        def idle_consumers(stream, group):
+            if group == b"idle_group":
+                return consumers
+            return xinfo_consumers(stream, group)
+
+        with patch.object(self.conn, "xinfo_consumers", side_effect=idle_consumers):
+            result = self._trimmer(idle_timeout=3600, max_length=5).trim()
+
+        self.assertEqual(result.min_id, "6-1")
+        self.assertEqual(result.trimmed, 6)
+        self.assertEqual(result.unconsumed, 4)
+        self.assertEqual(self.conn.xlen("test_stream"), 4)
+
+    def test_all_groups_abandoned(self):
+        """Test whether the stream is not trimmed when all the groups are abandoned"""
+
+        self.stream.create_group("test_group")
+
+        result = self._trimmer(idle_timeout=3600).trim()
+
+        self.assertIsNone(result)
+        self.assertEqual(self.conn.xlen("test_stream"), 10)
+
+
+class TestStreamBacklog(GrimoireLabTestCase):
+    """Unit tests for stream_backlog function"""
+
+    def test_backlog(self):
+        """Test whether it returns the entries not processed by the slowest group"""
+
+        stream = RedisStream(self.conn, "test_stream")
+        for i in range(1, 11):
+            stream.add_entry(event={"id": f"event_{i}"}, message_id=f"{i}-0")
+
+        # Without groups, the length of the stream is returned
+        self.assertEqual(stream_backlog(self.conn, "test_stream"), 10)
+
+        stream.create_group("fast_group")
+        stream.read_group("fast_group", "consumer", 8)
+        self.conn.xack("test_stream", "fast_group", *[f"{i}-0" for i in range(1, 9)])
+
+        stream.create_group("slow_group")
+        stream.read_group("slow_group", "consumer", 5)
+        self.conn.xack("test_stream", "slow_group", "1-0", "2-0")
+
+        self.assertEqual(stream_backlog(self.conn, "test_stream"), 8)
+
+    def test_backlog_abandoned_groups(self):
+        """Test whether groups without active consumers are ignored"""
+
+        stream = RedisStream(self.conn, "test_stream")
+        for i in range(1, 11):
+            stream.add_entry(event={"id": f"event_{i}"}, message_id=f"{i}-0")
+
+        stream.create_group("active_group")
+        stream.read_group("active_group", "consumer", 8)
+        self.conn.xack("test_stream", "active_group", *[f"{i}-0" for i in range(1, 9)])
+
+        stream.create_group("abandoned_group")
+
+        self.assertEqual(stream_backlog(self.conn, "test_stream"), 10)
+        self.assertEqual(stream_backlog(self.conn, "test_stream", idle_timeout=3600), 2)
+
+        self.conn.xgroup_destroy("test_stream", "active_group")
+        self.assertEqual(stream_backlog(self.conn, "test_stream", idle_timeout=3600), 0)
+
+    def test_no_stream(self):
+        """Test whether the backlog of a stream that doesn't exist is zero"""
+
+        self.assertEqual(stream_backlog(self.conn, "unknown_stream"), 0)
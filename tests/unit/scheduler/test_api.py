@@ -18,12 +18,17 @@
 
 from unittest.mock import patch
 
+import django_rq
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from grimoirelab.core.scheduler.leader import MAINTENANCE_LEADER_KEY
+from grimoirelab.core.scheduler.lease import count_discarded_job, discarded_jobs
 from grimoirelab.core.scheduler.models import (
     SchedulerStatus,
     get_all_registered_task_names,
@@ -736,6 +741,28 @@ class RetrieveDestroyTaskApiTest(APITestCase):
         self.assertEqual(response.data["uuid"], task.uuid)
         self.assertEqual(response.data["datasource_type"], "git")
         self.assertEqual(response.data["datasource_category"], "commit")
+        self.assertEqual(response.data["job_interval"], 3600)
+        self.assertEqual(response.data["effective_interval"], 3600)
+
+    @override_settings(GRIMOIRELAB_ADAPTIVE_INTERVAL=True)
+    def test_get_eventizer_task_adaptive_interval(self):
+        """Test whether the adapted interval of an eventizer task is returned"""
+
+        task = EventizerTask.create_task(
+            task_args={"uri": "https://github.com/example/repo.git"},
+            job_interval=3600,
+            job_max_retries=3,
+            datasource_type="git",
+            datasource_category="commit",
+        )
+        task.adaptive_interval = 14400
+        task.save()
+
+        url = reverse("task-detail", kwargs={"task_type": "eventizer", "uuid": task.uuid})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["job_interval"], 3600)
+        self.assertEqual(response.data["effective_interval"], 14400)
 
     def test_get_affiliate_task(self):
         """Test retrieving an affiliate task"""
@@ -1117,3 +1144,56 @@ class JobLogsApiTest(APITestCase):
         )
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class MaintenanceStatusApiTest(APITestCase):
+    """Unit tests for the Maintenance Status API"""
+
+    def setUp(self):
+        user = get_user_model().objects.create(username="test", is_superuser=True)
+        self.client.force_authenticate(user=user)
+
+        self.conn = django_rq.get_connection()
+        self.conn.delete(MAINTENANCE_LEADER_KEY)
+        self.addCleanup(self.conn.delete, MAINTENANCE_LEADER_KEY)
+
+    def test_leader(self):
+        """Test whether it returns the identity of the leader"""
+
+        self.conn.set(MAINTENANCE_LEADER_KEY, "server-1:10", ex=60)
+
+        url = reverse("maintenance-status")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["leader"], "server-1:10")
+        self.assertLessEqual(response.data["expires_in"], 60)
+        self.assertGreater(response.data["expires_in"], 0)
+
+    def test_no_leader(self):
+        """Test whether it returns no leader when the lock is not held"""
+
+        url = reverse("maintenance-status")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["leader"])
+        self.assertIsNone(response.data["expires_in"])
+
+    def test_discarded_jobs(self):
+        """Test whether it returns the number of discarded jobs"""
+
+        discarded = discarded_jobs(self.conn)
+        count_discarded_job(self.conn)
+
+        url = reverse("maintenance-status")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["discarded_jobs"], discarded + 1)
+
+    def test_unauthenticated_request(self):
+        """Test that it returns an error if no credentials were provided"""
+
+        self.client.force_authenticate(user=None)
+
+        url = reverse("maintenance-status")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
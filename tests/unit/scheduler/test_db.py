@@ -16,14 +16,23 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
+import unittest.mock
+
 import django.db
 import django.test.utils
 
-from grimoirelab.core.scheduler.db import find_tasks_by_status, find_task, find_job
+from grimoirelab.core.scheduler.db import (
+    backfill_locators,
+    find_tasks_by_status,
+    find_task,
+    find_job,
+    increase_job_count,
+)
 from grimoirelab.core.scheduler.errors import NotFoundError
 from grimoirelab.core.scheduler.models import (
     SchedulerStatus,
     Task,
+    TaskLocator,
     register_task_model,
     GRIMOIRELAB_TASK_MODELS,
 )
@@ -160,6 +169,34 @@ class TestFindTask(GrimoireLabTestCase):
         result = find_task(another_dummy_task.uuid)
         self.assertEqual(result, another_dummy_task)
 
+    def test_find_task_indexed(self):
+        """Only the table of the task is queried when the task is indexed"""
+
+        AnotherDummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        dummy_task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+
+        locator = TaskLocator.objects.get(uuid=dummy_task.uuid)
+        self.assertEqual(locator.task_type, "dummy_task")
+        self.assertIsNone(locator.task_uuid)
+
+        # One query for the index and another one for the task
+        with self.assertNumQueries(2):
+            result = find_task(dummy_task.uuid)
+        self.assertEqual(result, dummy_task)
+
+    def test_find_task_not_indexed(self):
+        """Tasks that are not indexed are found scanning all the models"""
+
+        dummy_task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        another_dummy_task = AnotherDummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        TaskLocator.objects.all().delete()
+
+        result = find_task(dummy_task.uuid)
+        self.assertEqual(result, dummy_task)
+
+        result = find_task(another_dummy_task.uuid)
+        self.assertEqual(result, another_dummy_task)
+
     def test_find_task_not_found(self):
         """An exception is raised when the job is not found"""
 
@@ -225,8 +262,235 @@ class TestFindJob(GrimoireLabTestCase):
         result = find_job("jklmnopq")
         self.assertEqual(result, job_a)
 
+    def test_find_job_indexed(self):
+        """Only the table of the job is queried when the job is indexed"""
+
+        dummy_task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        another_dummy_task = AnotherDummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        job = self.AnotherDummyJobClass.objects.create(
+            uuid="jklmnopq", job_num=1, task=another_dummy_task
+        )
+        self.DummyJobClass.objects.create(uuid="abcdefgh", job_num=1, task=dummy_task)
+
+        locator = TaskLocator.objects.get(uuid="jklmnopq")
+        self.assertEqual(locator.task_type, "another_dummy_task")
+        self.assertEqual(locator.task_uuid, another_dummy_task.uuid)
+
+        # One query for the index and another one for the job
+        with self.assertNumQueries(2):
+            result = find_job("jklmnopq")
+        self.assertEqual(result, job)
+
+    def test_find_job_not_indexed(self):
+        """Jobs that are not indexed are found scanning all the models"""
+
+        another_dummy_task = AnotherDummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        job = self.AnotherDummyJobClass.objects.create(
+            uuid="jklmnopq", job_num=1, task=another_dummy_task
+        )
+        TaskLocator.objects.all().delete()
+
+        result = find_job("jklmnopq")
+        self.assertEqual(result, job)
+
     def test_find_job_not_found(self):
         """An exception is raised when the job is not found"""
 
         with self.assertRaises(NotFoundError):
             find_job("abcdefgh")
+
+    def test_delete_task_locators(self):
+        """The task and its jobs are removed from the index when the task is deleted"""
+
+        dummy_task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        self.DummyJobClass.objects.create(uuid="abcdefgh", job_num=1, task=dummy_task)
+        self.DummyJobClass.objects.create(uuid="12345678", job_num=2, task=dummy_task)
+        another_dummy_task = AnotherDummyTaskDB.create_task({"arg": "value"}, 15, 10)
+
+        dummy_task.delete()
+
+        uuids = set(TaskLocator.objects.values_list("uuid", flat=True))
+        self.assertSetEqual(uuids, {another_dummy_task.uuid})
+
+        with self.assertRaises(NotFoundError):
+            find_job("abcdefgh")
+
+    def test_delete_locators_in_bulk(self):
+        """Tasks and jobs deleted with a queryset are removed from the index"""
+
+        dummy_task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        self.DummyJobClass.objects.create(uuid="abcdefgh", job_num=1, task=dummy_task)
+        self.DummyJobClass.objects.create(uuid="12345678", job_num=2, task=dummy_task)
+        another_dummy_task = AnotherDummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        self.AnotherDummyJobClass.objects.create(
+            uuid="jklmnopq", job_num=1, task=another_dummy_task
+        )
+
+        self.DummyJobClass.objects.filter(uuid="abcdefgh").delete()
+
+        uuids = set(TaskLocator.objects.values_list("uuid", flat=True))
+        self.assertSetEqual(
+            uuids, {dummy_task.uuid, "12345678", another_dummy_task.uuid, "jklmnopq"}
+        )
+
+        AnotherDummyTaskDB.objects.all().delete()
+
+        uuids = set(TaskLocator.objects.values_list("uuid", flat=True))
+        self.assertSetEqual(uuids, {dummy_task.uuid, "12345678"})
+
+    def test_stale_locators(self):
+        """Entries of tasks and jobs deleted without Django are removed when found"""
+
+        dummy_task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        self.DummyJobClass.objects.create(uuid="abcdefgh", job_num=1, task=dummy_task)
+
+        self.DummyJobClass.objects.all()._raw_delete(using="default")
+        DummyTaskDB.objects.all()._raw_delete(using="default")
+
+        with self.assertRaises(NotFoundError):
+            find_job("abcdefgh")
+        with self.assertRaises(NotFoundError):
+            find_task(dummy_task.uuid)
+
+        self.assertFalse(TaskLocator.objects.exists())
+
+
+class TestBackfillLocators(GrimoireLabTestCase):
+    """Unit tests for backfill_locators function"""
+
+    @classmethod
+    def setUpClass(cls):
+        _, cls.DummyJobClass = register_task_model("dummy_task", DummyTaskDB)
+        _, cls.AnotherDummyJobClass = register_task_model("another_dummy_task", AnotherDummyTaskDB)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        GRIMOIRELAB_TASK_MODELS.clear()
+        super().tearDownClass()
+
+    def setUp(self):
+        """Create the test model"""
+
+        def cleanup_test_model():
+            with django.db.connection.schema_editor() as schema_editor:
+                schema_editor.delete_model(self.DummyJobClass)
+                schema_editor.delete_model(DummyTaskDB)
+                schema_editor.delete_model(self.AnotherDummyJobClass)
+                schema_editor.delete_model(AnotherDummyTaskDB)
+
+        with django.db.connection.schema_editor() as schema_editor:
+            schema_editor.create_model(DummyTaskDB)
+            schema_editor.create_model(self.DummyJobClass)
+            schema_editor.create_model(AnotherDummyTaskDB)
+            schema_editor.create_model(self.AnotherDummyJobClass)
+
+        self.addCleanup(cleanup_test_model)
+        super().setUp()
+
+    def test_backfill(self):
+        """Tasks and jobs not indexed are added to the index"""
+
+        dummy_task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        self.DummyJobClass.objects.create(uuid="abcdefgh", job_num=1, task=dummy_task)
+        another_dummy_task = AnotherDummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        self.AnotherDummyJobClass.objects.create(
+            uuid="jklmnopq", job_num=1, task=another_dummy_task
+        )
+
+        # Remove some entries to simulate old tasks and jobs
+        TaskLocator.objects.filter(uuid__in=[dummy_task.uuid, "jklmnopq"]).delete()
+
+        total = backfill_locators(batch_size=1)
+        self.assertEqual(total, 4)
+
+        locators = {
+            locator.uuid: (locator.task_type, locator.task_uuid)
+            for locator in TaskLocator.objects.all()
+        }
+        expected = {
+            dummy_task.uuid: ("dummy_task", None),
+            "abcdefgh": ("dummy_task", dummy_task.uuid),
+            another_dummy_task.uuid: ("another_dummy_task", None),
+            "jklmnopq": ("another_dummy_task", another_dummy_task.uuid),
+        }
+        self.assertDictEqual(locators, expected)
+
+        with self.assertNumQueries(2):
+            find_job("jklmnopq")
+
+
+class TestIncreaseJobCount(GrimoireLabTestCase):
+    """Unit tests for increase_job_count function"""
+
+    @classmethod
+    def setUpClass(cls):
+        _, cls.DummyJobClass = register_task_model("dummy_task", DummyTaskDB)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        GRIMOIRELAB_TASK_MODELS.clear()
+        super().tearDownClass()
+
+    def setUp(self):
+        """Create the test model"""
+
+        def cleanup_test_model():
+            with django.db.connection.schema_editor() as schema_editor:
+                schema_editor.delete_model(self.DummyJobClass)
+                schema_editor.delete_model(DummyTaskDB)
+
+        with django.db.connection.schema_editor() as schema_editor:
+            schema_editor.create_model(DummyTaskDB)
+            schema_editor.create_model(self.DummyJobClass)
+
+        self.addCleanup(cleanup_test_model)
+        super().setUp()
+
+    def test_increase_job_count(self):
+        """The counter is increased and returned with a single query"""
+
+        task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+
+        with self.assertNumQueries(1):
+            job_count = increase_job_count(task, status=SchedulerStatus.ENQUEUED)
+        self.assertEqual(job_count, 1)
+        self.assertEqual(increase_job_count(task), 2)
+
+        task.refresh_from_db()
+        self.assertEqual(task.job_count, 2)
+        self.assertEqual(task.status, SchedulerStatus.ENQUEUED)
+
+    @unittest.mock.patch(
+        "grimoirelab.core.scheduler.db._can_return_updated_rows", return_value=False
+    )
+    def test_increase_job_count_locking_row(self, mock_returning):
+        """The row is locked to read the counter when the update can't return it"""
+
+        task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+
+        with django.test.utils.CaptureQueriesContext(django.db.connection) as ctx:
+            job_count = increase_job_count(task, status=SchedulerStatus.ENQUEUED)
+        self.assertEqual(job_count, 1)
+        self.assertEqual(increase_job_count(task), 2)
+
+        sql = [query["sql"] for query in ctx.captured_queries]
+        self.assertTrue(any(query.startswith("SELECT") for query in sql))
+        self.assertTrue(any(query.startswith("UPDATE") for query in sql))
+
+        task.refresh_from_db()
+        self.assertEqual(task.job_count, 2)
+        self.assertEqual(task.status, SchedulerStatus.ENQUEUED)
+
+    def test_unique_job_num(self):
+        """Two jobs of the same task can't have the same number"""
+
+        task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        another_task = DummyTaskDB.create_task({"arg": "value"}, 15, 10)
+        self.DummyJobClass.objects.create(uuid="abcdefgh", job_num=1, task=task)
+        self.DummyJobClass.objects.create(uuid="12345678", job_num=1, task=another_task)
+
+        with self.assertRaises(django.db.IntegrityError):
+            with django.db.transaction.atomic():
+                self.DummyJobClass.objects.create(uuid="jklmnopq", job_num=1, task=task)
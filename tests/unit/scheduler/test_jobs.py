@@ -16,8 +16,11 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
+import json
 import logging
 
+from unittest.mock import patch
+
 import rq
 
 from grimoirelab.core.scheduler.jobs import GrimoireLabJob, JobLogHandler
@@ -43,6 +46,24 @@ def do_something_and_fail():
     raise Exception("Unexpected error")
 
 
+def report_progress():
+    """Function to run on a job that reports its progress"""
+
+    job = rq.get_current_job()
+    for i in range(1, 11):
+        job.progress = i
+
+
+def update_progress_in_place():
+    """Function to run on a job that updates its progress object"""
+
+    job = rq.get_current_job()
+    progress = {"items": 0}
+    job.progress = progress
+    for i in range(1, 11):
+        progress["items"] = i
+
+
 class TestGrimoireLabJob(GrimoireLabTestCase):
     """Unit tests for GrimoireLabJob class"""
 
@@ -71,6 +92,75 @@ class TestGrimoireLabJob(GrimoireLabTestCase):
         self.assertEqual(job.progress, 50)
         self.assertEqual(job.meta["progress"], 50)
 
+    def test_progress_throttled(self):
+        """Tests whether progress updates are written at most once per interval"""
+
+        job = GrimoireLabJob.create(func=do_something, connection=self.conn)
+        job.save()
+
+        with patch.object(GrimoireLabJob, "save_meta") as mock_save_meta:
+            job.progress = {"items": 1}
+            job.progress = {"items": 2}
+            job.progress = {"items": 3}
+
+            # Only the first value was written
+            self.assertEqual(mock_save_meta.call_count, 1)
+            self.assertEqual(job.progress, {"items": 3})
+            self.assertDictEqual(GrimoireLabJob.fetch_progress(job.id, self.conn), {"items": 1})
+
+            job._progress_saved_at -= GrimoireLabJob.PROGRESS_SAVE_INTERVAL
+            job.progress = {"items": 4}
+
+            self.assertEqual(mock_save_meta.call_count, 2)
+            self.assertDictEqual(GrimoireLabJob.fetch_progress(job.id, self.conn), {"items": 4})
+
+            # Nothing is written when there are no pending updates
+            job.save_progress()
+            self.assertEqual(mock_save_meta.call_count, 2)
+
+    def test_progress_published(self):
+        """Tests whether progress updates are published for live readers"""
+
+        job = GrimoireLabJob.create(func=do_something, connection=self.conn)
+        job.save()
+
+        pubsub = self.conn.pubsub()
+        pubsub.subscribe(GrimoireLabJob.PROGRESS_CHANNEL)
+        pubsub.get_message(timeout=1)
+
+        job.progress = {"items": 1}
+
+        message = pubsub.get_message(timeout=1)
+        self.assertDictEqual(
+            json.loads(message["data"]), {"job_id": job.id, "progress": {"items": 1}}
+        )
+        pubsub.close()
+
+    def test_progress_saved_on_finish(self):
+        """Tests whether the last progress is written when the job finishes"""
+
+        job = GrimoireLabJob.create(func=report_progress, connection=self.conn)
+        q = rq.Queue("test-queue", job_class=GrimoireLabJob, connection=self.conn, is_async=False)
+        job = q.enqueue_job(job)
+
+        fetched = GrimoireLabJob.fetch(job.id, connection=self.conn)
+        self.assertEqual(fetched.progress, 10)
+        self.assertEqual(GrimoireLabJob.fetch_progress(job.id, self.conn), 10)
+
+    def test_progress_updated_in_place_saved_on_finish(self):
+        """Tests whether progress objects updated in place are written when the job finishes"""
+
+        job = GrimoireLabJob.create(func=update_progress_in_place, connection=self.conn)
+        q = rq.Queue("test-queue", job_class=GrimoireLabJob, connection=self.conn, is_async=False)
+        job = q.enqueue_job(job)
+
+        self.assertEqual(GrimoireLabJob.fetch_progress(job.id, self.conn), {"items": 10})
+
+    def test_fetch_progress_not_found(self):
+        """Tests whether None is returned when the job didn't write progress"""
+
+        self.assertIsNone(GrimoireLabJob.fetch_progress("unknown", self.conn))
+
     def test_log(self):
         """Tests the log property"""
 
@@ -117,6 +207,69 @@ class TestGrimoireLabJob(GrimoireLabTestCase):
         self.assertEqual(job.job_log[0]["msg"], "This is a log message")
         self.assertRegex(job.job_log[1]["msg"], "Traceback")
 
+    def test_log_buffered(self):
+        """Tests whether log entries are stored in Redis in batches"""
+
+        job = GrimoireLabJob.create(func=do_something, connection=self.conn)
+        job.save()
+
+        with patch.object(GrimoireLabJob, "save_meta") as mock_save_meta:
+            for i in range(GrimoireLabJob.LOG_FLUSH_ENTRIES - 1):
+                job.add_log({"msg": f"log {i}"})
+
+            # Entries are buffered until the limit is reached
+            self.assertEqual(self.conn.llen(job.log_key), 0)
+            self.assertEqual(len(job.job_log), GrimoireLabJob.LOG_FLUSH_ENTRIES - 1)
+
+            job.add_log({"msg": "last log"})
+
+        self.assertEqual(self.conn.llen(job.log_key), GrimoireLabJob.LOG_FLUSH_ENTRIES)
+        self.assertEqual(json.loads(self.conn.lindex(job.log_key, -1)), {"msg": "last log"})
+        mock_save_meta.assert_not_called()
+
+        # Other instances read the log from Redis
+        fetched = GrimoireLabJob.fetch(job.id, connection=self.conn)
+        self.assertEqual(len(fetched.job_log), GrimoireLabJob.LOG_FLUSH_ENTRIES)
+
+    def test_log_flush_interval(self):
+        """Tests whether log entries are stored when the interval expires"""
+
+        job = GrimoireLabJob.create(func=do_something, connection=self.conn)
+        job.add_log({"msg": "first log"})
+        self.assertEqual(self.conn.llen(job.log_key), 0)
+
+        job._log_flushed_at -= GrimoireLabJob.LOG_FLUSH_INTERVAL
+        job.add_log({"msg": "second log"})
+        self.assertEqual(self.conn.llen(job.log_key), 2)
+
+    def test_log_max_entries(self):
+        """Tests whether only the last entries of the log are kept"""
+
+        job = GrimoireLabJob.create(func=do_something, connection=self.conn)
+
+        with patch.object(GrimoireLabJob, "LOG_MAX_ENTRIES", 5):
+            for i in range(12):
+                job.add_log({"msg": f"log {i}"})
+            job.flush_log()
+
+            self.assertEqual(self.conn.llen(job.log_key), 5)
+            self.assertListEqual(
+                [log["msg"] for log in job.job_log], [f"log {i}" for i in range(7, 12)]
+            )
+
+        self.assertGreater(self.conn.ttl(job.log_key), 0)
+
+    def test_delete_log(self):
+        """Tests whether the log is deleted with the job"""
+
+        job = GrimoireLabJob.create(func=do_something, connection=self.conn)
+        job.save()
+        job.add_log({"msg": "This is a log message"})
+        job.flush_log()
+
+        job.delete()
+        self.assertFalse(self.conn.exists(job.log_key))
+
 
 class TestJobLogHandler(GrimoireLabTestCase):
     """Unit tests for JobLogHandler class"""
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import time
+import unittest.mock
+
+import redis.exceptions
+
+from grimoirelab.core.scheduler.leader import (
+    MAINTENANCE_LEADER_KEY,
+    LeaderElection,
+    current_leader,
+)
+
+from ..base import GrimoireLabTestCase
+
+
+class TestLeaderElection(GrimoireLabTestCase):
+    """Unit tests for LeaderElection class"""
+
+    def test_initialization(self):
+        """Test whether the attributes are initialized"""
+
+        election = LeaderElection(self.conn, key="leader", ttl=30, identity="server-1")
+
+        self.assertEqual(election.connection, self.conn)
+        self.assertEqual(election.key, "leader")
+        self.assertEqual(election.ttl, 30)
+        self.assertEqual(election.identity, "server-1")
+        self.assertFalse(election.is_leader)
+
+    def test_default_identity(self):
+        """Test whether each election gets a different identity by default"""
+
+        first = LeaderElection(self.conn)
+        second = LeaderElection(self.conn)
+
+        self.assertEqual(first.key, MAINTENANCE_LEADER_KEY)
+        self.assertNotEqual(first.identity, second.identity)
+
+    def test_single_leader(self):
+        """Test whether only one process is elected"""
+
+        first = LeaderElection(self.conn, identity="server-1")
+        second = LeaderElection(self.conn, identity="server-2")
+
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertTrue(first.is_leader)
+        self.assertFalse(second.is_leader)
+
+        self.assertEqual(current_leader(self.conn)[0], "server-1")
+
+    def test_renew(self):
+        """Test whether the leader extends its lock"""
+
+        election = LeaderElection(self.conn, ttl=30, identity="server-1")
+        election.acquire()
+
+        self.conn.expire(MAINTENANCE_LEADER_KEY, 5)
+        self.assertTrue(election.acquire())
+
+        leader, expires_in = current_leader(self.conn)
+        self.assertEqual(leader, "server-1")
+        self.assertGreater(expires_in, 5)
+
+    def test_failover(self):
+        """Test whether another process is elected when the lock expires"""
+
+        first = LeaderElection(self.conn, identity="server-1")
+        second = LeaderElection(self.conn, identity="server-2")
+
+        first.acquire()
+        self.assertFalse(second.acquire())
+
+        # The leader didn't renew the lock
+        self.conn.delete(MAINTENANCE_LEADER_KEY)
+
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.acquire())
+        self.assertEqual(current_leader(self.conn)[0], "server-2")
+
+    def test_release(self):
+        """Test whether the lock is removed only by its owner"""
+
+        first = LeaderElection(self.conn, identity="server-1")
+        second = LeaderElection(self.conn, identity="server-2")
+
+        first.acquire()
+        second.release()
+        self.assertEqual(current_leader(self.conn)[0], "server-1")
+
+        first.release()
+        self.assertFalse(first.is_leader)
+        self.assertEqual(current_leader(self.conn), (None, None))
+
+        self.assertTrue(second.acquire())
+
+    def test_redis_error(self):
+        """Test whether the leadership is dropped when Redis can't be reached"""
+
+        election = LeaderElection(self.conn, identity="server-1")
+        election.acquire()
+
+        with unittest.mock.patch.object(
+            election, "_renew", side_effect=redis.exceptions.ConnectionError
+        ):
+            self.assertFalse(election.acquire())
+
+        self.assertFalse(election.is_leader)
+
+    def test_start_stop(self):
+        """Test whether the background thread keeps and releases the lock"""
+
+        election = LeaderElection(self.conn, ttl=1, identity="server-1")
+        election.start()
+        self.assertTrue(election.is_leader)
+
+        # The lock would have expired without renewing it
+        time.sleep(1.5)
+        self.assertEqual(current_leader(self.conn)[0], "server-1")
+
+        election.stop()
+        self.assertFalse(election.is_leader)
+        self.assertEqual(current_leader(self.conn), (None, None))
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import time
+
+from grimoirelab.core.scheduler.lease import (
+    TaskLease,
+    count_discarded_job,
+    discarded_jobs,
+    find_lease_holders,
+)
+
+from ..base import GrimoireLabTestCase
+
+
+class TestTaskLease(GrimoireLabTestCase):
+    """Unit tests for TaskLease class"""
+
+    def test_initialization(self):
+        """Test whether the attributes are initialized"""
+
+        lease = TaskLease(self.conn, "task-1", "job-1", ttl=30)
+
+        self.assertEqual(lease.connection, self.conn)
+        self.assertEqual(lease.task_uuid, "task-1")
+        self.assertEqual(lease.job_id, "job-1")
+        self.assertEqual(lease.ttl, 30)
+        self.assertEqual(lease.key, "grimoirelab:task:lease:task-1")
+
+    def test_acquire(self):
+        """Test whether only one job of the task holds the lease"""
+
+        first = TaskLease(self.conn, "task-1", "job-1", ttl=30)
+        second = TaskLease(self.conn, "task-1", "job-2", ttl=30)
+        other = TaskLease(self.conn, "task-2", "job-3", ttl=30)
+
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertTrue(other.acquire())
+
+        # The holder can take it again
+        self.assertTrue(first.acquire())
+
+        self.assertEqual(self.conn.get(first.key), b"job-1")
+        self.assertLessEqual(self.conn.ttl(first.key), 30)
+
+    def test_renew(self):
+        """Test whether only the holder extends the lease"""
+
+        first = TaskLease(self.conn, "task-1", "job-1", ttl=30)
+        second = TaskLease(self.conn, "task-1", "job-2", ttl=30)
+
+        first.acquire()
+        self.conn.expire(first.key, 5)
+
+        self.assertFalse(second.renew())
+        self.assertLessEqual(self.conn.ttl(first.key), 5)
+
+        self.assertTrue(first.renew())
+        self.assertGreater(self.conn.ttl(first.key), 5)
+
+    def test_release(self):
+        """Test whether only the holder releases the lease"""
+
+        first = TaskLease(self.conn, "task-1", "job-1")
+        second = TaskLease(self.conn, "task-1", "job-2")
+
+        first.acquire()
+
+        second.release()
+        self.assertEqual(self.conn.get(first.key), b"job-1")
+
+        first.release()
+        self.assertFalse(self.conn.exists(first.key))
+
+        self.assertTrue(second.acquire())
+
+    def test_keep(self):
+        """Test whether the lease is renewed while the context runs"""
+
+        lease = TaskLease(self.conn, "task-1", "job-1", ttl=30)
+        lease.acquire()
+        self.conn.expire(lease.key, 5)
+
+        with lease.keep(interval=0.01):
+            for _ in range(100):
+                if self.conn.ttl(lease.key) > 5:
+                    break
+                time.sleep(0.01)
+
+        self.assertGreater(self.conn.ttl(lease.key), 5)
+
+        # Renewals stop when the context ends
+        self.conn.expire(lease.key, 5)
+        time.sleep(0.05)
+        self.assertLessEqual(self.conn.ttl(lease.key), 5)
+
+    def test_keep_lost(self):
+        """Test whether a lease taken by another job is not renewed"""
+
+        lease = TaskLease(self.conn, "task-1", "job-1", ttl=30)
+        lease.acquire()
+        self.conn.set(lease.key, "job-2", ex=5)
+
+        with lease.keep(interval=0.01):
+            time.sleep(0.05)
+
+        self.assertEqual(self.conn.get(lease.key), b"job-2")
+        self.assertLessEqual(self.conn.ttl(lease.key), 5)
+
+    def test_find_lease_holders(self):
+        """Test whether it returns the holders of the leases of the tasks"""
+
+        TaskLease(self.conn, "task-1", "job-1").acquire()
+        TaskLease(self.conn, "task-3", "job-3").acquire()
+
+        holders = find_lease_holders(self.conn, ["task-1", "task-2", "task-3"])
+        self.assertDictEqual(holders, {"task-1": "job-1", "task-3": "job-3"})
+
+        self.assertDictEqual(find_lease_holders(self.conn, []), {})
+
+    def test_discarded_jobs(self):
+        """Test whether the discarded jobs are counted"""
+
+        self.assertEqual(discarded_jobs(self.conn), 0)
+
+        count_discarded_job(self.conn)
+        count_discarded_job(self.conn)
+
+        self.assertEqual(discarded_jobs(self.conn), 2)
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) GrimoireLab Contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import datetime
+import uuid
+
+from grimoirelab.core.scheduler.policy import (
+    adaptive_interval,
+    job_jitter,
+    release_start_slot,
+    reserve_start_slot,
+    task_offset,
+)
+
+from ..base import GrimoireLabTestCase
+
+
+NOW = datetime.datetime(2025, 1, 1, 10, 30, 15, tzinfo=datetime.timezone.utc)
+
+
+class TestJobJitter(GrimoireLabTestCase):
+    """Unit tests for spreading the jobs of recurring tasks"""
+
+    def test_task_offset(self):
+        """Test whether the offset is fixed for each task and salt"""
+
+        task_uuid = "0fa9b1e4-9c3e-4a8e-8a4d-1f0f3b9d2a11"
+        offset = task_offset(task_uuid)
+
+        self.assertGreaterEqual(offset, 0)
+        self.assertLess(offset, 1)
+        self.assertEqual(offset, task_offset(task_uuid))
+        self.assertNotEqual(offset, task_offset(task_uuid, salt=1))
+        self.assertNotEqual(offset, task_offset("5d1c0a7e-2b4f-4c55-9e1a-8c7b6a5f4e32"))
+
+    def test_phase(self):
+        """Test whether jobs are moved to the phase of the task within the bounds"""
+
+        task_uuid = str(uuid.uuid4())
+        interval = 7200
+        phase = task_offset(task_uuid) * interval
+
+        for minutes in range(0, 240, 7):
+            scheduled_at = NOW + datetime.timedelta(minutes=minutes)
+            jitter = job_jitter(task_uuid, scheduled_at, interval, 0.5)
+
+            self.assertLessEqual(abs(jitter), interval / 4)
+            self.assertEqual(jitter, job_jitter(task_uuid, scheduled_at, interval, 0.5))
+
+            # Jobs are moved towards the phase of the task
+            distance = (phase - scheduled_at.timestamp()) % interval
+            distance = min(distance, interval - distance)
+            moved = (phase - scheduled_at.timestamp() - jitter) % interval
+            moved = min(moved, interval - moved)
+            self.assertLessEqual(moved, distance)
+
+        # Jobs already in their phase are not moved
+        scheduled_at = datetime.datetime.fromtimestamp(
+            phase + interval * 1000, datetime.timezone.utc
+        )
+        self.assertAlmostEqual(job_jitter(task_uuid, scheduled_at, interval, 0.5), 0, places=3)
+
+    def test_first_job(self):
+        """Test whether the first jobs of tasks created at once are spread"""
+
+        interval = 7200
+
+        jitters = [
+            job_jitter(str(uuid.uuid4()), NOW, interval, 0.5, first=True) for _ in range(1000)
+        ]
+
+        for jitter in jitters:
+            self.assertGreaterEqual(jitter, 0)
+            self.assertLess(jitter, interval / 2)
+
+        self.assertGreater(len({int(jitter) // 60 for jitter in jitters}), 55)
+
+    def test_same_frequency(self):
+        """Test whether tasks locked to their phase run once per interval"""
+
+        task_uuid = str(uuid.uuid4())
+        interval = 7200
+
+        scheduled_at = NOW + datetime.timedelta(
+            seconds=job_jitter(task_uuid, NOW, interval, 0.5, first=True)
+        )
+        runs = [scheduled_at]
+
+        for _ in range(20):
+            finished_at = runs[-1] + datetime.timedelta(seconds=300)
+            scheduled_at = finished_at + datetime.timedelta(seconds=interval)
+            jitter = job_jitter(task_uuid, scheduled_at, interval, 0.5)
+            runs.append(scheduled_at + datetime.timedelta(seconds=jitter))
+
+        elapsed = [(b - a).total_seconds() for a, b in zip(runs[-10:], runs[-9:])]
+        for seconds in elapsed:
+            self.assertAlmostEqual(seconds, interval, places=3)
+
+    def test_disabled(self):
+        """Test whether jobs are not moved without interval or fraction"""
+
+        self.assertEqual(job_jitter(str(uuid.uuid4()), NOW, 0, 0.5), 0)
+        self.assertEqual(job_jitter(str(uuid.uuid4()), NOW, 7200, 0), 0)
+        self.assertEqual(job_jitter(str(uuid.uuid4()), NOW, 7200, 0, first=True), 0)
+
+
+class TestAdaptiveInterval(GrimoireLabTestCase):
+    """Unit tests for adapting the interval to the activity of the tasks"""
+
+    def test_no_items(self):
+        """Test whether the interval grows when nothing was fetched"""
+
+        self.assertEqual(adaptive_interval(3600, 0, 900, 86400, 2), 7200)
+        self.assertEqual(adaptive_interval(7200, 0, 900, 86400, 1.5), 10800)
+
+    def test_items(self):
+        """Test whether the interval shrinks when items were fetched"""
+
+        self.assertEqual(adaptive_interval(7200, 10, 900, 86400, 2), 3600)
+        self.assertEqual(adaptive_interval(3600, 1, 900, 86400, 1.5), 2400)
+
+    def test_bounds(self):
+        """Test whether the interval stays between the minimum and maximum"""
+
+        self.assertEqual(adaptive_interval(60000, 0, 900, 86400, 2), 86400)
+        self.assertEqual(adaptive_interval(86400, 0, 900, 86400, 2), 86400)
+        self.assertEqual(adaptive_interval(1200, 5, 900, 86400, 2), 900)
+        self.assertEqual(adaptive_interval(900, 5, 900, 86400, 2), 900)
+
+        # Intervals out of the bounds are moved into them
+        self.assertEqual(adaptive_interval(60, 0, 900, 86400, 2), 900)
+        self.assertEqual(adaptive_interval(604800, 5, 900, 86400, 2), 86400)
+
+
+class TestReserveStartSlot(GrimoireLabTestCase):
+    """Unit tests for limiting the jobs started per minute"""
+
+    def test_reserve(self):
+        """Test whether jobs are delayed when their minute is full"""
+
+        slots = [reserve_start_slot(self.conn, f"job-{i}", NOW, 2, now=NOW) for i in range(5)]
+
+        self.assertListEqual(
+            slots,
+            [
+                NOW,
+                NOW,
+                NOW + datetime.timedelta(minutes=1),
+                NOW + datetime.timedelta(minutes=1),
+                NOW + datetime.timedelta(minutes=2),
+            ],
+        )
+
+    def test_past_jobs(self):
+        """Test whether jobs scheduled in the past start in the current minute"""
+
+        past = NOW - datetime.timedelta(hours=1)
+
+        self.assertEqual(reserve_start_slot(self.conn, "job-1", past, 1, now=NOW), NOW)
+        self.assertEqual(
+            reserve_start_slot(self.conn, "job-2", past, 1, now=NOW),
+            NOW + datetime.timedelta(minutes=1),
+        )
+
+    def test_full_horizon(self):
+        """Test whether jobs keep their time when every minute is full"""
+
+        self.assertEqual(reserve_start_slot(self.conn, "job-1", NOW, 1, now=NOW, horizon=2), NOW)
+        reserve_start_slot(self.conn, "job-2", NOW, 1, now=NOW, horizon=2)
+
+        self.assertEqual(reserve_start_slot(self.conn, "job-3", NOW, 1, now=NOW, horizon=2), NOW)
+
+    def test_release(self):
+        """Test whether released places can be reserved by other jobs"""
+
+        reserve_start_slot(self.conn, "job-1", NOW, 1, now=NOW)
+        later = reserve_start_slot(self.conn, "job-2", NOW, 1, now=NOW)
+        self.assertEqual(later, NOW + datetime.timedelta(minutes=1))
+
+        release_start_slot(self.conn, "job-1", NOW)
+        self.assertEqual(reserve_start_slot(self.conn, "job-3", NOW, 1, now=NOW), NOW)
+
+        # Releasing a job twice or a job without place does nothing
+        release_start_slot(self.conn, "job-1", NOW)
+        release_start_slot(self.conn, "job-4", later)
+        self.assertEqual(
+            reserve_start_slot(self.conn, "job-5", NOW, 1, now=NOW),
+            NOW + datetime.timedelta(minutes=2),
+        )
+
+    def test_slots_expire(self):
+        """Test whether the reserved places expire after their minute"""
+
+        reserve_start_slot(self.conn, "job-1", NOW, 1, now=NOW)
+
+        keys = self.conn.keys("grimoirelab:scheduler:slots:*")
+        self.assertEqual(len(keys), 1)
+        self.assertGreater(self.conn.ttl(keys[0]), -1)
@@ -20,13 +20,18 @@ import unittest.mock
 
 import datetime
 import django.db
+import django.test
+import django_rq
 import django_rq.workers
+import rq.executions
 import rq.job
 
 import grimoirelab_toolkit.datetime
 
 from grimoirelab.core.scheduler.db import find_job
 from grimoirelab.core.scheduler.errors import NotFoundError
+from grimoirelab.core.scheduler.lease import TASK_LEASE_PREFIX, discarded_jobs
+from grimoirelab.core.scheduler.policy import START_SLOTS_PREFIX, job_jitter
 from grimoirelab.core.scheduler.models import (
     Task,
     SchedulerStatus,
@@ -41,6 +46,7 @@ from grimoirelab.core.scheduler.scheduler import (
     _enqueue_task,
     _on_success_callback,
     _on_failure_callback,
+    _MaintenancePasses,
 )
 
 from ..base import GrimoireLabTestCase
@@ -197,6 +203,25 @@ class TestScheduleTask(GrimoireLabTestCase):
         self.assertGreater(task.last_run, before_run_call_dt)
         self.assertLess(task.last_run, after_run_call_dt)
 
+    @django.test.override_settings(GRIMOIRELAB_JOB_JITTER=0.5)
+    @unittest.mock.patch("grimoirelab.core.scheduler.scheduler.datetime_utcnow")
+    def test_schedule_task_jitter(self, mock_utcnow):
+        """The first job of a recurring task is delayed to the phase of the task"""
+
+        dt = grimoirelab_toolkit.datetime.datetime_utcnow()
+        mock_utcnow.return_value = dt
+
+        task = schedule_task("test_task", {"a": 1, "b": 2}, job_interval=3600)
+
+        jitter = job_jitter(task.uuid, dt, 3600, 0.5, first=True)
+        self.assertGreater(jitter, 0)
+        self.assertEqual(task.scheduled_at, dt + datetime.timedelta(seconds=jitter))
+        self.assertEqual(task.jobs.first().scheduled_at, task.scheduled_at)
+
+        # Tasks that run once are not delayed
+        task = schedule_task("test_task", {"a": 1, "b": 2}, job_interval=3600, burst=True)
+        self.assertEqual(task.scheduled_at, dt)
+
     def test_schedule_task_parameters(self):
         """Task parameters are correctly set"""
 
@@ -283,6 +308,145 @@ class TestScheduleTask(GrimoireLabTestCase):
             task = SchedulerTestTask.create_task(task_args, 360, 10)
             _enqueue_task(task, scheduled_at=None)
 
+        # The job and the task are marked as failed
+        task.refresh_from_db()
+        self.assertEqual(task.status, SchedulerStatus.FAILED)
+        job = task.jobs.get()
+        self.assertEqual(job.status, SchedulerStatus.FAILED)
+
+    def test_enqueue_task_job_counter(self):
+        """Jobs are numbered using the job counter of the task"""
+
+        task = SchedulerTestTask.create_task({"a": 1, "b": 2}, 360, 10)
+        self.assertEqual(task.job_count, 0)
+
+        jobs = [_enqueue_task(task) for _ in range(3)]
+        self.assertListEqual([job.job_num for job in jobs], [1, 2, 3])
+        self.assertEqual(task.job_count, 3)
+
+        task.refresh_from_db()
+        self.assertEqual(task.job_count, 3)
+        self.assertEqual(task.status, SchedulerStatus.ENQUEUED)
+        self.assertEqual(task.scheduled_at, jobs[-1].scheduled_at)
+
+        # The counter is read from the database, not from the instance
+        stale_task = SchedulerTestTask.objects.get(pk=task.pk)
+        stale_task.job_count = 0
+        job = _enqueue_task(stale_task)
+        self.assertEqual(job.job_num, 4)
+
+    def test_stale_task_keeps_job_counter(self):
+        """Saving a task loaded before enqueuing a job doesn't roll back the counter"""
+
+        task = SchedulerTestTask.create_task({"a": 1, "b": 2}, 360, 10)
+        stale_task = SchedulerTestTask.objects.get(pk=task.pk)
+
+        _enqueue_task(task)
+        _enqueue_task(task)
+
+        stale_task.save_run(SchedulerStatus.COMPLETED)
+        stale_task.status = SchedulerStatus.RECOVERY
+        stale_task.save()
+
+        task.refresh_from_db()
+        self.assertEqual(task.job_count, 2)
+        self.assertEqual(task.status, SchedulerStatus.RECOVERY)
+        self.assertEqual(task.runs, 1)
+
+        job = _enqueue_task(stale_task)
+        self.assertEqual(job.job_num, 3)
+
+    def test_enqueue_task_queries(self):
+        """The number of queries to enqueue a task doesn't depend on its jobs"""
+
+        task = SchedulerTestTask.create_task({"a": 1, "b": 2}, 360, 10)
+        for _ in range(5):
+            _enqueue_task(task)
+
+        # Update the counter returning its value, insert the job and
+        # its locator, plus the queries to begin and commit the transaction.
+        with self.assertNumQueries(5):
+            job = _enqueue_task(task)
+
+        self.assertEqual(job.job_num, 6)
+        queue = django_rq.get_queue("testing")
+        self.assertIn(job.uuid, queue.scheduled_job_registry.get_job_ids())
+
+    @django.test.override_settings(GRIMOIRELAB_JOBS_PER_MINUTE=2)
+    @unittest.mock.patch("grimoirelab.core.scheduler.scheduler.datetime_utcnow")
+    def test_enqueue_task_jobs_per_minute(self, mock_utcnow):
+        """Jobs that don't fit in a minute are delayed to the next one"""
+
+        dt = datetime.datetime(2025, 1, 1, 10, 30, 15, tzinfo=datetime.timezone.utc)
+        mock_utcnow.return_value = dt
+
+        connection = django_rq.get_connection()
+        minute = int(dt.timestamp()) // 60
+        connection.delete(f"{START_SLOTS_PREFIX}{minute}", f"{START_SLOTS_PREFIX}{minute + 1}")
+
+        tasks = [SchedulerTestTask.create_task({"a": 1, "b": 2}, 360, 10) for _ in range(3)]
+        jobs = [_enqueue_task(task) for task in tasks]
+
+        self.assertEqual(jobs[0].scheduled_at, dt)
+        self.assertEqual(jobs[1].scheduled_at, dt)
+        self.assertEqual(jobs[2].scheduled_at, dt + datetime.timedelta(minutes=1))
+
+        tasks[2].refresh_from_db()
+        self.assertEqual(tasks[2].scheduled_at, dt + datetime.timedelta(minutes=1))
+
+    @django.test.override_settings(GRIMOIRELAB_JOBS_PER_MINUTE=1)
+    @unittest.mock.patch("grimoirelab.core.scheduler.scheduler.datetime_utcnow")
+    def test_cancel_task_jobs_per_minute(self, mock_utcnow):
+        """The place of a canceled job can be taken by other jobs"""
+
+        dt = datetime.datetime(2025, 1, 1, 11, 30, 15, tzinfo=datetime.timezone.utc)
+        mock_utcnow.return_value = dt
+
+        connection = django_rq.get_connection()
+        minute = int(dt.timestamp()) // 60
+        connection.delete(f"{START_SLOTS_PREFIX}{minute}")
+
+        task = SchedulerTestTask.create_task({"a": 1, "b": 2}, 360, 10)
+        job = _enqueue_task(task)
+        self.assertEqual(job.scheduled_at, dt)
+
+        cancel_task(task.uuid)
+        self.assertFalse(connection.sismember(f"{START_SLOTS_PREFIX}{minute}", job.uuid))
+
+        task = SchedulerTestTask.create_task({"a": 1, "b": 2}, 360, 10)
+        job = _enqueue_task(task)
+        self.assertEqual(job.scheduled_at, dt)
+
+    @django.test.override_settings(GRIMOIRELAB_JOBS_PER_MINUTE=1)
+    @unittest.mock.patch("grimoirelab.core.scheduler.scheduler.datetime_utcnow")
+    def test_reschedule_task_jobs_per_minute(self, mock_utcnow):
+        """Rescheduled jobs move their place to the first minute with room"""
+
+        dt = datetime.datetime(2025, 1, 1, 12, 30, 15, tzinfo=datetime.timezone.utc)
+        later = dt + datetime.timedelta(hours=1)
+        mock_utcnow.return_value = dt
+
+        connection = django_rq.get_connection()
+        minute = int(dt.timestamp()) // 60
+        connection.delete(
+            f"{START_SLOTS_PREFIX}{minute}",
+            f"{START_SLOTS_PREFIX}{minute + 1}",
+            f"{START_SLOTS_PREFIX}{minute + 60}",
+        )
+
+        _enqueue_task(SchedulerTestTask.create_task({"a": 1, "b": 2}, 360, 10))
+
+        task = SchedulerTestTask.create_task({"a": 1, "b": 2}, 360, 10)
+        job = _enqueue_task(task, scheduled_at=later)
+        self.assertTrue(connection.sismember(f"{START_SLOTS_PREFIX}{minute + 60}", job.uuid))
+
+        reschedule_task(task.uuid)
+
+        job.refresh_from_db()
+        self.assertEqual(job.scheduled_at, dt + datetime.timedelta(minutes=1))
+        self.assertFalse(connection.sismember(f"{START_SLOTS_PREFIX}{minute + 60}", job.uuid))
+        self.assertTrue(connection.sismember(f"{START_SLOTS_PREFIX}{minute + 1}", job.uuid))
+
 
 class TestMaintainTasks(GrimoireLabTestCase):
     """Class for testing the maintenance of tasks"""
@@ -309,6 +473,14 @@ class TestMaintainTasks(GrimoireLabTestCase):
             schema_editor.create_model(job_class_callback)
 
         self.addCleanup(cleanup_test_model)
+
+        # Forget the passes run by other tests
+        patcher = unittest.mock.patch(
+            "grimoirelab.core.scheduler.scheduler._maintenance", _MaintenancePasses()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
         super().setUp()
 
     def test_maintain_tasks_reschedule(self):
@@ -353,6 +525,42 @@ class TestMaintainTasks(GrimoireLabTestCase):
         job_rq = rq.job.Job.fetch(job_db.uuid, connection=django_rq.get_connection())
         self.assertEqual(job_rq.id, job_db.uuid)
 
+    @django.test.override_settings(GRIMOIRELAB_JOBS_PER_MINUTE=100)
+    def test_maintain_tasks_jobs_per_minute(self):
+        """The place of a replaced job is released"""
+
+        task = schedule_task("test_task", {"a": 1, "b": 2})
+        job_db = task.jobs.first()
+        minute = int(job_db.scheduled_at.timestamp()) // 60
+
+        connection = django_rq.get_connection()
+        self.assertTrue(connection.sismember(f"{START_SLOTS_PREFIX}{minute}", job_db.uuid))
+
+        rq.job.Job.fetch(job_db.uuid, connection=connection).delete()
+        maintain_tasks()
+
+        self.assertEqual(task.jobs.count(), 2)
+        self.assertFalse(connection.sismember(f"{START_SLOTS_PREFIX}{minute}", job_db.uuid))
+
+    def test_maintain_tasks_keep_checkpoint(self):
+        """The progress saved by jobs that died is kept when they are re-scheduled"""
+
+        task = schedule_task("test_task", {"a": 1, "b": 2})
+
+        job_db = task.jobs.first()
+        job_db.progress = {"summary": {"last_offset": 10}}
+        job_db.save()
+
+        job_rq = rq.job.Job.fetch(job_db.uuid, connection=django_rq.get_connection())
+        job_rq.delete()
+
+        maintain_tasks()
+
+        job_db = task.jobs.first()
+        self.assertEqual(job_db.status, SchedulerStatus.CANCELED)
+        self.assertDictEqual(job_db.progress, {"summary": {"last_offset": 10}})
+        self.assertEqual(task.jobs.count(), 2)
+
     def test_maintain_tasks_reschedule_multiple_jobs(self):
         """Tasks with multiple finished jobs are re-scheduled"""
 
@@ -448,6 +656,193 @@ class TestMaintainTasks(GrimoireLabTestCase):
         job_rq = rq.job.Job.fetch(job_db.uuid, connection=django_rq.get_connection())
         self.assertEqual(job_rq.id, job_db.uuid)
 
+    def test_maintain_tasks_running_job(self):
+        """Running jobs are only re-scheduled when their heartbeat expired"""
+
+        connection = django_rq.get_connection()
+        task_args = {"a": 1, "b": 2}
+
+        task_alive = schedule_task("test_task", task_args)
+        task_dead = schedule_task("test_task", task_args)
+
+        # Simulate both jobs were started by a worker; the execution
+        # of the dead one expired a while ago
+        for task, ttl in ((task_alive, 120), (task_dead, -180)):
+            job_rq = rq.job.Job.fetch(task.jobs.first().uuid, connection=connection)
+            with connection.pipeline() as pipeline:
+                job_rq.set_status(rq.job.JobStatus.STARTED, pipeline=pipeline)
+                rq.executions.Execution.create(job_rq, ttl=ttl, pipeline=pipeline)
+                pipeline.execute()
+
+        maintain_tasks()
+
+        self.assertEqual(task_alive.jobs.count(), 1)
+        self.assertEqual(task_dead.jobs.count(), 2)
+        self.assertEqual(task_dead.jobs.first().status, SchedulerStatus.CANCELED)
+
+    def test_maintain_tasks_incremental(self):
+        """Tasks enqueued for the future and not modified are only checked on full passes"""
+
+        schedule_time = datetime.datetime(2100, 1, 1, tzinfo=datetime.timezone.utc)
+
+        task = SchedulerTestTask.create_task({"a": 1, "b": 2}, 360, 10)
+        job_db = _enqueue_task(task, scheduled_at=schedule_time)
+
+        maintain_tasks()
+        self.assertEqual(task.jobs.count(), 1)
+
+        # Delete job manually without updating the task
+        job_rq = rq.job.Job.fetch(job_db.uuid, connection=django_rq.get_connection())
+        job_rq.delete()
+
+        maintain_tasks()
+        self.assertEqual(task.jobs.count(), 1)
+
+        maintain_tasks(full=True)
+        self.assertEqual(task.jobs.count(), 2)
+
+    def test_maintain_tasks_queries(self):
+        """Tasks are checked in chunks with one query for their jobs"""
+
+        task_args = {"a": 1, "b": 2}
+        for _ in range(3):
+            schedule_task("test_task", task_args)
+
+        # Two chunks of 'test_task' with two queries each,
+        # and a query to find there are no more tasks for
+        # each task model.
+        with self.assertNumQueries(6):
+            maintain_tasks(chunk_size=2)
+
+
+class TestTaskLease(GrimoireLabTestCase):
+    """Class for testing that a single job of a task runs at once"""
+
+    def setUp(self):
+        GRIMOIRELAB_TASK_MODELS.clear()
+        task_class_sched, job_class_sched = register_task_model("test_task", SchedulerTestTask)
+        task_class_callback, job_class_callback = register_task_model(
+            "callback_test_task", OnSuccessCallbackTestTask
+        )
+
+        def cleanup_test_model():
+            GRIMOIRELAB_TASK_MODELS.clear()
+            with django.db.connection.schema_editor() as schema_editor:
+                schema_editor.delete_model(job_class_sched)
+                schema_editor.delete_model(task_class_sched)
+                schema_editor.delete_model(job_class_callback)
+                schema_editor.delete_model(task_class_callback)
+
+        with django.db.connection.schema_editor() as schema_editor:
+            schema_editor.create_model(task_class_sched)
+            schema_editor.create_model(job_class_sched)
+            schema_editor.create_model(task_class_callback)
+            schema_editor.create_model(job_class_callback)
+
+        self.addCleanup(cleanup_test_model)
+        super().setUp()
+
+    def test_job_discarded(self):
+        """Jobs are discarded when another job of the task holds the lease"""
+
+        connection = django_rq.get_connection()
+        discarded = discarded_jobs(connection)
+
+        task = schedule_task("test_task", {"a": 1, "b": 2})
+        job_db = task.jobs.first()
+        connection.set(f"{TASK_LEASE_PREFIX}{task.uuid}", "running-job")
+
+        worker = django_rq.workers.get_worker("testing")
+        worker.work(burst=True, with_scheduler=True)
+
+        job_db.refresh_from_db()
+        self.assertEqual(job_db.status, SchedulerStatus.CANCELED)
+        self.assertEqual(task.jobs.count(), 1)
+
+        with self.assertRaises(rq.exceptions.NoSuchJobError):
+            rq.job.Job.fetch(job_db.uuid, connection=connection)
+
+        self.assertEqual(discarded_jobs(connection), discarded + 1)
+        self.assertEqual(connection.get(f"{TASK_LEASE_PREFIX}{task.uuid}"), b"running-job")
+
+    def test_lease_released(self):
+        """The lease is released when the job finishes, so the next job can run"""
+
+        connection = django_rq.get_connection()
+        discarded = discarded_jobs(connection)
+
+        task = schedule_task("callback_test_task", {"a": 1, "b": 2}, job_interval=0)
+
+        job_rq = rq.job.Job.fetch(task.jobs.first().uuid, connection=connection)
+        self.assertEqual(job_rq.meta["task_uuid"], task.uuid)
+
+        worker = django_rq.workers.get_worker("testing")
+        worker.work(burst=True, with_scheduler=True)
+        worker.work(burst=True, with_scheduler=True)
+
+        self.assertFalse(connection.exists(f"{TASK_LEASE_PREFIX}{task.uuid}"))
+        self.assertEqual(task.jobs.filter(status=SchedulerStatus.COMPLETED).count(), 2)
+        self.assertEqual(discarded_jobs(connection), discarded)
+
+    def test_enqueue_task_leased(self):
+        """No job is enqueued while another job of the task holds the lease"""
+
+        connection = django_rq.get_connection()
+
+        task = schedule_task("test_task", {"a": 1, "b": 2})
+        connection.set(f"{TASK_LEASE_PREFIX}{task.uuid}", "running-job")
+
+        self.assertIsNone(_enqueue_task(task))
+        self.assertEqual(task.jobs.count(), 1)
+
+        connection.delete(f"{TASK_LEASE_PREFIX}{task.uuid}")
+
+        self.assertIsNotNone(_enqueue_task(task))
+        self.assertEqual(task.jobs.count(), 2)
+
+    def test_task_uuid_cached(self):
+        """The task of jobs without its uuid is read from the database once"""
+
+        connection = django_rq.get_connection()
+
+        task = schedule_task("test_task", {"a": 1, "b": 2})
+        job_rq = rq.job.Job.fetch(task.jobs.first().uuid, connection=connection)
+        del job_rq.meta["task_uuid"]
+        job_rq.save_meta()
+
+        worker = django_rq.workers.get_worker("testing")
+
+        lease = worker._task_lease(job_rq)
+        self.assertEqual(lease.task_uuid, task.uuid)
+
+        with self.assertNumQueries(0):
+            lease = worker._task_lease(job_rq)
+        self.assertEqual(lease.task_uuid, task.uuid)
+
+        job_rq = rq.job.Job.fetch(job_rq.id, connection=connection)
+        self.assertEqual(job_rq.meta["task_uuid"], task.uuid)
+
+    def test_maintain_tasks_leased(self):
+        """Tasks are not re-scheduled while their lease is held"""
+
+        connection = django_rq.get_connection()
+
+        task = schedule_task("test_task", {"a": 1, "b": 2})
+        job_db = task.jobs.first()
+
+        # The job is running but its heartbeat was delayed
+        rq.job.Job.fetch(job_db.uuid, connection=connection).delete()
+        connection.set(f"{TASK_LEASE_PREFIX}{task.uuid}", job_db.uuid)
+
+        maintain_tasks(full=True)
+        self.assertEqual(task.jobs.count(), 1)
+
+        # The lease expired
+        connection.delete(f"{TASK_LEASE_PREFIX}{task.uuid}")
+
+        maintain_tasks(full=True)
+        self.assertEqual(task.jobs.count(), 2)
+
 
 class TestCancelTask(GrimoireLabTestCase):
     """Unit tests for canceling tasks"""
@@ -789,6 +1184,65 @@ class TestOnSuccessCallback(GrimoireLabTestCase):
         # New job was created
         self.assertEqual(self.job_class.objects.count(), 2)
 
+    @unittest.mock.patch("grimoirelab.core.scheduler.scheduler.datetime_utcnow")
+    def test_interval_between_jobs_adapted(self, mock_utcnow):
+        """Task is re-scheduled after the interval adapted to the result of the job"""
+
+        dt = grimoirelab_toolkit.datetime.datetime_utcnow()
+        mock_utcnow.return_value = dt
+
+        task = OnSuccessCallbackTestTask.create_task({"a": 1, "b": 2}, 3600, 10)
+        job = _enqueue_task(task, scheduled_at=None)
+
+        with (
+            unittest.mock.patch.object(
+                OnSuccessCallbackTestTask, "adapt_interval", autospec=True
+            ) as mock_adapt,
+            unittest.mock.patch.object(
+                OnSuccessCallbackTestTask,
+                "effective_interval",
+                new_callable=unittest.mock.PropertyMock,
+                return_value=7200,
+            ),
+        ):
+            worker = django_rq.workers.get_worker(job.queue)
+            processed = worker.work(burst=True, with_scheduler=True)
+            self.assertEqual(processed, True)
+
+        # The task was adapted with the result of the job
+        mock_adapt.assert_called_once()
+        self.assertEqual(mock_adapt.call_args.args[1], 3)
+
+        task.refresh_from_db()
+        self.assertEqual(task.scheduled_at, dt + datetime.timedelta(seconds=7200))
+        self.assertEqual(task.status, SchedulerStatus.ENQUEUED)
+
+    @django.test.override_settings(GRIMOIRELAB_JOB_JITTER=0.5)
+    @unittest.mock.patch("grimoirelab.core.scheduler.scheduler.datetime_utcnow")
+    def test_interval_between_jobs_jitter(self, mock_utcnow):
+        """Task is re-scheduled after the given interval plus the jitter of the job"""
+
+        dt = grimoirelab_toolkit.datetime.datetime_utcnow()
+        mock_utcnow.return_value = dt
+
+        job_interval = 3600
+
+        task = OnSuccessCallbackTestTask.create_task({"a": 1, "b": 2}, job_interval, 10)
+        job = _enqueue_task(task, scheduled_at=None)
+
+        worker = django_rq.workers.get_worker(job.queue)
+        processed = worker.work(burst=True, with_scheduler=True)
+        self.assertEqual(processed, True)
+
+        target = dt + datetime.timedelta(seconds=job_interval)
+        jitter = job_jitter(task.uuid, target, job_interval, 0.5)
+        self.assertNotEqual(jitter, 0)
+
+        task.refresh_from_db()
+        self.assertEqual(task.scheduled_at, target + datetime.timedelta(seconds=jitter))
+        self.assertLessEqual(abs((task.scheduled_at - target).total_seconds()), job_interval / 4)
+        self.assertEqual(task.status, SchedulerStatus.ENQUEUED)
+
 
 class OnFailureNoRetryTestTask(Task):
     """Class for testing on failure callback calls with no retry"""
@@ -879,6 +1333,55 @@ class TestOnFailureCallback(GrimoireLabTestCase):
         # A new job was created
         self.assertEqual(self.job_class.objects.count(), 2)
 
+    @django.test.override_settings(GRIMOIRELAB_JOB_JITTER=0.5)
+    @unittest.mock.patch("grimoirelab.core.scheduler.scheduler.datetime_utcnow")
+    def test_retry_interval(self, mock_utcnow):
+        """Failed jobs are retried after the interval of the task, without jitter"""
+
+        dt = grimoirelab_toolkit.datetime.datetime_utcnow()
+        mock_utcnow.return_value = dt
+
+        task = OnFailureCallbackTestTask.create_task({"a": 1, "b": 2}, 3600, 10)
+        job = _enqueue_task(task, scheduled_at=None)
+
+        worker = django_rq.workers.get_worker(job.queue)
+        worker.work(burst=True, with_scheduler=True)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, SchedulerStatus.ENQUEUED)
+        self.assertEqual(task.failures, 1)
+        self.assertEqual(task.scheduled_at, dt + datetime.timedelta(seconds=3600))
+
+    @unittest.mock.patch("grimoirelab.core.scheduler.scheduler.datetime_utcnow")
+    def test_retry_interval_adapted(self, mock_utcnow):
+        """Failed jobs are retried after the configured interval, not the adapted one"""
+
+        dt = grimoirelab_toolkit.datetime.datetime_utcnow()
+        mock_utcnow.return_value = dt
+
+        task = OnFailureCallbackTestTask.create_task({"a": 1, "b": 2}, 3600, 10)
+        job = _enqueue_task(task, scheduled_at=None)
+
+        with (
+            unittest.mock.patch.object(
+                OnFailureCallbackTestTask, "adapt_interval", autospec=True
+            ) as mock_adapt,
+            unittest.mock.patch.object(
+                OnFailureCallbackTestTask,
+                "effective_interval",
+                new_callable=unittest.mock.PropertyMock,
+                return_value=86400,
+            ),
+        ):
+            worker = django_rq.workers.get_worker(job.queue)
+            worker.work(burst=True, with_scheduler=True)
+
+        mock_adapt.assert_not_called()
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, SchedulerStatus.ENQUEUED)
+        self.assertEqual(task.scheduled_at, dt + datetime.timedelta(seconds=3600))
+
     def test_maximum_tries(self):
         """The task is not re-scheduled after a number of tries"""
 
@@ -18,16 +18,37 @@
 
 import datetime
 import json
+import math
 import os
 import pickle
 import shutil
 import tempfile
+import unittest
 
+from unittest.mock import patch
+
+import redis
 import rq
 import perceval.backend
 
+from django.test import override_settings
+
+from grimoirelab.core.consumers.envelope import is_envelope, unpack_envelope
 from grimoirelab.core.scheduler.jobs import GrimoireLabJob
-from grimoirelab.core.scheduler.tasks.chronicler import ChroniclerProgress, chronicler_job
+from grimoirelab.core.scheduler.models import SchedulerStatus
+from grimoirelab.core.scheduler.tasks import chronicler
+from grimoirelab.core.scheduler.tasks.chronicler import (
+    IDENTITY_EVENTS,
+    ChroniclerProgress,
+    EventDeduplicator,
+    EventPublisher,
+    ProgressCheckpoint,
+    PublishBatch,
+    StreamBackpressure,
+    chronicler_job,
+    preload_registries,
+)
+from grimoirelab.core.scheduler.tasks.models import EventizerTask
 
 from ..base import GrimoireLabTestCase
 
@@ -81,9 +102,14 @@ class TestChroniclerJob(GrimoireLabTestCase):
         self.assertEqual(result.summary.total, 9)
         self.assertEqual(result.summary.max_offset, "ce8e0b86a1e9877f42fe9453ede418519115f367")
 
+        # The final progress is written to the live progress key
+        progress = GrimoireLabJob.fetch_progress(job.id, self.conn)
+        self.assertEqual(progress["summary"]["fetched"], 9)
+        self.assertEqual(progress["summary"]["last_uuid"], result.summary.last_uuid)
+
         # Check generated events
-        events = self.conn.xread({"events": b"0-0"}, count=None, block=0)
-        events = [json.loads(e[1][b"data"]) for e in events[0][1]]
+        messages = self.conn.xread({"events": b"0-0"}, count=None, block=0)
+        events = [json.loads(e[1][b"data"]) for e in messages[0][1]]
 
         expected = [
             ("2d85a883e0ef63ebf7fa40e372aed44834092592", "org.grimoirelab.events.git.merge"),
@@ -205,6 +231,247 @@ class TestChroniclerJob(GrimoireLabTestCase):
             self.assertEqual(event["type"], expected[i][1])
             self.assertEqual(event["source"], "http://example.com/")
 
+        # Check header fields match the events
+        for message, event in zip(messages[0][1], events):
+            fields = message[1]
+            self.assertEqual(fields[b"id"].decode(), event["id"])
+            self.assertEqual(fields[b"type"].decode(), event["type"])
+            self.assertEqual(fields[b"source"].decode(), event["source"])
+
+    def test_job_identities_stream(self):
+        """Test if identity events are also published to the identities stream"""
+
+        job_args = {
+            "datasource_type": "git",
+            "datasource_category": "commit",
+            "events_stream": "events",
+            "stream_max_length": 500,
+            "identities_stream": "identities",
+            "identities_stream_max_length": 500,
+            "job_args": {
+                "uri": "http://example.com/",
+                "gitpath": os.path.join(self.dir, "data/git_log.txt"),
+            },
+        }
+
+        q = rq.Queue("test-queue", job_class=GrimoireLabJob, connection=self.conn, is_async=False)
+        q.enqueue(
+            f=chronicler_job, result_ttl=100, job_timeout=120, job_id="chonicler-git", **job_args
+        )
+
+        events = self.conn.xrange("events")
+        events = [json.loads(e[1][b"data"]) for e in events]
+        expected = [event for event in events if event["type"] in IDENTITY_EVENTS]
+
+        messages = self.conn.xrange("identities")
+        self.assertEqual(len(messages), 18)
+        self.assertEqual(len(messages), len(expected))
+
+        for message, event in zip(messages, expected):
+            fields = message[1]
+            self.assertEqual(fields[b"id"].decode(), event["id"])
+            self.assertEqual(fields[b"type"].decode(), event["type"])
+
+            identity = json.loads(fields[b"data"])
+            self.assertEqual(identity["id"], event["id"])
+            self.assertEqual(identity["type"], event["type"])
+            self.assertEqual(identity["source"], event["source"])
+            self.assertDictEqual(
+                identity["data"],
+                {
+                    "source": event["data"]["source"],
+                    "name": event["data"]["name"],
+                    "email": event["data"]["email"],
+                    "username": event["data"]["username"],
+                },
+            )
+
+    def test_job_dedup(self):
+        """Test if events published recently are not published again"""
+
+        job_args = {
+            "datasource_type": "git",
+            "datasource_category": "commit",
+            "events_stream": "events",
+            "stream_max_length": 500,
+            "dedup_window": 3600,
+            "job_args": {
+                "uri": "http://example.com/",
+                "gitpath": os.path.join(self.dir, "data/git_log.txt"),
+            },
+        }
+
+        q = rq.Queue("test-queue", job_class=GrimoireLabJob, connection=self.conn, is_async=False)
+        job = q.enqueue(
+            f=chronicler_job, result_ttl=100, job_timeout=120, job_id="chonicler-git", **job_args
+        )
+        result = job.return_value()
+
+        total = self.conn.xlen("events")
+        self.assertEqual(result.suppressed, 0)
+
+        # Running the job again doesn't publish the same events
+        job = q.enqueue(
+            f=chronicler_job, result_ttl=100, job_timeout=120, job_id="chonicler-git-2", **job_args
+        )
+        result = job.return_value()
+
+        self.assertEqual(result.summary.total, 9)
+        self.assertEqual(result.suppressed, total)
+        self.assertEqual(self.conn.xlen("events"), total)
+
+        # Other datasources are not affected
+        job_args["job_args"]["uri"] = "http://example.org/"
+        job = q.enqueue(
+            f=chronicler_job, result_ttl=100, job_timeout=120, job_id="chonicler-git-3", **job_args
+        )
+        result = job.return_value()
+
+        self.assertEqual(result.suppressed, 0)
+        self.assertEqual(self.conn.xlen("events"), total * 2)
+
+    def test_job_envelopes(self):
+        """Test if events are packed in envelopes"""
+
+        job_args = {
+            "datasource_type": "git",
+            "datasource_category": "commit",
+            "events_stream": "events",
+            "stream_max_length": 500,
+            "job_args": {
+                "uri": "http://example.com/",
+                "gitpath": os.path.join(self.dir, "data/git_log.txt"),
+            },
+        }
+
+        q = rq.Queue("test-queue", job_class=GrimoireLabJob, connection=self.conn, is_async=False)
+        q.enqueue(
+            f=chronicler_job, result_ttl=100, job_timeout=120, job_id="chonicler-1", **job_args
+        )
+        expected = [json.loads(e[1][b"data"]) for e in self.conn.xrange("events")]
+
+        self.conn.delete("events")
+
+        job_args["envelope_size"] = 10
+        job_args["compression"] = "zlib"
+        q.enqueue(
+            f=chronicler_job, result_ttl=100, job_timeout=120, job_id="chonicler-2", **job_args
+        )
+
+        messages = self.conn.xrange("events")
+        self.assertEqual(len(messages), math.ceil(len(expected) / 10))
+
+        events = []
+        for _, fields in messages:
+            self.assertTrue(is_envelope(fields))
+            self.assertEqual(fields[b"compression"], b"zlib")
+            events.extend(unpack_envelope(fields))
+
+        self.assertEqual(len(events), len(expected))
+        for event, expected_event in zip(events, expected):
+            self.assertEqual(event["id"], expected_event["id"])
+            self.assertEqual(event["type"], expected_event["type"])
+            self.assertDictEqual(event["data"], expected_event["data"])
+
+    def test_job_backpressure(self):
+        """Test if the job is paused while consumers don't keep up with the stream"""
+
+        job_args = {
+            "datasource_type": "git",
+            "datasource_category": "commit",
+            "events_stream": "events",
+            "stream_max_length": 500,
+            "high_watermark": 10,
+            "job_args": {
+                "uri": "http://example.com/",
+                "gitpath": os.path.join(self.dir, "data/git_log.txt"),
+            },
+        }
+
+        # The job is paused the first time only
+        waits = iter([1.5])
+
+        def wait(backpressure):
+            blocked = next(waits, 0.0)
+            backpressure.blocked_time += blocked
+            return blocked
+
+        q = rq.Queue("test-queue", job_class=GrimoireLabJob, connection=self.conn, is_async=False)
+        with patch.object(StreamBackpressure, "wait", autospec=True, side_effect=wait) as mock_wait:
+            job = q.enqueue(
+                f=chronicler_job,
+                result_ttl=100,
+                job_timeout=120,
+                job_id="chonicler-git",
+                **job_args,
+            )
+
+        result = job.return_value()
+        self.assertEqual(mock_wait.call_count, 1)
+        self.assertEqual(result.blocked_time, 1.5)
+        self.assertEqual(job.meta["progress"].blocked_time, 1.5)
+        self.assertEqual(result.summary.total, 9)
+
+    @patch("grimoirelab.core.scheduler.tasks.chronicler.EVENTS_CHUNK_SIZE", 10)
+    def test_job_checkpoints(self):
+        """Test if the progress is saved while the job is running"""
+
+        task = EventizerTask.create_task(
+            task_args={"uri": "http://example.com/"},
+            job_interval=86400,
+            job_max_retries=3,
+            datasource_type="git",
+            datasource_category="commit",
+        )
+        job_db = task.jobs.create(uuid="chronicler-git", job_num=1)
+        job_class = task.jobs.model
+
+        job_args = {
+            "datasource_type": "git",
+            "datasource_category": "commit",
+            "events_stream": "events",
+            "stream_max_length": 500,
+            "checkpoint_events": 10,
+            "checkpoint_interval": None,
+            "job_args": {
+                "uri": "http://example.com/",
+                "gitpath": os.path.join(self.dir, "data/git_log.txt"),
+            },
+        }
+
+        checkpoints = []
+
+        def save(job_db, *args, **kwargs):
+            checkpoints.append((job_db.progress.summary.total, self.conn.xlen("events")))
+
+        q = rq.Queue("test-queue", job_class=GrimoireLabJob, connection=self.conn, is_async=False)
+        with (
+            patch(
+                "grimoirelab.core.scheduler.tasks.chronicler.find_job",
+                return_value=job_db,
+            ),
+            patch.object(job_class, "save", autospec=True, side_effect=save),
+        ):
+            q.enqueue(
+                f=chronicler_job,
+                result_ttl=100,
+                job_timeout=120,
+                job_id=job_db.uuid,
+                **job_args,
+            )
+
+        self.assertGreater(len(checkpoints), 1)
+
+        # Checkpoints only include items whose events were published
+        events = [json.loads(e[1][b"data"]) for e in self.conn.xrange("events")]
+        for total, published in checkpoints:
+            commits = [
+                event
+                for event in events[:published]
+                if event["type"] == "org.grimoirelab.events.git.commit"
+            ]
+            self.assertGreaterEqual(len(commits), total)
+
     def test_job_no_result(self):
         """Execute a job that will not produce any results"""
 
@@ -263,6 +530,462 @@ class TestChroniclerJob(GrimoireLabTestCase):
         self.assertTrue(job.is_failed)
 
 
+class TestStreamBackpressure(GrimoireLabTestCase):
+    """Unit tests for StreamBackpressure class"""
+
+    def _add_entries(self, total):
+        for i in range(total):
+            self.conn.xadd("events", {"data": "{}"})
+
+    def test_low_watermark(self):
+        """Test whether the low watermark is half of the high by default"""
+
+        backpressure = StreamBackpressure(self.conn, "events", 100)
+        self.assertEqual(backpressure.low_watermark, 50)
+
+        backpressure = StreamBackpressure(self.conn, "events", 100, low_watermark=80)
+        self.assertEqual(backpressure.low_watermark, 80)
+
+        with self.assertRaises(ValueError):
+            StreamBackpressure(self.conn, "events", 100, low_watermark=200)
+
+    def test_wait_below_high_watermark(self):
+        """Test whether it doesn't block when the backlog is below the high watermark"""
+
+        self._add_entries(5)
+
+        backpressure = StreamBackpressure(self.conn, "events", 10)
+        self.assertEqual(backpressure.wait(), 0.0)
+        self.assertEqual(backpressure.blocked_time, 0.0)
+
+    def test_backlog_cached(self):
+        """Test whether the backlog is only checked after the check interval"""
+
+        self._add_entries(5)
+
+        backpressure = StreamBackpressure(self.conn, "events", 10, check_interval=3600)
+        self.assertEqual(backpressure.backlog, 5)
+
+        self._add_entries(5)
+        self.assertEqual(backpressure.backlog, 5)
+
+        backpressure.check_interval = 0
+        self.assertEqual(backpressure.backlog, 10)
+
+    def test_wait_until_low_watermark(self):
+        """Test whether it blocks until the backlog reaches the low watermark"""
+
+        self._add_entries(12)
+        self.conn.xgroup_create("events", "group", id="0")
+
+        backpressure = StreamBackpressure(
+            self.conn, "events", 10, low_watermark=5, check_interval=0
+        )
+
+        def consume(seconds):
+            # Consumers process 4 entries while the producer sleeps
+            self.conn.xreadgroup("group", "consumer", {"events": ">"}, count=4)
+            pending = self.conn.xpending_range("events", "group", "-", "+", 4)
+            self.conn.xack("events", "group", *[entry["message_id"] for entry in pending])
+
+        with patch(
+            "grimoirelab.core.scheduler.tasks.chronicler.time.sleep", side_effect=consume
+        ) as mock_sleep:
+            blocked = backpressure.wait()
+
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertGreater(blocked, 0)
+        self.assertEqual(backpressure.blocked_time, blocked)
+        self.assertEqual(backpressure.backlog, 4)
+
+    def test_wait_max_wait(self):
+        """Test whether it stops blocking once the maximum wait is reached"""
+
+        self._add_entries(12)
+        self.conn.xgroup_create("events", "group", id="0")
+        self.conn.xreadgroup("group", "consumer", {"events": ">"}, count=1)
+
+        backpressure = StreamBackpressure(
+            self.conn, "events", 10, low_watermark=5, check_interval=0, max_wait=0.05
+        )
+
+        with patch("grimoirelab.core.scheduler.tasks.chronicler.logger") as mock_logger:
+            blocked = backpressure.wait()
+
+        self.assertGreaterEqual(blocked, 0.05)
+        self.assertEqual(backpressure.blocked_time, blocked)
+        mock_logger.warning.assert_called_once()
+
+        # It doesn't block anymore, although the backlog is still high
+        self.assertEqual(backpressure.backlog, 12)
+        self.assertEqual(backpressure.wait(), 0.0)
+        self.assertEqual(backpressure.blocked_time, blocked)
+
+    def test_ignore_abandoned_groups(self):
+        """Test whether groups without active consumers don't block the producer"""
+
+        self._add_entries(12)
+        self.conn.xgroup_create("events", "abandoned", id="0")
+
+        backpressure = StreamBackpressure(
+            self.conn, "events", 10, check_interval=0, idle_timeout=3600
+        )
+        self.assertEqual(backpressure.backlog, 0)
+
+        with patch("grimoirelab.core.scheduler.tasks.chronicler.time.sleep") as mock_sleep:
+            self.assertEqual(backpressure.wait(), 0.0)
+        mock_sleep.assert_not_called()
+
+        # A group with an active consumer is taken into account
+        self.conn.xgroup_create("events", "active", id="0")
+        self.conn.xreadgroup("active", "consumer", {"events": ">"}, count=1)
+        self.assertEqual(backpressure.backlog, 12)
+
+
+class TestProgressCheckpoint(unittest.TestCase):
+    """Unit tests for ProgressCheckpoint class"""
+
+    def _summary(self, fetched):
+        summary = perceval.backend.Summary()
+        summary.fetched = fetched
+        summary.extras = {"fetched": fetched}
+        return summary
+
+    def test_disabled(self):
+        """Test whether checkpoints are never due when they are disabled"""
+
+        checkpoint = ProgressCheckpoint(None, None, events=None, interval=None)
+
+        with patch.object(chronicler, "_copy_summary", wraps=chronicler._copy_summary) as mock:
+            for i in range(100):
+                checkpoint.completed(self._summary(i))
+                self.assertFalse(checkpoint.due(1000))
+
+        mock.assert_not_called()
+
+    def test_copy_once_per_checkpoint(self):
+        """Test whether the summary is only copied once the checkpoint is requested"""
+
+        checkpoint = ProgressCheckpoint(None, None, events=10, interval=None)
+        summary = self._summary(1)
+
+        with patch.object(chronicler, "_copy_summary", wraps=chronicler._copy_summary) as mock:
+            checkpoint.completed(summary)
+            self.assertFalse(checkpoint.due(5))
+            checkpoint.completed(summary)
+            self.assertEqual(mock.call_count, 0)
+
+            # The number of events was reached; the summary is copied
+            # once the events of the next item were generated.
+            self.assertFalse(checkpoint.due(5))
+            summary.fetched = 2
+            summary.extras["fetched"] = 2
+            checkpoint.completed(summary)
+            checkpoint.completed(summary)
+            self.assertEqual(mock.call_count, 1)
+
+            self.assertTrue(checkpoint.due(1))
+
+        # The checkpoint isn't modified by the next items
+        summary.fetched = 3
+        summary.extras["fetched"] = 3
+        self.assertEqual(checkpoint.summary.fetched, 2)
+        self.assertDictEqual(checkpoint.summary.extras, {"fetched": 2})
+
+
+class TestEventPublisher(GrimoireLabTestCase):
+    """Unit tests for EventPublisher class"""
+
+    def test_publish(self):
+        """Test whether batches are published in order"""
+
+        publisher = EventPublisher(self.conn)
+        for i in range(10):
+            messages = [("events", {"data": str(i)}, 100)]
+            publisher.publish(PublishBatch(messages, [], None))
+
+        values = [e[1][b"data"] for e in self.conn.xrange("events")]
+        self.assertListEqual(values, [str(i).encode() for i in range(10)])
+
+    def test_checkpoint(self):
+        """Test whether checkpoints are returned once they were published"""
+
+        publisher = EventPublisher(self.conn)
+        self.assertIsNone(publisher.checkpoint())
+
+        publisher.publish(PublishBatch([("events", {"data": "1"}, 100)], [], "summary"))
+        self.assertEqual(publisher.checkpoint(), "summary")
+        self.assertIsNone(publisher.checkpoint())
+
+    def test_flush_max_commands(self):
+        """Test whether pipelines are flushed when they reach the maximum of commands"""
+
+        publisher = EventPublisher(self.conn, max_commands=3)
+        messages = [("events", {"data": str(i)}, 100) for i in range(7)]
+
+        with patch.object(self.conn, "pipeline", wraps=self.conn.pipeline) as mock_pipeline:
+            publisher.publish(PublishBatch(messages, [], None))
+
+        self.assertEqual(mock_pipeline.call_count, 3)
+        mock_pipeline.assert_called_with(transaction=False)
+        self.assertEqual(self.conn.xlen("events"), 7)
+
+    def test_flush_max_bytes(self):
+        """Test whether pipelines are flushed when they reach the maximum of bytes"""
+
+        publisher = EventPublisher(self.conn, max_bytes=250)
+        messages = [("events", {"data": "x" * 100}, 100) for _ in range(5)]
+
+        with patch.object(self.conn, "pipeline", wraps=self.conn.pipeline) as mock_pipeline:
+            publisher.publish(PublishBatch(messages, [], None))
+
+        # Each message has 104 bytes; 3 messages are needed to reach the limit
+        self.assertEqual(mock_pipeline.call_count, 2)
+        self.assertEqual(self.conn.xlen("events"), 5)
+
+    def test_dedup_after_messages(self):
+        """Test whether events are remembered with the last pipeline of the batch"""
+
+        dedup = EventDeduplicator(self.conn, "test", window=60)
+        publisher = EventPublisher(self.conn, dedup=dedup, max_commands=2)
+        messages = [("events", {"id": f"id_{i}"}, 100) for i in range(3)]
+
+        with patch.object(self.conn, "pipeline", wraps=self.conn.pipeline) as mock_pipeline:
+            publisher.publish(PublishBatch(messages, ["id_0", "id_1", "id_2"], None))
+
+        self.assertEqual(mock_pipeline.call_count, 2)
+        self.assertEqual(
+            dedup.published(["id_0", "id_1", "id_2", "id_3"]), {"id_0", "id_1", "id_2"}
+        )
+
+    @patch("grimoirelab.core.scheduler.tasks.chronicler.time.sleep")
+    def test_retry_transient_errors(self, mock_sleep):
+        """Test whether pipelines are sent again after transient errors"""
+
+        publisher = EventPublisher(self.conn, retry_backoff=1)
+        messages = [("events", {"data": str(i)}, 100) for i in range(3)]
+        execute = redis.client.Pipeline.execute
+        errors = [redis.exceptions.ConnectionError("lost"), redis.exceptions.TimeoutError("slow")]
+
+        def failing_execute(pipeline, *args, **kwargs):
+            if errors:
+                raise errors.pop(0)
+            return execute(pipeline, *args, **kwargs)
+
+        with patch.object(redis.client.Pipeline, "execute", autospec=True) as mock_execute:
+            mock_execute.side_effect = failing_execute
+            publisher.publish(PublishBatch(messages, [], "summary"))
+
+        self.assertEqual(mock_execute.call_count, 3)
+        self.assertListEqual([c.args[0] for c in mock_sleep.call_args_list], [1, 2])
+        values = [e[1][b"data"] for e in self.conn.xrange("events")]
+        self.assertListEqual(values, [b"0", b"1", b"2"])
+        self.assertEqual(publisher.checkpoint(), "summary")
+
+    @patch("grimoirelab.core.scheduler.tasks.chronicler.time.sleep")
+    def test_retry_max_retries(self, mock_sleep):
+        """Test whether the error is raised when the pipeline fails too many times"""
+
+        publisher = EventPublisher(self.conn, max_retries=2)
+        messages = [("events", {"data": "1"}, 100)]
+
+        with patch.object(
+            redis.client.Pipeline,
+            "execute",
+            side_effect=redis.exceptions.ConnectionError("lost"),
+        ) as mock_execute:
+            with self.assertRaises(redis.exceptions.ConnectionError):
+                publisher.publish(PublishBatch(messages, [], "summary"))
+
+        self.assertEqual(mock_execute.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertIsNone(publisher.checkpoint())
+
+    def test_no_retry_other_errors(self):
+        """Test whether errors that are not transient are raised without retrying"""
+
+        publisher = EventPublisher(self.conn)
+        messages = [("events", {"data": "1"}, 100)]
+
+        with patch.object(
+            redis.client.Pipeline,
+            "execute",
+            side_effect=redis.exceptions.ResponseError("wrong type"),
+        ) as mock_execute:
+            with self.assertRaises(redis.exceptions.ResponseError):
+                publisher.publish(PublishBatch(messages, [], None))
+
+        self.assertEqual(mock_execute.call_count, 1)
+
+
+class TestRegistries(unittest.TestCase):
+    """Unit tests for the registries of backends and eventizers"""
+
+    def setUp(self):
+        chronicler._find_backends.cache_clear()
+
+    def tearDown(self):
+        chronicler._find_backends.cache_clear()
+
+    def test_preload(self):
+        """Test whether the registries are loaded only once"""
+
+        with patch.object(
+            perceval.backend, "find_backends", wraps=perceval.backend.find_backends
+        ) as mock_backends:
+            preload_registries()
+            preload_registries()
+
+            self.assertIn("git", chronicler._find_backends())
+
+        self.assertEqual(mock_backends.call_count, 1)
+
+    def test_preload_eventizers(self):
+        """Test whether the modules of the eventizers are imported"""
+
+        with patch.object(
+            chronicler.importlib, "import_module", wraps=chronicler.importlib.import_module
+        ) as mock_import:
+            preload_registries()
+
+        modules = [call.args[0] for call in mock_import.call_args_list]
+        self.assertIn("chronicler.events.core.git", modules)
+
+
+class TestEventizerTask(GrimoireLabTestCase):
+    """Unit tests for EventizerTask class"""
+
+    def test_resume_canceled_from_checkpoint(self):
+        """Test whether canceled jobs with a checkpoint are resumed from it"""
+
+        task = EventizerTask.create_task(
+            task_args={"uri": "http://example.com/"},
+            job_interval=86400,
+            job_max_retries=3,
+            datasource_type="git",
+            datasource_category="commit",
+        )
+        job_args = {
+            "uri": "http://example.com/",
+            "gitpath": "/tmp/example-git",
+            "latest_items": False,
+        }
+        task.jobs.create(
+            uuid="job-1",
+            job_num=1,
+            job_args={"job_args": job_args},
+            status=SchedulerStatus.CANCELED,
+            progress={
+                "job_id": "job-1",
+                "backend": "git",
+                "category": "commit",
+                "summary": {
+                    "fetched": 5,
+                    "skipped": 0,
+                    "min_updated_on": None,
+                    "max_updated_on": None,
+                    "last_updated_on": None,
+                    "last_uuid": "abc",
+                    "min_offset": "1111",
+                    "max_offset": "5555",
+                    "last_offset": "5555",
+                    "extras": None,
+                },
+            },
+        )
+        task.status = SchedulerStatus.CANCELED
+
+        params = task.prepare_job_parameters()
+
+        expected = dict(job_args, recovery_commit="5555")
+        self.assertDictEqual(params["job_args"], expected)
+
+    def test_resume_canceled_without_checkpoint(self):
+        """Test whether canceled jobs without checkpoint reuse their arguments"""
+
+        task = EventizerTask.create_task(
+            task_args={"uri": "http://example.com/"},
+            job_interval=86400,
+            job_max_retries=3,
+            datasource_type="git",
+            datasource_category="commit",
+        )
+        job_args = {
+            "uri": "http://example.com/",
+            "gitpath": "/tmp/example-git",
+            "latest_items": True,
+        }
+        task.jobs.create(
+            uuid="job-1",
+            job_num=1,
+            job_args={"job_args": job_args},
+            status=SchedulerStatus.CANCELED,
+        )
+        task.status = SchedulerStatus.CANCELED
+
+        params = task.prepare_job_parameters()
+        self.assertDictEqual(params["job_args"], job_args)
+
+    @override_settings(
+        GRIMOIRELAB_ADAPTIVE_INTERVAL=True,
+        GRIMOIRELAB_ADAPTIVE_INTERVAL_MIN=900,
+        GRIMOIRELAB_ADAPTIVE_INTERVAL_MAX=14400,
+        GRIMOIRELAB_ADAPTIVE_INTERVAL_FACTOR=2,
+    )
+    def test_adapt_interval(self):
+        """Test whether the interval adapts to the items fetched by the jobs"""
+
+        task = EventizerTask.create_task(
+            task_args={"uri": "http://example.com/"},
+            job_interval=3600,
+            job_max_retries=3,
+            datasource_type="git",
+            datasource_category="commit",
+        )
+        self.assertEqual(task.effective_interval, 3600)
+
+        def progress(fetched):
+            summary = perceval.backend.Summary()
+            summary.fetched = fetched
+            return ChroniclerProgress("job-1", "git", "commit", summary)
+
+        expected = [(0, 7200), (0, 14400), (0, 14400), (10, 7200), (1, 3600), (5, 1800)]
+
+        for fetched, interval in expected:
+            task.adapt_interval(progress(fetched))
+            self.assertEqual(task.effective_interval, interval)
+
+        task.refresh_from_db()
+        self.assertEqual(task.adaptive_interval, 1800)
+        self.assertEqual(task.job_interval, 3600)
+
+        # Jobs without summary keep the interval
+        task.adapt_interval(ChroniclerProgress("job-1", "git", "commit", None))
+        task.adapt_interval(None)
+        self.assertEqual(task.effective_interval, 1800)
+
+    def test_adapt_interval_disabled(self):
+        """Test whether the interval is fixed when adaptive intervals are disabled"""
+
+        task = EventizerTask.create_task(
+            task_args={"uri": "http://example.com/"},
+            job_interval=3600,
+            job_max_retries=3,
+            datasource_type="git",
+            datasource_category="commit",
+        )
+        summary = perceval.backend.Summary()
+        task.adapt_interval(ChroniclerProgress("job-1", "git", "commit", summary))
+
+        task.refresh_from_db()
+        self.assertIsNone(task.adaptive_interval)
+        self.assertEqual(task.effective_interval, 3600)
+
+        # Intervals adapted before disabling the setting are ignored
+        task.adaptive_interval = 7200
+        self.assertEqual(task.effective_interval, 3600)
+
+
 class TestChroniclerProgress(GrimoireLabTestCase):
     """Unit tests for ChroniclerProgress class"""
 
@@ -299,6 +1022,8 @@ class TestChroniclerProgress(GrimoireLabTestCase):
                 "last_offset": 5,
                 "extras": {"extra_key": "extra_value"},
             },
+            "suppressed": 3,
+            "blocked_time": 1.5,
         }
 
         progress = ChroniclerProgress.from_dict(data)
@@ -306,6 +1031,8 @@ class TestChroniclerProgress(GrimoireLabTestCase):
         self.assertEqual(progress.job_id, job_id)
         self.assertEqual(progress.backend, backend)
         self.assertEqual(progress.category, category)
+        self.assertEqual(progress.suppressed, 3)
+        self.assertEqual(progress.blocked_time, 1.5)
         self.assertEqual(progress.summary.fetched, 10)
         self.assertEqual(progress.summary.skipped, 2)
         self.assertEqual(
@@ -369,6 +1096,8 @@ class TestChroniclerProgress(GrimoireLabTestCase):
                     2022, 1, 15, tzinfo=datetime.timezone.utc
                 ).timestamp(),
             },
+            "suppressed": 0,
+            "blocked_time": 0.0,
         }
 
         d = progress.to_dict()
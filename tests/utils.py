@@ -18,6 +18,8 @@
 
 import json
 
+from grimoirelab.core.consumers.envelope import EnvelopeBuilder
+
 
 class RedisStream:
     """Helper class to interact with Redis streams"""
@@ -29,10 +31,18 @@ class RedisStream:
     def create_group(self, group_name):
         self.redis_connection.xgroup_create(self.stream_name, group_name, id="0", mkstream=True)
 
-    def add_entry(self, event, message_id):
-        self.redis_connection.xadd(
-            self.stream_name, {b"data": json.dumps(event).encode()}, id=message_id
-        )
+    def add_entry(self, event, message_id, headers=False):
+        message = {b"data": json.dumps(event).encode()}
+        if headers:
+            for field in ("id", "type", "source"):
+                message[field.encode()] = event[field].encode()
+        self.redis_connection.xadd(self.stream_name, message, id=message_id)
+
+    def add_envelope(self, events, message_id, compression=None):
+        builder = EnvelopeBuilder(max_events=len(events), compression=compression)
+        for event in events:
+            builder.add(event["id"], event.get("type"), json.dumps(event))
+        self.redis_connection.xadd(self.stream_name, builder.build(), id=message_id)
 
     def read_group(self, group_name, consumer_name, total):
         return self.redis_connection.xreadgroup(